@@ -0,0 +1,374 @@
+"""
+AI Portfolio Generator - HTTP API
+Headless access to generation and rendering for other services
+
+Usage:
+    python api.py --host 0.0.0.0 --port 8000 --workers 4
+
+Endpoints:
+    GET  /health              Liveness check
+    GET  /templates           Available template names
+    POST /generate            Generate portfolio fields (and optionally HTML)
+    POST /generate?stream=1   Same, as server-sent events
+    POST /render              Render stored fields into one or all templates
+    POST /batch               Generate several portfolios in one call
+    GET  /metrics             Prometheus metrics (when the prometheus sink is on)
+
+Identical requests that arrive while one is already being generated share
+that upstream call. Each worker is a separate process with its own rate
+limiter, so set GROQ_RPM / GROQ_TPM to the per-worker share of your quota.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from batch import REQUIRED_FIELDS, build_portfolio_data
+from utils.ai_helper import AIPortfolioGenerator
+from utils.coalescer import RequestCoalescer
+from utils.config import get_setting
+from utils.metrics import get_default_tracer, PrometheusSink
+from utils.portfolio_templates import get_template, prepare_data, render_all, TEMPLATES
+from utils.response_parser import parse_portfolio_response
+from utils.router import get_default_router
+from utils.stream_parser import IncrementalJSONParser
+
+
+USER_FIELDS = ("name", "role", "skills", "experience", "projects")
+MAX_BATCH_SIZE = get_setting("PORTFOLIO_API_MAX_BATCH", 100, int)
+
+
+# This class is raised for bad input and turned into a 400 response
+class RequestError(Exception):
+    pass
+
+
+async def read_json(request):
+    try:
+        body = await request.json()
+    except ValueError:
+        raise RequestError("Request body must be valid JSON")
+    if not isinstance(body, dict):
+        raise RequestError("Request body must be a JSON object")
+    return body
+
+
+def get_user_data(record):
+    """Validate a request record and pick out the fields sent to the AI"""
+    missing = [field for field in REQUIRED_FIELDS if not str(record.get(field) or "").strip()]
+    if missing:
+        raise RequestError(f"Missing fields: {', '.join(missing)}")
+    return {field: str(record.get(field) or "").strip() for field in USER_FIELDS}
+
+
+def get_template_names(template):
+    """
+    Resolve the "template" option of a request
+
+    Returns:
+        list: Template names to render ([] for none, every name for "all")
+    """
+    if template is None:
+        return []
+    if template == "all":
+        return list(TEMPLATES.keys())
+    if template not in TEMPLATES:
+        raise RequestError(f"Unknown template: {template}")
+    return [template]
+
+
+def render_templates(record, fields, template_names, trace):
+    """Render the requested templates for one record"""
+    if not template_names:
+        return None
+    with trace.stage("render"):
+        portfolio_data = build_portfolio_data(record, fields)
+        if len(template_names) == len(TEMPLATES):
+            return render_all(portfolio_data)
+        prepared = prepare_data(portfolio_data)
+        return {name: get_template(name, prepared) for name in template_names}
+
+
+def build_response(record, result, template_names, trace, shared):
+    """Turn a generation result into the JSON returned by /generate"""
+    if not result["success"]:
+        return {"success": False, "error": result["error"]}
+
+    with trace.stage("parse"):
+        parsed = parse_portfolio_response(result["content"])
+
+    response = {
+        "success": True,
+        "fields": parsed["data"],
+        "valid": parsed["valid"],
+        "errors": parsed["errors"],
+        "recovered": parsed["recovered"],
+        "tokens_used": 0 if shared else result["tokens_used"],
+        "cached": result.get("cached", False),
+        "coalesced": shared,
+    }
+    if result.get("draft"):
+        # Adapted from a near-duplicate earlier request; send "fresh": true for a new one
+        response.update(draft=True, similarity=result["similarity"])
+    html = render_templates(record, parsed["data"], template_names, trace)
+    if html is not None:
+        response["html"] = html
+    return response
+
+
+def get_coalescing_key(generator, user_data, fresh):
+    return (generator.get_cache_key(user_data), fresh)
+
+
+async def generate_one(app, record, template_names, fresh):
+    """Generate (or join an identical in-flight generation) for one record"""
+    generator = app.state.generator
+    tracer = get_default_tracer()
+    user_data = get_user_data(record)
+    trace = tracer.start("api_generate", template=",".join(template_names) or "none")
+
+    try:
+        result, shared = await app.state.coalescer.run(
+            get_coalescing_key(generator, user_data, fresh),
+            lambda: generator.agenerate_portfolio_content(user_data, bypass_cache=fresh, trace=trace)
+        )
+        trace.set(coalesced=shared, success=result["success"])
+        return build_response(record, result, template_names, trace, shared)
+    finally:
+        tracer.record(trace)
+
+
+def format_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that closes its body iterator when the response ends
+
+    Starlette stops reading the iterator when the client disconnects but
+    leaves it suspended. Closing it unsubscribes from the coalesced stream
+    at once, so the upstream generation is dropped when nobody else reads it.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+async def stream_one(app, record, template_names, fresh):
+    """
+    Stream one generation as server-sent events
+
+    Events: "delta" (new text), "field" (a field finished), then one "done"
+    event with the same body /generate returns.
+    """
+    generator = app.state.generator
+    tracer = get_default_tracer()
+    user_data = get_user_data(record)
+    trace = tracer.start("api_generate_stream", template=",".join(template_names) or "none")
+
+    async def events():
+        parser = IncrementalJSONParser()
+        shared_stream = app.state.coalescer.stream(
+            ("stream",) + get_coalescing_key(generator, user_data, fresh),
+            lambda: generator.agenerate_portfolio_content_stream(user_data, bypass_cache=fresh, trace=trace)
+        )
+        try:
+            async with contextlib.aclosing(shared_stream):
+                async for event, shared in shared_stream:
+                    if event.get("done"):
+                        trace.set(coalesced=shared, success=event["success"])
+                        yield format_event("done", build_response(record, event, template_names, trace, shared))
+                        return
+
+                    yield format_event("delta", {"text": event["delta"]})
+                    for path, value in parser.feed(event["delta"]):
+                        yield format_event("field", {"path": list(path), "value": value})
+        finally:
+            tracer.record(trace)
+
+    return ClosingStreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"cache-control": "no-cache", "x-accel-buffering": "no"}
+    )
+
+
+async def health(request):
+    body = {"status": "ok"}
+    router = get_default_router()
+    if router is not None:
+        body["backends"] = router.get_stats()
+    return JSONResponse(body)
+
+
+async def list_templates(request):
+    return JSONResponse({"templates": list(TEMPLATES.keys())})
+
+
+async def generate(request):
+    """
+    Generate portfolio content for one person
+
+    Body: name, role, skills, experience, projects (+ email, linkedin, github),
+    optional "template" (a name or "all") to also get HTML, and "fresh"
+    to skip the response cache.
+    """
+    body = await read_json(request)
+    template_names = get_template_names(body.get("template"))
+    fresh = bool(body.get("fresh", False))
+
+    wants_stream = request.query_params.get("stream") in ("1", "true") or \
+        "text/event-stream" in request.headers.get("accept", "")
+    if wants_stream:
+        return await stream_one(request.app, body, template_names, fresh)
+
+    response = await generate_one(request.app, body, template_names, fresh)
+    return JSONResponse(response, status_code=200 if response["success"] else 502)
+
+
+async def render(request):
+    """
+    Render AI fields into HTML without calling the AI
+
+    Body: "fields" (HEADLINE, PROFESSIONAL_BIO, ABOUT_SECTION,
+    SKILLS_DESCRIPTION), name, role, contact fields and "template"
+    (a name or "all", default "all"). Add ?format=html with a single
+    template to get the page itself instead of JSON.
+    """
+    body = await read_json(request)
+    fields = body.get("fields")
+    if not isinstance(fields, dict):
+        raise RequestError("\"fields\" must be an object with the generated portfolio fields")
+    if not body.get("name"):
+        raise RequestError("Missing fields: name")
+
+    template_names = get_template_names(body.get("template", "all"))
+    # The role is only a fallback headline here, so it may be left out
+    record = dict(body, role=body.get("role") or "")
+    trace = get_default_tracer().start("api_render", template=",".join(template_names))
+    html = render_templates(record, fields, template_names, trace)
+    trace.set(success=True)
+    get_default_tracer().record(trace)
+
+    if request.query_params.get("format") == "html":
+        if len(template_names) != 1:
+            raise RequestError("format=html needs exactly one template")
+        return HTMLResponse(html[template_names[0]])
+    return JSONResponse({"html": html})
+
+
+async def batch(request):
+    """
+    Generate portfolios for several people in one call
+
+    Body: "records" (list of /generate bodies), optional "template" and
+    "fresh". Results come back in the same order as the records.
+    """
+    body = await read_json(request)
+    records = body.get("records")
+    if not isinstance(records, list) or not records:
+        raise RequestError("\"records\" must be a non-empty list")
+    if len(records) > MAX_BATCH_SIZE:
+        raise RequestError(f"At most {MAX_BATCH_SIZE} records per batch")
+
+    template_names = get_template_names(body.get("template"))
+    fresh = bool(body.get("fresh", False))
+
+    async def one(record):
+        try:
+            if not isinstance(record, dict):
+                raise RequestError("Each record must be a JSON object")
+            return await generate_one(request.app, record, template_names, fresh)
+        except RequestError as e:
+            return {"success": False, "error": str(e)}
+
+    results = await asyncio.gather(*(one(record) for record in records))
+    return JSONResponse({
+        "results": results,
+        "succeeded": sum(result["success"] for result in results),
+        "failed": sum(not result["success"] for result in results),
+    })
+
+
+async def metrics(request):
+    sink = get_default_tracer().get_sink(PrometheusSink)
+    if sink is None:
+        return PlainTextResponse("Enable the prometheus sink with PORTFOLIO_METRICS=prometheus\n", status_code=404)
+    return PlainTextResponse(sink.render(), media_type="text/plain; version=0.0.4")
+
+
+async def handle_request_error(request, exc):
+    return JSONResponse({"success": False, "error": str(exc)}, status_code=400)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # Built on startup so importing this module never needs an API key
+    if app.state.generator is None:
+        app.state.generator = AIPortfolioGenerator()
+    yield
+
+
+def create_app(generator=None):
+    """
+    Build the API application
+
+    Args:
+        generator (AIPortfolioGenerator): Optional generator to use
+            (default: one built from the environment on startup)
+
+    Returns:
+        Starlette: The ASGI application
+    """
+    app = Starlette(
+        routes=[
+            Route("/health", health),
+            Route("/templates", list_templates),
+            Route("/generate", generate, methods=["POST"]),
+            Route("/render", render, methods=["POST"]),
+            Route("/batch", batch, methods=["POST"]),
+            Route("/metrics", metrics),
+        ],
+        exception_handlers={RequestError: handle_request_error},
+        lifespan=lifespan,
+    )
+    app.state.generator = generator
+    app.state.coalescer = RequestCoalescer()
+    return app
+
+
+app = create_app()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the portfolio generator over HTTP")
+    parser.add_argument("--host", default=get_setting("PORTFOLIO_API_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=get_setting("PORTFOLIO_API_PORT", 8000, int))
+    parser.add_argument("--workers", type=int, default=get_setting("PORTFOLIO_API_WORKERS", 1, int),
+                        help="Worker processes")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+
+def main(argv=None):
+    import uvicorn
+
+    args = parse_args(argv)
+    uvicorn.run("api:app", host=args.host, port=args.port, workers=args.workers, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,9 +6,22 @@ GitHub: https://github.com/smebad/ai-portfolio-generator
 """
 
 import streamlit as st
+import hashlib
 import json
+import time
+import uuid
 from utils.ai_helper import AIPortfolioGenerator
-from utils.portfolio_templates import get_template, TEMPLATES
+from utils.cancellation import get_default_session_watchdog
+from utils.config import get_setting
+from utils.export import minify_html
+from utils.job_queue import get_default_job_queue
+from utils.metrics import get_default_tracer
+from utils.portfolio_templates import get_template, prepare_data, TEMPLATES
+from utils.response_parser import find_invalid_sections, parse_portfolio_response
+from utils.router import get_default_router
+from utils.session_store import get_default_session_store
+from utils.speculation import get_default_speculator
+from utils.stream_parser import IncrementalJSONParser
 
 # Page configuration - MUST be first Streamlit command
 st.set_page_config(
@@ -37,7 +50,7 @@ st.markdown("""
         margin-bottom: 2rem;
     }
     
-    .stButton>button {
+    .stButton>button, .stFormSubmitButton>button {
         width: 100%;
         background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
         color: white;
@@ -49,7 +62,7 @@ st.markdown("""
         transition: transform 0.2s;
     }
     
-    .stButton>button:hover {
+    .stButton>button:hover, .stFormSubmitButton>button:hover {
         transform: translateY(-2px);
         box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
     }
@@ -65,39 +78,671 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+# Sections that can be regenerated on their own
+SECTION_LABELS = {
+    "HEADLINE": "Headline",
+    "PROFESSIONAL_BIO": "Professional Bio",
+    "ABOUT_SECTION": "About Section",
+    "SKILLS_DESCRIPTION": "Skills"
+}
+
+# Template shown until the user picks another one
+DEFAULT_TEMPLATE = next(iter(TEMPLATES))
+
+# Alternatives per section offered by "Suggest alternatives"
+CANDIDATE_COUNT = get_setting("PORTFOLIO_CANDIDATES", 3, int)
+
+
 def initialize_session_state():
-    """Initialize session state variables for the app"""
-    if 'generated_content' not in st.session_state:
-        st.session_state.generated_content = None
-    if 'html_output' not in st.session_state:
-        st.session_state.html_output = None
+    """
+    Initialize session state variables for the app
+    
+    The generated portfolio itself lives in the shared session store;
+    session state only keeps its key.
+    """
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'result_key' not in st.session_state:
+        st.session_state.result_key = None
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
 
 
 def parse_ai_response(ai_content):
     """
     Parse the AI-generated JSON response
     
+    Fences, preambles, trailing commas and cut-off output are repaired by
+    utils.response_parser; any fields that could not be recovered are reported.
+    
+    Runs on the background worker, so problems are returned as messages
+    for the page to show instead of being written directly.
+    
     Args:
         ai_content (str): Raw AI response text
     
     Returns:
-        dict: Parsed portfolio data or raw content if parsing fails
+        tuple: (parsed portfolio data or raw content if parsing fails,
+            list of (level, message) pairs such as ("warning", "..."))
+    """
+    result = parse_portfolio_response(ai_content)
+    
+    if not result["data"]:
+        return {"raw_content": ai_content}, [("warning", f"JSON parsing error: {result['errors'][0]}")]
+    
+    messages = []
+    if result["recovered"]:
+        messages.append(("info", f"🩹 Repaired malformed output in: {', '.join(result['recovered'])}"))
+    
+    return result["data"], messages
+
+
+@st.cache_resource
+def get_generator():
+    """
+    Build the AI generator once per process and share it across sessions
+    
+    The generator holds a pooled Groq client, so reusing it keeps HTTP
+    connections alive instead of opening a new one on every click.
+    
+    Returns:
+        AIPortfolioGenerator: Shared generator instance
+    """
+    return AIPortfolioGenerator()
+
+
+def try_get_generator():
+    """
+    Get the shared generator without raising
+    
+    Building it fails when GROQ_API_KEY is missing, so callers can show a
+    friendly error instead. Only call this once a generation is actually
+    needed: a plain page load should not import the Groq SDK.
+    
+    Returns:
+        tuple: (AIPortfolioGenerator or None, the error or None)
     """
     try:
-        # Try to find JSON in the response
-        start = ai_content.find('{')
-        end = ai_content.rfind('}') + 1
+        return get_generator(), None
+    except Exception as e:
+        return None, e
+
+
+def get_result():
+    """
+    Load this session's portfolio from the session store
+    
+    Also marks the session as active, so its portfolio isn't evicted as idle.
+    
+    Returns:
+        dict: ai_fields, user_data and contact, or None if nothing has been
+            generated yet (or it was evicted)
+    """
+    store = get_default_session_store()
+    store.touch(st.session_state.session_id)
+    if st.session_state.result_key is None:
+        return None
+    return store.get(st.session_state.result_key)
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_result(result_key, template_name):
+    """
+    Render a stored portfolio with a template
+    
+    Keyed by the record's content hash, so sessions with the same result
+    share one rendered copy and nothing is kept per session.
+    
+    Args:
+        result_key (str): Session store key of the portfolio
+        template_name (str): Name of the selected template
+    
+    Returns:
+        str: Rendered HTML
+    
+    Raises:
+        KeyError: The record was evicted (raised so nothing gets cached)
+    """
+    return get_template(template_name, get_prepared_data(result_key))
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def get_prepared_data(result_key):
+    """
+    Build and escape the template data of a stored portfolio once
+    
+    Every template (and every template switch) renders from this shared
+    copy, so the escaping isn't repeated per render.
+    
+    Args:
+        result_key (str): Session store key of the portfolio
+    
+    Returns:
+        dict: Prepared template data
+    
+    Raises:
+        KeyError: The record was evicted (raised so nothing gets cached)
+    """
+    result = get_default_session_store().get(result_key)
+    if result is None:
+        raise KeyError(result_key)
+    return prepare_data(build_portfolio_data(
+        result["ai_fields"], result["user_data"]["name"], result["user_data"]["role"], result["contact"]
+    ))
+
+
+def get_rendered_html(template_name):
+    """
+    Get the portfolio HTML for a template from the stored AI result
+    
+    Args:
+        template_name (str): Name of the selected template
+    
+    Returns:
+        str: Rendered HTML, or None if nothing has been generated yet or
+            the record was evicted
+    """
+    if st.session_state.result_key is None:
+        return None
+    try:
+        return render_result(st.session_state.result_key, template_name)
+    except KeyError:
+        return None
+
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def get_download_html(html):
+    """
+    Minify a rendered portfolio for download (unused CSS is stripped too)
+    
+    Args:
+        html (str): Rendered portfolio HTML
+    
+    Returns:
+        str: Minified HTML, cached so reruns don't minify it again
+    """
+    return minify_html(html)
+
+
+def store_ai_fields(ai_fields, user_data, contact):
+    """
+    Keep the AI fields for previews, downloads and later section edits
+    
+    Only the parsed fields and inputs are stored; templates are rendered
+    from them when shown, so switching templates is still a local render
+    instead of a new AI call.
+    
+    Args:
+        ai_fields (dict): Parsed (and possibly repaired) AI fields
+        user_data (dict): The inputs the fields were generated from
+        contact (dict): email, linkedin and github values
+    """
+    st.session_state.result_key = get_default_session_store().put(
+        st.session_state.session_id,
+        {"ai_fields": ai_fields, "user_data": user_data, "contact": contact}
+    )
+
+
+def format_ai_output(ai_fields):
+    """
+    Format stored AI fields for the "View Raw AI Output" panel
+    
+    Args:
+        ai_fields (dict): Stored AI fields
+    
+    Returns:
+        str: The unparsed reply if parsing failed, otherwise the fields as JSON
+    """
+    if "raw_content" in ai_fields:
+        return ai_fields["raw_content"]
+    return json.dumps(ai_fields, indent=2, ensure_ascii=False)
+
+
+def build_portfolio_data(parsed_data, name, role, contact):
+    """
+    Map parsed AI fields onto the data expected by the templates
+    
+    Args:
+        parsed_data (dict): Fields parsed from the AI response (may be partial)
+        name (str): User's full name
+        role (str): Fallback headline while the AI headline is missing
+        contact (dict): email, linkedin and github values
+    
+    Returns:
+        dict: Data ready for get_template
+    """
+    return {
+        "name": name,
+        "headline": parsed_data.get("HEADLINE", role),
+        "bio": parsed_data.get("PROFESSIONAL_BIO", ""),
+        "about": parsed_data.get("ABOUT_SECTION", ""),
+        "skills_description": parsed_data.get("SKILLS_DESCRIPTION", {}),
+        "email": contact.get("email", ""),
+        "linkedin": contact.get("linkedin", ""),
+        "github": contact.get("github", "")
+    }
+
+
+def build_candidate_options(ai_fields, candidates):
+    """
+    Turn generated alternatives into the options offered per section
+    
+    The current text (when the portfolio has one) stays the first option.
+    Empty alternatives are dropped, and so are sections left without options.
+    
+    Args:
+        ai_fields (dict): Stored AI fields of the portfolio
+        candidates (dict): Section -> alternatives from generate_candidates
+    
+    Returns:
+        dict: Section -> options
+    """
+    options = {}
+    for section, values in candidates.items():
+        current = ai_fields.get(section)
+        section_options = [current] if current else []
+        section_options += [value for value in values if value and value != current]
+        if section_options:
+            options[section] = section_options
+    return options
+
+
+def run_generation_job(job, generator, user_data, contact, bypass_cache, trace):
+    """
+    Generate, parse and repair a portfolio on a background worker thread
+    
+    Progress is published on the job as it streams in: "buffer" (raw text so
+    far), "fields" (fields completed so far) and "stage". No Streamlit calls
+    are made here; messages for the user are returned instead. When the
+    job is stopped (superseded or abandoned) the upstream stream is dropped
+    and the trace is recorded here, since no session will collect it.
+    
+    Args:
+        job (Job): The job this function runs as
+        generator (AIPortfolioGenerator): Shared generator
+        user_data (dict): Inputs sent to the AI
+        contact (dict): email, linkedin and github values
+        bypass_cache (bool): Skip the response cache
+        trace (RequestTrace): Trace for this request
+    
+    Returns:
+        dict: success, content, ai_fields, messages, tokens_used, cached
+            (or success=False and error), plus the inputs and the trace
+    """
+    trace.set(queue_wait_s=round(time.time() - job.submitted_at, 4))
+    job.update(stage="generating", buffer="", fields={}, user_data=user_data, contact=contact)
+    
+    parser = IncrementalJSONParser()
+    result = {"success": False, "error": "Generation stream ended unexpectedly"}
+    events = generator.generate_portfolio_content_stream(
+        user_data, bypass_cache=bypass_cache, trace=trace, cancel_token=job.cancel_token
+    )
+    for event in events:
+        if event.get("done"):
+            result = event
+            break
+        if parser.feed(event["delta"]):
+            fields = {key: dict(value) if isinstance(value, dict) else value
+                      for key, value in parser.result.items()}
+            job.update(buffer=parser.buffer, fields=fields)
+        else:
+            job.update(buffer=parser.buffer)
+    
+    outcome = {"user_data": user_data, "contact": contact, "trace": trace, "messages": []}
+    outcome.update(result)
+    if result.get("cancelled"):
+        get_default_tracer().record(trace)
+        outcome["trace"] = None
+        return outcome
+    if not result["success"]:
+        return outcome
+    
+    # Parse AI response
+    with trace.stage("parse"):
+        ai_fields, messages = parse_ai_response(result["content"])
+    content = result["content"]
+    
+    # Re-request only the sections that failed validation
+    if "raw_content" not in ai_fields and find_invalid_sections(ai_fields):
+        job.update(stage="repairing")
+        repair = generator.repair_portfolio(user_data, ai_fields, trace=trace)
+        ai_fields = repair["data"]
+        if repair["repaired"]:
+            messages.append(("info", f"🩹 Regenerated: {', '.join(repair['repaired'])} ({repair['tokens_used']} tokens)"))
+            content = json.dumps(ai_fields, indent=2, ensure_ascii=False)
+        for error in repair["failed"].values():
+            messages.append(("warning", f"⚠️ {error}"))
+    
+    outcome.update(content=content, ai_fields=ai_fields, messages=messages)
+    return outcome
+
+
+def run_speculative_job(job, generator, user_data, contact, bypass_cache, template_choice, is_connected):
+    """
+    Generate a portfolio before the user clicks Generate
+    
+    Same as run_generation_job, with a trace of its own that is only
+    recorded if the user claims the result (or the job is stopped).
+    
+    Args:
+        job (Job): The job this function runs as
+        generator (AIPortfolioGenerator): Shared generator
+        user_data (dict): Inputs sent to the AI
+        contact (dict): email, linkedin and github values
+        bypass_cache (bool): Skip the response cache
+        template_choice (str): Template selected when the speculation started
+        is_connected (callable): Whether the browser session is still open
+    
+    Returns:
+        dict: Same as run_generation_job
+    """
+    get_default_session_watchdog().watch(job.cancel_token, is_connected)
+    trace = get_default_tracer().start(template=template_choice, speculative=True)
+    return run_generation_job(job, generator, user_data, contact, bypass_cache, trace)
+
+
+def get_connection_check():
+    """
+    Build a check for whether this browser session is still connected
+    
+    Jobs outlive the script run that submitted them, so the session
+    watchdog calls this from its own thread to notice closed tabs.
+    
+    Returns:
+        callable: Returns False while the session's websocket is closed
+            (always True outside `streamlit run`, e.g. under AppTest)
+    """
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    
+    ctx = get_script_run_ctx()
+    if ctx is None or not Runtime.exists():
+        return lambda: True
+    runtime, session_id = Runtime.instance(), ctx.session_id
+    return lambda: runtime.is_active_session(session_id)
+
+
+def get_current_job():
+    """
+    Get this session's generation job, if there is one
+    
+    Returns:
+        Job: The job, or None when nothing was submitted or it has expired
+    """
+    if not st.session_state.job_id:
+        return None
+    job = get_default_job_queue().get(st.session_state.job_id)
+    if job is None:
+        st.session_state.job_id = None
+    return job
+
+
+def finish_generation_job(job):
+    """
+    Store the result of a finished generation job and report it
+    
+    Args:
+        job (Job): A finished job from the queue
+    """
+    st.session_state.job_id = None
+    st.session_state.pop("live_preview", None)
+    st.session_state.pop("live_preview_data", None)
+    st.session_state.pop("candidates", None)
+    # The result now lives in the session store; don't keep a second copy in the queue
+    get_default_job_queue().discard(job.job_id)
+    result = job.result
+    
+    if result is None:
+        if job.error:
+            st.error(f"❌ Unexpected error: {job.error}")
+            st.info("💡 Try refreshing the page or checking your .env file")
+        return
+    
+    trace = result["trace"]
+    if trace is None:
+        # Stopped jobs record their own trace
+        st.warning(f"⏹️ {result['error']}. Click 'Generate Portfolio' to start again.")
+        return
+    try:
+        if not result["success"]:
+            st.error(f"❌ Error: {result['error']}")
+            st.info("💡 Tip: Check your internet connection and API key")
+            return
+        
+        for level, message in result["messages"]:
+            getattr(st, level)(message)
         
-        if start != -1 and end > start:
-            json_str = ai_content[start:end]
-            data = json.loads(json_str)
-            return data
+        # Store the fields and render the selected template (others render when picked)
+        with trace.stage("render"):
+            store_ai_fields(result["ai_fields"], result["user_data"], result["contact"])
+            get_rendered_html(st.session_state.get("template_choice", DEFAULT_TEMPLATE))
+        
+        if result.get("draft"):
+            st.success(f"✅ Portfolio generated from a similar earlier request ({result['similarity']:.0%} match, "
+                       f"0 tokens used). Tick 'Regenerate fresh' for a brand new version.")
+        elif result.get("cached"):
+            st.success("✅ Portfolio generated! Served from cache (0 tokens used)")
         else:
-            # If no JSON found, return raw content
-            return {"raw_content": ai_content}
-    except json.JSONDecodeError as e:
-        st.warning(f"JSON parsing error: {e}")
-        return {"raw_content": ai_content}
+            st.success(f"✅ Portfolio generated! Used {result['tokens_used']} tokens")
+    finally:
+        get_default_tracer().record(trace)
+
+
+@st.fragment(run_every=0.5)
+def show_generation_progress(job_id):
+    """
+    Show the raw output of a running job, refreshing on its own
+    
+    Only this fragment reruns while the job is in progress; once the job
+    finishes, the whole page reruns to pick up the result.
+    
+    Args:
+        job_id (str): Id of the running job
+    """
+    job_queue = get_default_job_queue()
+    job = job_queue.get(job_id)
+    if job is None or job.is_finished():
+        st.rerun()
+    
+    progress = job.snapshot()["progress"]
+    position = job_queue.position(job_id)
+    if position:
+        st.info(f"⏳ Waiting in queue (position {position})...")
+    elif progress.get("stage") == "repairing":
+        st.info("🩹 Fixing incomplete sections...")
+    else:
+        st.info("🔮 AI is crafting your portfolio...")
+    
+    if progress.get("buffer"):
+        st.code(progress["buffer"], language="json")
+
+
+def select_template():
+    """
+    Show the template picker above the preview
+    
+    It lives in the preview fragments, so switching templates only reruns
+    the preview instead of the whole page.
+    
+    Returns:
+        str: Selected template name
+    """
+    return st.selectbox(
+        "🎨 Portfolio Style",
+        options=list(TEMPLATES.keys()),
+        key="template_choice"
+    )
+
+
+@st.fragment(run_every=1.0)
+def show_live_preview():
+    """Render the fields a running job has completed so far"""
+    template_choice = select_template()
+    job = get_current_job()
+    if job is None:
+        return
+    
+    progress = job.snapshot()["progress"]
+    fields = progress.get("fields")
+    if not fields:
+        st.caption("The preview appears as soon as the first section is ready")
+        return
+    
+    # Only re-render when a new field (or another template) arrived since the last tick,
+    # and only escape the data again when a new field arrived
+    fields_hash = hashlib.sha256(
+        json.dumps(fields, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
+    live_data = st.session_state.get("live_preview_data")
+    if not live_data or live_data[0] != fields_hash:
+        user_data = progress["user_data"]
+        portfolio_data = build_portfolio_data(fields, user_data["name"], user_data["role"], progress["contact"])
+        live_data = (fields_hash, prepare_data(portfolio_data))
+        st.session_state.live_preview_data = live_data
+    live_preview = st.session_state.get("live_preview")
+    if not live_preview or live_preview[0] != (fields_hash, template_choice):
+        live_preview = ((fields_hash, template_choice), get_template(template_choice, live_data[1]))
+        st.session_state.live_preview = live_preview
+    st.components.v1.html(live_preview[1], height=600, scrolling=True)
+
+
+@st.fragment
+def show_preview():
+    """
+    Show the finished portfolio and its download button
+    
+    Runs as a fragment: picking another template reruns only this part of
+    the page. The iframe is emitted with identical content whenever the HTML
+    hasn't changed, so the browser reuses its cached copy by content hash
+    (see global.minCachedMessageSize in .streamlit/config.toml) instead of
+    receiving the page again.
+    """
+    template_choice = select_template()
+    result = get_result()
+    html_output = get_rendered_html(template_choice) if result else None
+    
+    if html_output:
+        st.components.v1.html(html_output, height=600, scrolling=True)
+        
+        # The file is served from memory, so downloading needs no rerun
+        safe_name = result["user_data"]["name"].replace(' ', '_').lower()
+        st.download_button(
+            label="📥 Download Portfolio HTML",
+            data=get_download_html(html_output),
+            file_name=f"portfolio_{safe_name}.html",
+            mime="text/html",
+            help="Download your portfolio as an HTML file",
+            on_click="ignore"
+        )
+    else:
+        st.info("👈 Fill in your details and click 'Generate Portfolio' to see the magic!")
+        
+        # Show example
+        with st.expander("📖 See Example", expanded=False):
+            st.markdown("""
+            **Example Input:**
+            - **Name:** Syed Ebad
+            - **Role:** Machine Learning Engineer
+            - **Skills:** Python, PyTorch, TensorFlow, NLP, Gen AI
+            - **Experience:** 5+ years
+            - **Projects:** Pregni Sense, Transformer from Scratch
+            
+            The AI will generate a complete portfolio with bio, headline, and detailed skill descriptions!
+            """)
+
+
+def is_debug_enabled():
+    """Check whether the hidden debug panel was requested (?debug=1 or PORTFOLIO_DEBUG=1)"""
+    if get_setting("PORTFOLIO_DEBUG", "").lower() in ("1", "true", "yes"):
+        return True
+    return st.query_params.get("debug", "") in ("1", "true")
+
+
+def render_debug_panel(limit=10):
+    """
+    Show stage timings of the last requests handled by this process
+    
+    Args:
+        limit (int): Number of recent requests to show
+    """
+    with st.expander("🐞 Debug: recent requests", expanded=False):
+        queue_stats = get_default_job_queue().get_stats()
+        st.caption(
+            f"Job queue: {queue_stats['queue_depth']} waiting, "
+            f"{queue_stats['running']}/{queue_stats['workers']} workers busy, "
+            f"utilisation {queue_stats['utilisation']:.0%}"
+        )
+        
+        router = get_default_router()
+        if router is not None:
+            st.caption("Backends: " + ", ".join(
+                f"{name} {'ok' if stats['healthy'] else 'open circuit'}"
+                + (f" {stats['latency_s'] * 1000:.0f} ms" if stats["latency_s"] is not None else "")
+                + f" ({stats['error_rate']:.0%} errors)"
+                for name, stats in router.get_stats().items()
+            ))
+        
+        speculator = get_default_speculator()
+        if speculator is not None:
+            spec_stats = speculator.get_stats()
+            st.caption(
+                f"Speculation: {spec_stats['started']} started, {spec_stats['claimed']} claimed, "
+                f"{spec_stats['stale']} stopped as stale, "
+                f"{spec_stats['skipped_budget'] + spec_stats['skipped_busy']} skipped"
+            )
+        
+        generator, _ = try_get_generator()
+        # No generator (e.g. GROQ_API_KEY missing) means nothing was cancelled
+        if generator is not None:
+            cancel_stats = generator.cancellation_stats
+            watchdog_stats = get_default_session_watchdog().get_stats()
+            st.caption(
+                f"Cancelled: {cancel_stats['cancelled']} generations "
+                f"({watchdog_stats['abandoned']} from closed tabs), "
+                f"~{cancel_stats['tokens_saved']} tokens saved"
+            )
+            
+            # Imported here: the pools only exist once a generator was built
+            from utils.client_pool import get_pool_stats
+            
+            for pool in get_pool_stats():
+                st.caption(
+                    f"Connection pool ({pool['kind']}, {pool['base_url']}): {pool['requests']} requests, "
+                    f"{pool['connections_opened']} connections opened, {pool['reuse_rate']:.0%} reused "
+                    f"({', '.join(pool['http_versions']) or 'no responses yet'})"
+                )
+        
+        traces = get_default_tracer().recent(limit)
+        if not traces:
+            st.caption("No requests recorded yet (the memory sink must be in PORTFOLIO_METRICS)")
+            return
+        
+        rows = []
+        for trace in traces:
+            attributes = trace["attributes"]
+            row = {
+                "time": time.strftime("%H:%M:%S", time.localtime(trace["timestamp"])),
+                "request": trace["name"],
+                "ok": attributes.get("success"),
+                "cache": attributes.get("cache", ""),
+                "template": attributes.get("template", ""),
+                "prompt_tok": attributes.get("prompt_tokens", 0),
+                "completion_tok": attributes.get("completion_tokens", 0),
+                "retries": attributes.get("retries", 0),
+                "backend": attributes.get("backend", ""),
+                "speculative": attributes.get("speculative", False),
+                "cancelled": attributes.get("cancelled", ""),
+                "total_ms": round(trace["duration_s"] * 1000, 1),
+            }
+            if "queue_wait_s" in attributes:
+                row["queue_wait_ms"] = round(attributes["queue_wait_s"] * 1000, 1)
+            if "first_token" in trace["marks"]:
+                row["first_token_ms"] = round(trace["marks"]["first_token"] * 1000, 1)
+            for stage, duration in trace["stages"].items():
+                row[f"{stage}_ms"] = round(duration * 1000, 1)
+            rows.append(row)
+        
+        st.dataframe(rows, use_container_width=True, hide_index=True)
 
 
 def main():
@@ -110,165 +755,266 @@ def main():
     st.markdown('<h1 class="main-header">🚀 AI Portfolio Generator</h1>', unsafe_allow_html=True)
     st.markdown('<p class="sub-header">Create a stunning professional portfolio in minutes with AI</p>', unsafe_allow_html=True)
     
+    # Pre-generates while the user fills in the fields (PORTFOLIO_SPECULATE=1)
+    speculator = get_default_speculator()
+    
     # Sidebar for user input
     with st.sidebar:
         st.header("📝 Your Information")
         st.write("Fill in your details below")
         
-        # User input form
-        name = st.text_input("Full Name*", placeholder="Enter your name here")
-        role = st.text_input("Professional Role*", placeholder="e.g., Data Scientist, Software Engineer")
-        
-        skills = st.text_area(
-            "Skills (comma-separated)*",
-            placeholder=" e.g., python, aws, frameworks, ml algorithms",
-            height=100
-        )
-        
-        experience = st.text_input(
-            "Years of Experience",
-            placeholder="e.g., 3 years, 5+ years"
-        )
-        
-        projects = st.text_area(
-            "Key Projects (brief description)*",
-            placeholder=" e.g., AI chatbot for customer support, Stock price prediction model",
-            height=100
-        )
-        
-        st.markdown("---")
-        
-        # Contact info
-        st.subheader("📧 Contact Information")
-        email = st.text_input("Email", placeholder="your.email@example.com")
-        linkedin = st.text_input("LinkedIn URL", placeholder="https://linkedin.com/in/yourprofile")
-        github = st.text_input("GitHub URL", placeholder="https://github.com/yourprofile")
-        
-        st.markdown("---")
-        
-        # Template selection
-        st.subheader("🎨 Choose Template")
-        template_choice = st.selectbox(
-            "Portfolio Style",
-            options=list(TEMPLATES.keys())
-        )
-        
-        st.markdown("---")
-        
-        # Generate button
-        generate_btn = st.button("✨ Generate Portfolio", type="primary")
+        # User input form: nothing is sent until the form is submitted,
+        # so typing in these fields doesn't rerun the page. Speculation has
+        # to see each field as it is filled in, so it uses a plain container.
+        with st.form("profile_form", border=False) if speculator is None else st.container():
+            name = st.text_input("Full Name*", placeholder="Enter your name here")
+            role = st.text_input("Professional Role*", placeholder="e.g., Data Scientist, Software Engineer")
+            
+            skills = st.text_area(
+                "Skills (comma-separated)*",
+                placeholder=" e.g., python, aws, frameworks, ml algorithms",
+                height=100
+            )
+            
+            experience = st.text_input(
+                "Years of Experience",
+                placeholder="e.g., 3 years, 5+ years"
+            )
+            
+            projects = st.text_area(
+                "Key Projects (brief description)*",
+                placeholder=" e.g., AI chatbot for customer support, Stock price prediction model",
+                height=100
+            )
+            
+            st.markdown("---")
+            
+            # Contact info
+            st.subheader("📧 Contact Information")
+            email = st.text_input("Email", placeholder="your.email@example.com")
+            linkedin = st.text_input("LinkedIn URL", placeholder="https://linkedin.com/in/yourprofile")
+            github = st.text_input("GitHub URL", placeholder="https://github.com/yourprofile")
+            
+            st.markdown("---")
+            
+            # Skip the response cache when the user wants a brand new version
+            regenerate_fresh = st.checkbox(
+                "🔄 Regenerate fresh",
+                value=False,
+                help="Ignore previously cached results and ask the AI for new content"
+            )
+            
+            # Generate button
+            if speculator is None:
+                generate_btn = st.form_submit_button("✨ Generate Portfolio", type="primary")
+            else:
+                generate_btn = st.button("✨ Generate Portfolio", type="primary")
+    
+    # The template picker lives in the preview fragment
+    template_choice = st.session_state.get("template_choice", DEFAULT_TEMPLATE)
+    
+    # Prepare user data
+    user_data = {
+        "name": name,
+        "role": role,
+        "skills": skills,
+        "experience": experience,
+        "projects": projects
+    }
+    contact = {"email": email, "linkedin": linkedin, "github": github}
+    
+    # Required fields that are still empty
+    missing_fields = []
+    if not name:
+        missing_fields.append("Full Name")
+    if not role:
+        missing_fields.append("Professional Role")
+    if not skills:
+        missing_fields.append("Skills")
+    if not projects:
+        missing_fields.append("Key Projects")
+    
+    # Once the required fields are filled in and stop changing, start the
+    # generation in the background; Generate then picks up that job
+    fingerprint = None
+    is_connected = get_connection_check()
+    if speculator is not None:
+        # Without a generator (e.g. no GROQ_API_KEY) there is nothing to
+        # speculate with; the error is shown when Generate is clicked
+        generator, _ = try_get_generator()
+        if generator is not None:
+            if not missing_fields:
+                fingerprint = json.dumps([user_data, contact, regenerate_fresh], sort_keys=True)
+            speculator.update(
+                st.session_state.session_id,
+                fingerprint,
+                run_speculative_job,
+                generator,
+                user_data,
+                contact,
+                regenerate_fresh,
+                template_choice,
+                is_connected
+            )
     
     # Main content area
     col1, col2 = st.columns([1, 1])
     
     with col1:
         st.subheader("🤖 AI-Generated Content")
-        
+        raw_placeholder = st.empty()
+    
+    with col2:
+        st.subheader("👁️ Portfolio Preview")
+    
+    with col1:
         if generate_btn:
+            generator, generator_error = (None, None) if missing_fields else try_get_generator()
+            
             # Validation with specific error messages
-            if not name or not role or not skills or not projects:
+            if missing_fields:
                 st.error("⚠️ Please fill in all required fields (marked with *)")
                 
                 # Show specific missing fields
-                missing_fields = []
-                if not name:
-                    missing_fields.append("Full Name")
-                if not role:
-                    missing_fields.append("Professional Role")
-                if not skills:
-                    missing_fields.append("Skills")
-                if not projects:
-                    missing_fields.append("Key Projects")
-                
                 for field in missing_fields:
                     st.warning(f"• Missing: {field}")
+            elif generator is None:
+                st.error(f"❌ Unexpected error: {str(generator_error)}")
+                st.info("💡 Try refreshing the page or checking your .env file")
             else:
-                with st.spinner("🔮 AI is crafting your portfolio..."):
-                    # Prepare user data
-                    user_data = {
-                        "name": name,
-                        "role": role,
-                        "skills": skills,
-                        "experience": experience,
-                        "projects": projects
-                    }
-                    
+                # Run the generation on the shared worker pool; this script
+                # run (and any rerun caused by widget changes) only polls it
+                job_queue = get_default_job_queue()
+                if st.session_state.job_id:
+                    # The previous click's generation is no longer wanted,
+                    # even if it is already streaming
+                    job_queue.stop(st.session_state.job_id, "superseded")
+                
+                # A speculation for exactly these inputs may already be done
+                job_id = None
+                if speculator is not None:
+                    job_id = speculator.claim(st.session_state.session_id, fingerprint)
+                
+                if job_id is None:
+                    # Times every stage of this request for the metrics sinks
+                    trace = get_default_tracer().start(template=template_choice)
+                    job_id = job_queue.submit(
+                        run_generation_job,
+                        generator,
+                        user_data,
+                        contact,
+                        regenerate_fresh,
+                        trace,
+                        name="generate_portfolio"
+                    )
+                st.session_state.job_id = job_id
+                
+                # Stop the generation if this tab is closed before it finishes
+                job = job_queue.get(job_id)
+                if job is not None:
+                    get_default_session_watchdog().watch(job.cancel_token, is_connected)
+        
+        # Pick up a finished generation, or keep showing its progress
+        job = get_current_job()
+        if job is not None and job.is_finished():
+            finish_generation_job(job)
+        elif job is not None:
+            show_generation_progress(job.job_id)
+        
+        result = get_result()
+        if result is None and st.session_state.result_key is not None:
+            st.session_state.result_key = None
+            st.info("⌛ Your last portfolio was cleared after a period of inactivity. "
+                    "Click 'Generate Portfolio' to create it again.")
+        
+        # Regenerate one section without re-running the whole generation
+        if result and "raw_content" not in result["ai_fields"]:
+            with st.expander("🔁 Regenerate a section", expanded=False):
+                section = st.selectbox(
+                    "Section",
+                    options=list(SECTION_LABELS.keys()),
+                    format_func=SECTION_LABELS.get
+                )
+                if st.button("Regenerate section"):
+                    tracer = get_default_tracer()
+                    trace = tracer.start("regenerate_section", template=template_choice, section=section)
                     try:
-                        # Generate content using AI
-                        ai_generator = AIPortfolioGenerator()
-                        result = ai_generator.generate_portfolio_content(user_data)
-                        
-                        if result["success"]:
-                            st.session_state.generated_content = result["content"]
-                            
-                            # Parse AI response
-                            parsed_data = parse_ai_response(result["content"])
-                            
-                            # Prepare data for template
-                            portfolio_data = {
-                                "name": name,
-                                "headline": parsed_data.get("HEADLINE", role),
-                                "bio": parsed_data.get("PROFESSIONAL_BIO", ""),
-                                "about": parsed_data.get("ABOUT_SECTION", ""),
-                                "skills_description": parsed_data.get("SKILLS_DESCRIPTION", {}),
-                                "email": email,
-                                "linkedin": linkedin,
-                                "github": github
-                            }
-                            
-                            # Generate HTML
-                            html = get_template(template_choice, portfolio_data)
-                            st.session_state.html_output = html
-                            
-                            st.success(f"✅ Portfolio generated! Used {result['tokens_used']} tokens")
+                        with st.spinner(f"Rewriting {SECTION_LABELS[section].lower()}..."):
+                            repair = get_generator().repair_portfolio(
+                                result["user_data"],
+                                result["ai_fields"],
+                                sections=[section],
+                                trace=trace
+                            )
+                        trace.set(success=bool(repair["repaired"]))
+                        if repair["repaired"]:
+                            with trace.stage("render"):
+                                store_ai_fields(repair["data"], result["user_data"], result["contact"])
+                                get_rendered_html(template_choice)
+                            result = get_result()
+                            st.session_state.pop("candidates", None)
+                            st.success(f"✅ {SECTION_LABELS[section]} regenerated ({repair['tokens_used']} tokens)")
                         else:
-                            st.error(f"❌ Error: {result['error']}")
-                            st.info("💡 Tip: Check your internet connection and API key")
-                    
+                            st.error(f"❌ Error: {repair['failed'][section]}")
                     except Exception as e:
+                        trace.set(success=False, error=str(e))
                         st.error(f"❌ Unexpected error: {str(e)}")
-                        st.info("💡 Try refreshing the page or checking your .env file")
+                    finally:
+                        tracer.record(trace)
+            
+            # Several takes on the headline and bio from a single call; picking
+            # one only re-renders the template, no AI call
+            with st.expander("🎲 Alternative headline & bio", expanded=False):
+                if st.button("Suggest alternatives"):
+                    tracer = get_default_tracer()
+                    trace = tracer.start("suggest_candidates", template=template_choice)
+                    try:
+                        with st.spinner(f"Writing {CANDIDATE_COUNT} alternatives..."):
+                            outcome = get_generator().generate_candidates(
+                                result["user_data"],
+                                count=CANDIDATE_COUNT,
+                                trace=trace
+                            )
+                        if outcome["success"]:
+                            st.session_state.candidates = build_candidate_options(
+                                result["ai_fields"], outcome["candidates"]
+                            )
+                            st.success(f"✅ Alternatives ready ({outcome['tokens_used']} tokens)")
+                        else:
+                            st.error(f"❌ Error: {outcome['error']}")
+                    except Exception as e:
+                        trace.set(success=False, error=str(e))
+                        st.error(f"❌ Unexpected error: {str(e)}")
+                    finally:
+                        tracer.record(trace)
+                
+                candidates = st.session_state.get("candidates")
+                if candidates:
+                    picked = dict(result["ai_fields"])
+                    for section, options in candidates.items():
+                        picked[section] = st.radio(SECTION_LABELS[section], options, key=f"candidate_{section}")
+                    if picked != result["ai_fields"]:
+                        store_ai_fields(picked, result["user_data"], result["contact"])
+                        get_rendered_html(template_choice)
+                        result = get_result()
         
-        # Display generated content
-        if st.session_state.generated_content:
-            st.markdown('<div class="success-box">✨ Content generated successfully!</div>', unsafe_allow_html=True)
-            with st.expander("View Raw AI Output", expanded=False):
-                st.code(st.session_state.generated_content, language="json")
-    
-    with col2:
-        st.subheader("👁️ Portfolio Preview")
+        # Display generated content (the progress view replaces it while a job runs)
+        if result and get_current_job() is None:
+            with raw_placeholder.container():
+                st.markdown('<div class="success-box">✨ Content generated successfully!</div>', unsafe_allow_html=True)
+                with st.expander("View Raw AI Output", expanded=False):
+                    st.code(format_ai_output(result["ai_fields"]), language="json")
         
-        if st.session_state.html_output:
-            # Show preview
-            st.components.v1.html(st.session_state.html_output, height=600, scrolling=True)
-            
-            # Download button - only if we have a name
-            if name:
-                safe_name = name.replace(' ', '_').lower()
-                st.download_button(
-                    label="📥 Download Portfolio HTML",
-                    data=st.session_state.html_output,
-                    file_name=f"portfolio_{safe_name}.html",
-                    mime="text/html",
-                    help="Download your portfolio as an HTML file"
-                )
-            else:
-                st.warning("⚠️ Please enter your name to enable download")
+    with col2:
+        if get_current_job() is not None:
+            show_live_preview()
         else:
-            st.info("👈 Fill in your details and click 'Generate Portfolio' to see the magic!")
-            
-            # Show example
-            with st.expander("📖 See Example", expanded=False):
-                st.markdown("""
-                **Example Input:**
-                - **Name:** Syed Ebad
-                - **Role:** Machine Learning Engineer
-                - **Skills:** Python, PyTorch, TensorFlow, NLP, Gen AI
-                - **Experience:** 5+ years
-                - **Projects:** Pregni Sense, Transformer from Scratch
-                
-                The AI will generate a complete portfolio with bio, headline, and detailed skill descriptions!
-                """)
+            show_preview()
+    
+    # Stage timings for recent requests, only shown with ?debug=1
+    if is_debug_enabled():
+        with st.sidebar:
+            render_debug_panel()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,301 @@
+"""
+AI Portfolio Generator - Batch Mode
+Generate portfolios for a whole cohort from a CSV or JSONL file
+
+Usage:
+    python batch.py people.csv --output-dir portfolios --concurrency 8
+
+Each record needs the same fields as the Streamlit form: name, role, skills,
+experience, projects (plus optional email, linkedin, github and id).
+Progress is written to a JSONL manifest; re-running the same command skips
+records that already succeeded, so an interrupted batch can be resumed.
+
+With --bundle the output directory becomes a static site: the template CSS is
+written once to assets/ under a content-hashed name and linked from every
+page, and index.html lists all portfolios. --zip packs it into one file.
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+from utils.ai_helper import AIPortfolioGenerator
+from utils.export import AssetStore, write_bundle_page, write_export, write_index, zip_bundle
+from utils.metrics import get_default_tracer
+from utils.portfolio_templates import get_template, prepare_data, TEMPLATES
+from utils.response_parser import parse_portfolio_response
+
+
+REQUIRED_FIELDS = ("name", "role", "skills", "projects")
+
+
+def read_records(path):
+    """
+    Stream records from a CSV or JSONL file without loading it all in memory
+
+    Args:
+        path (str): Input file (.csv, or .jsonl / .json lines)
+
+    Yields:
+        dict: One record per row, with a stable "id"
+    """
+    is_csv = path.lower().endswith(".csv")
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if is_csv:
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+
+        for index, row in enumerate(rows, start=1):
+            record = {key.strip(): (value or "").strip() if isinstance(value, str) else value
+                      for key, value in row.items() if key}
+            if not record.get("id"):
+                record["id"] = f"{index:05d}-{slugify(record.get('name', ''))}"
+            yield record
+
+
+def slugify(text):
+    """Turn a name into a safe file name fragment"""
+    slug = re.sub(r"[^a-z0-9]+", "_", str(text).lower()).strip("_")
+    return slug or "portfolio"
+
+
+def load_completed_ids(manifest_path):
+    """
+    Read the manifest from a previous run
+
+    Args:
+        manifest_path (str): Path to the JSONL manifest
+
+    Returns:
+        set: Ids of records that were generated successfully
+    """
+    return set(load_completed_entries(manifest_path))
+
+
+def load_completed_entries(manifest_path):
+    """
+    Read the successful entries of the manifest, latest entry per id
+
+    Returns:
+        dict: Record id -> manifest entry
+    """
+    completed = {}
+    if not os.path.exists(manifest_path):
+        return completed
+
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a half-written last line behind
+                continue
+            if entry.get("status") == "ok":
+                completed[entry["id"]] = entry
+    return completed
+
+
+def build_portfolio_data(record, parsed_data):
+    """Map a record and its parsed AI fields onto the template data"""
+    return {
+        "name": record["name"],
+        "headline": parsed_data.get("HEADLINE", record["role"]),
+        "bio": parsed_data.get("PROFESSIONAL_BIO", ""),
+        "about": parsed_data.get("ABOUT_SECTION", ""),
+        "skills_description": parsed_data.get("SKILLS_DESCRIPTION", {}),
+        "email": record.get("email", ""),
+        "linkedin": record.get("linkedin", ""),
+        "github": record.get("github", "")
+    }
+
+
+async def process_record(record, generator, args, trace, assets=None):
+    """
+    Generate, render and save a single portfolio
+
+    Stage timings, tokens and cache status are collected on `trace`. With an
+    AssetStore (bundle mode) the page links the shared template CSS.
+
+    Returns:
+        dict: Manifest entry for the record
+    """
+    entry = {"id": record["id"], "name": record.get("name", "")}
+    started = time.perf_counter()
+
+    missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+    if missing:
+        entry.update(status="invalid", error=f"Missing fields: {', '.join(missing)}")
+        return entry
+
+    user_data = {
+        "name": record["name"],
+        "role": record["role"],
+        "skills": record["skills"],
+        "experience": record.get("experience", ""),
+        "projects": record["projects"]
+    }
+    result = await generator.agenerate_portfolio_content(user_data, bypass_cache=args.fresh, trace=trace)
+
+    if not result["success"]:
+        entry.update(status="error", error=result["error"],
+                     latency_s=round(time.perf_counter() - started, 3))
+        return entry
+
+    with trace.stage("parse"):
+        parsed = parse_portfolio_response(result["content"])
+    with trace.stage("render"):
+        html = get_template(args.template, prepare_data(build_portfolio_data(record, parsed["data"])))
+
+    output_path = os.path.join(args.output_dir, f"{record['id']}.html")
+    with trace.stage("write"):
+        if assets is not None:
+            sizes = write_bundle_page(output_path, html, assets, slugify(args.template), args.precompress)
+        else:
+            sizes = write_export(output_path, html, minify=not args.no_minify, precompress=args.precompress)
+
+    entry.update(
+        status="ok",
+        output=output_path,
+        bytes=sizes,
+        tokens_used=result["tokens_used"],
+        cached=result.get("cached", False),
+        valid=parsed["valid"],
+        recovered=parsed["recovered"],
+        schema_errors=parsed["errors"],
+        stages_s={name: round(duration, 4) for name, duration in trace.get_stages().items()},
+        latency_s=round(time.perf_counter() - started, 3)
+    )
+    return entry
+
+
+async def run_batch(args):
+    """
+    Run the whole batch with a bounded number of concurrent generations
+
+    Records are read lazily into a small queue so memory stays flat no
+    matter how large the input file is.
+
+    Returns:
+        dict: Summary counters for the run
+    """
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest_path = args.manifest or os.path.join(args.output_dir, "manifest.jsonl")
+    completed = load_completed_ids(manifest_path)
+
+    generator = AIPortfolioGenerator()
+    tracer = get_default_tracer()
+    assets = AssetStore(args.output_dir, args.precompress) if args.bundle else None
+    queue = asyncio.Queue(maxsize=args.concurrency * 2)
+    summary = {"ok": 0, "error": 0, "invalid": 0, "skipped": 0, "tokens_used": 0}
+
+    manifest = open(manifest_path, "a", encoding="utf-8")
+
+    async def worker():
+        while True:
+            record = await queue.get()
+            if record is None:
+                queue.task_done()
+                return
+            trace = tracer.start("batch_record", template=args.template, record_id=record["id"])
+            try:
+                entry = await process_record(record, generator, args, trace, assets)
+            except Exception as e:
+                entry = {"id": record["id"], "name": record.get("name", ""),
+                         "status": "error", "error": str(e)}
+            trace.set(success=entry["status"] == "ok")
+            tracer.record(trace)
+            entry["finished_at"] = time.time()
+
+            manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            manifest.flush()
+
+            summary[entry["status"]] += 1
+            summary["tokens_used"] += entry.get("tokens_used", 0)
+            print(f"[{entry['status']}] {entry['id']} "
+                  f"{entry.get('latency_s', 0):.2f}s {entry.get('error', '')}".rstrip())
+            queue.task_done()
+
+    started = time.perf_counter()
+    workers = [asyncio.create_task(worker()) for _ in range(args.concurrency)]
+
+    try:
+        for record in read_records(args.input):
+            if record["id"] in completed:
+                summary["skipped"] += 1
+                continue
+            await queue.put(record)
+
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    finally:
+        manifest.close()
+
+    summary["elapsed_s"] = round(time.perf_counter() - started, 2)
+    processed = summary["ok"] + summary["error"] + summary["invalid"]
+    summary["records_per_s"] = round(processed / summary["elapsed_s"], 2) if summary["elapsed_s"] else 0.0
+
+    if args.bundle:
+        summary["bundle"] = write_bundle_index(args, manifest_path, assets)
+    return summary
+
+
+def write_bundle_index(args, manifest_path, assets):
+    """
+    Write index.html for every page in the manifest (earlier runs included)
+    and, with --zip, pack the output directory
+
+    Returns:
+        dict: Paths and sizes of the bundle
+    """
+    entries = load_completed_entries(manifest_path).values()
+    pages = [(os.path.basename(entry["output"]), entry.get("name") or entry["id"]) for entry in entries]
+    bundle = {
+        "pages": len(pages),
+        "index": write_index(args.output_dir, pages, precompress=args.precompress),
+        "assets": assets.assets,
+    }
+    if args.zip:
+        bundle["zip"] = zip_bundle(args.output_dir, args.zip, exclude=[os.path.basename(manifest_path)])
+        bundle["zip_bytes"] = os.path.getsize(bundle["zip"])
+    return bundle
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate portfolios in bulk from a CSV or JSONL file")
+    parser.add_argument("input", help="CSV or JSONL file with one person per record")
+    parser.add_argument("--output-dir", default="portfolios", help="Where HTML files are written")
+    parser.add_argument("--template", default="Modern Gradient", choices=list(TEMPLATES.keys()))
+    parser.add_argument("--concurrency", type=int, default=4, help="Maximum generations in flight")
+    parser.add_argument("--manifest", default=None, help="Manifest path (default: OUTPUT_DIR/manifest.jsonl)")
+    parser.add_argument("--fresh", action="store_true", help="Bypass the response cache")
+    parser.add_argument("--no-minify", action="store_true", help="Write the HTML exactly as rendered")
+    parser.add_argument("--precompress", action="store_true",
+                        help="Also write .gz (and .br with brotli installed) next to each page")
+    parser.add_argument("--bundle", action="store_true",
+                        help="Share the template CSS as a content-hashed file and write index.html")
+    parser.add_argument("--zip", default=None, help="With --bundle, also pack the output directory into this zip")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+    if args.zip and not args.bundle:
+        parser.error("--zip needs --bundle")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    summary = asyncio.run(run_batch(args))
+    print(json.dumps(summary))
+    return 0 if summary["error"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
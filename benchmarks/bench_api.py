@@ -0,0 +1,163 @@
+"""
+Load test for the HTTP API (api.py) against a local mock Groq API
+
+Usage:
+    python benchmarks/bench_api.py [--seconds 5] [--concurrency 16] [--workers 1]
+
+Starts benchmarks/mock_groq.py and `python api.py` in child processes, then
+drives POST /generate for --seconds per scenario:
+
+    cached      the same request over and over (served from the response cache)
+    identical   the same request with "fresh": true - concurrent copies are
+                coalesced into one upstream call
+    unique      a different person every request, "fresh": true
+
+Reports requests/s, p50/p95/p99 latency and how many upstream calls the mock
+received, as JSON.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_pipeline import get_commit, make_record, percentile  # noqa: E402
+from benchmarks.mock_groq import start_server_process  # noqa: E402
+
+
+SCENARIOS = ("cached", "identical", "unique")
+
+
+def start_api(base_url, port, workers, cache_path):
+    env = dict(
+        os.environ,
+        GROQ_API_KEY="mock-key",
+        GROQ_BASE_URL=base_url,
+        PORTFOLIO_CACHE_PATH=cache_path,
+        # Keep the limiter out of the way - the mock has no quota
+        GROQ_RPM="1000000",
+        GROQ_TPM="1000000000",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "api.py", "--port", str(port), "--workers", str(workers)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("api.py did not start within 30 seconds")
+
+
+async def run_scenario(scenario, api_url, seconds, concurrency):
+    latencies = []
+    failures = 0
+    counter = 0
+    deadline = None
+
+    def next_body():
+        nonlocal counter
+        counter += 1
+        if scenario == "unique":
+            return dict(make_record(f"{scenario}-{counter}"), fresh=True)
+        return dict(make_record(scenario), fresh=scenario == "identical")
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=api_url, timeout=60, limits=limits) as client:
+
+        async def user():
+            nonlocal failures
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.post("/generate", json=next_body())
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    failures += 1
+
+        # Prime the cache (and the connection pools) before timing
+        if scenario == "cached":
+            await client.post("/generate", json=next_body())
+        deadline = time.perf_counter() + seconds
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return latencies, failures, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="Duration of each scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--workers", type=int, default=1, help="api.py worker processes")
+    parser.add_argument("--port", type=int, default=8077)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--token-rate", type=float, default=1000.0, help="Mock tokens per second")
+    parser.add_argument("--first-token-delay", type=float, default=0.1, help="Mock seconds before the first token")
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    mock_process, base_url = start_server_process(
+        token_rate=args.token_rate, first_token_delay=args.first_token_delay
+    )
+    cache_dir = tempfile.TemporaryDirectory()
+    api_process = start_api(base_url, args.port, args.workers, os.path.join(cache_dir.name, "cache.sqlite3"))
+    api_url = f"http://127.0.0.1:{args.port}"
+
+    results = {}
+    try:
+        for scenario in args.scenarios:
+            upstream_before = httpx.get(f"{base_url}/stats").json()["requests"]
+            latencies, failures, elapsed = asyncio.run(
+                run_scenario(scenario, api_url, args.seconds, args.concurrency)
+            )
+            upstream = httpx.get(f"{base_url}/stats").json()["requests"] - upstream_before
+            results[scenario] = {
+                "requests": len(latencies),
+                "failures": failures,
+                "upstream_calls": upstream,
+                "requests_per_s": round(len(latencies) / elapsed, 1),
+                "latency_s": {
+                    "p50": round(percentile(latencies, 50), 4),
+                    "p95": round(percentile(latencies, 95), 4),
+                    "p99": round(percentile(latencies, 99), 4),
+                },
+            }
+    finally:
+        api_process.terminate()
+        api_process.wait()
+        mock_process.terminate()
+        mock_process.join()
+        cache_dir.cleanup()
+
+    report = {
+        "commit": get_commit(),
+        "config": {"seconds": args.seconds, "concurrency": args.concurrency, "workers": args.workers,
+                   "token_rate": args.token_rate, "first_token_delay": args.first_token_delay},
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Cache hit-rate replay: exact keys vs normalized keys vs near-duplicate drafts
+
+Usage:
+    python benchmarks/bench_cache_keys.py [--log requests.jsonl] [--thresholds 0.8 0.9]
+
+Replays a request log (JSONL, one user_data object per line, or lines with a
+"user_data" field) through three lookups, without calling any API:
+
+    exact        the old key: whitespace-collapsed user data
+    normalized   utils.cache.make_cache_key (canonical skills, role/experience case)
+    near@T       normalized key, then a utils.similarity lookup at threshold T
+
+Each request either hits, or misses and is added to the cache. Without --log
+a synthetic log is replayed: profiles resubmitted with reordered/recased
+skills, other separators and whitespace, small edits (one skill more or
+less), and other people with the same role and skills but their own
+projects. For the synthetic log, near hits that came from a different
+profile are counted as "wrong_profile".
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import make_cache_key  # noqa: E402
+from utils.similarity import SimilarityIndex  # noqa: E402
+
+
+ROLES = ["Machine Learning Engineer", "Data Scientist", "Frontend Developer", "Backend Engineer",
+         "DevOps Engineer", "Product Designer", "Data Engineer", "Mobile Developer"]
+SKILLS = ["Python", "SQL", "Docker", "Kubernetes", "React", "TypeScript", "AWS", "PyTorch",
+          "TensorFlow", "Figma", "Go", "Rust", "Spark", "Airflow", "GraphQL", "Node.js", "CI/CD",
+          "Terraform", "Pandas", "Swift", "Kotlin", "PostgreSQL", "Redis", "FastAPI"]
+PROJECT_WORDS = ["built", "a", "recommendation", "engine", "for", "retail", "migrated", "billing",
+                 "to", "microservices", "designed", "dashboard", "fraud", "detection", "pipeline",
+                 "mobile", "app", "chatbot", "search", "latency", "cut", "by", "forty", "percent"]
+SEPARATORS = [", ", ",", "; ", " | ", "\n", " , "]
+
+
+def baseline_key(user_data):
+    """The cache key before canonical normalization: whitespace collapsed only"""
+    normalized = {key: " ".join(value.split()) if isinstance(value, str) else value
+                  for key, value in user_data.items()}
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def recase(rng, text):
+    return rng.choice([text, text.lower(), text.upper(), text.title()])
+
+
+def make_profile(rng, index):
+    return {
+        "name": f"Person {index}",
+        "role": rng.choice(ROLES),
+        "skills": rng.sample(SKILLS, rng.randint(4, 8)),
+        "experience": f"{rng.randint(1, 12)} years",
+        "projects": " ".join(rng.choice(PROJECT_WORDS) for _ in range(rng.randint(12, 30))),
+    }
+
+
+def render_request(rng, profile, skills=None, cosmetic=True):
+    """Turn a profile into form input, with the cosmetic noise real users add"""
+    skills = list(skills or profile["skills"])
+    role, experience = profile["role"], profile["experience"]
+    separator, projects = ", ", profile["projects"]
+    # Each kind of noise shows up in about half of the resubmissions
+    if cosmetic:
+        if rng.random() < 0.5:
+            rng.shuffle(skills)
+        if rng.random() < 0.5:
+            skills = [recase(rng, skill) for skill in skills]
+            role = recase(rng, role)
+        if rng.random() < 0.5:
+            separator = rng.choice(SEPARATORS)
+        if rng.random() < 0.5:
+            role += rng.choice([".", " "])
+            experience = rng.choice([experience.title(), f" {experience} "])
+            projects += rng.choice(["  ", "\n"])
+    return {
+        "name": profile["name"],
+        "role": role,
+        "skills": separator.join(skills),
+        "experience": experience,
+        "projects": projects,
+    }
+
+
+def synthetic_log(count, seed=7):
+    """Yield (profile_id, user_data) pairs"""
+    rng = random.Random(seed)
+    profiles = []
+    for index in range(count):
+        roll = rng.random()
+        if not profiles or roll < 0.35:
+            profiles.append(make_profile(rng, len(profiles)))
+            profile_id = len(profiles) - 1
+            yield profile_id, render_request(rng, profiles[profile_id], cosmetic=False)
+        elif roll < 0.75:
+            # The same person again, typed differently
+            profile_id = rng.randrange(len(profiles))
+            yield profile_id, render_request(rng, profiles[profile_id])
+        elif roll < 0.85:
+            # The same person with one skill added or removed
+            profile_id = rng.randrange(len(profiles))
+            skills = list(profiles[profile_id]["skills"])
+            if rng.random() < 0.5 and len(skills) > 4:
+                skills.pop(rng.randrange(len(skills)))
+            else:
+                skills.append(rng.choice([skill for skill in SKILLS if skill not in skills]))
+            yield profile_id, render_request(rng, profiles[profile_id], skills)
+        else:
+            # Someone else with the same role and skills but their own projects
+            base = profiles[rng.randrange(len(profiles))]
+            other = dict(make_profile(rng, len(profiles)), role=base["role"], skills=base["skills"])
+            profiles.append(other)
+            yield len(profiles) - 1, render_request(rng, other)
+
+
+def read_log(path):
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                yield None, entry.get("user_data", entry)
+
+
+def replay(requests, thresholds):
+    exact_seen, normalized_seen = set(), set()
+    results = {"requests": len(requests), "exact_hits": 0, "normalized_hits": 0}
+    indexes = {threshold: (SimilarityIndex(threshold=threshold), {}) for threshold in thresholds}
+    near = {threshold: {"hits": 0, "near_hits": 0, "wrong_profile": 0} for threshold in thresholds}
+
+    for profile_id, user_data in requests:
+        key = baseline_key(user_data)
+        results["exact_hits"] += key in exact_seen
+        exact_seen.add(key)
+
+        key = make_cache_key(user_data, "model", "1")
+        hit = key in normalized_seen
+        results["normalized_hits"] += hit
+        normalized_seen.add(key)
+
+        for threshold, (index, owners) in indexes.items():
+            counters = near[threshold]
+            if hit:
+                counters["hits"] += 1
+                continue
+            match = index.find(user_data, exclude_key=key)
+            if match is not None:
+                counters["hits"] += 1
+                counters["near_hits"] += 1
+                if profile_id is not None and owners[match["key"]] != profile_id:
+                    counters["wrong_profile"] += 1
+            else:
+                index.add(key, user_data)
+                owners[key] = profile_id
+
+    total = max(results["requests"], 1)
+    results["exact_hit_rate"] = round(results["exact_hits"] / total, 3)
+    results["normalized_hit_rate"] = round(results["normalized_hits"] / total, 3)
+    for threshold, counters in near.items():
+        counters["hit_rate"] = round(counters["hits"] / total, 3)
+        results[f"near@{threshold}"] = counters
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", default=None, help="JSONL request log (default: synthetic)")
+    parser.add_argument("--requests", type=int, default=2000, help="Synthetic log length")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.8, 0.9, 0.95])
+    args = parser.parse_args(argv)
+
+    requests = list(read_log(args.log) if args.log else synthetic_log(args.requests))
+    print(json.dumps(replay(requests, args.thresholds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
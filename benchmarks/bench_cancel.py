@@ -0,0 +1,151 @@
+"""
+Cancellation benchmark: upstream tokens spent on generations nobody waits for
+
+Usage:
+    python benchmarks/bench_cancel.py [--rounds 3] [--after 1.0] [--app app.py] [--output results.json]
+
+Starts `streamlit run` against benchmarks/mock_groq.py and drives browser
+tabs over the websocket (the client from bench_ui.py) through two ways of
+walking away from a generation, --after seconds into it:
+
+    resubmit   edit a field and click Generate again, then wait for the result
+    close      close the tab
+
+After each round it waits for the mock to go quiet, then reads how many
+completion tokens it streamed and how many streams the client dropped
+part-way. One uninterrupted generation streams `full_generation_tokens`, so
+without cancellation a resubmit round costs about two of those and a close
+round one.
+
+To measure an older app.py:
+
+    git show HEAD~1:app.py > /tmp/app_before.py
+    python benchmarks/bench_cancel.py --app /tmp/app_before.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_pipeline import make_record  # noqa: E402
+from benchmarks.bench_ui import BrowserTab, DOWNLOAD_LABEL, FIELDS, GENERATE_LABEL, start_app  # noqa: E402
+from benchmarks.mock_groq import SAMPLE_PORTFOLIO, count_tokens, start_server_process  # noqa: E402
+
+
+SCENARIOS = ("resubmit", "close")
+
+
+def mock_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/stats", timeout=5) as response:
+        return json.loads(response.read())
+
+
+async def wait_for_quiet(base_url, quiet=1.5, timeout=60):
+    """Wait until the mock has streamed nothing new for `quiet` seconds"""
+    deadline = time.monotonic() + timeout
+    last, since = None, time.monotonic()
+    while time.monotonic() < deadline:
+        tokens = mock_stats(base_url)["completion_tokens"]
+        if tokens != last:
+            last, since = tokens, time.monotonic()
+        elif time.monotonic() - since >= quiet:
+            return
+        await asyncio.sleep(0.1)
+
+
+async def run_round(port, base_url, scenario, record, after, timeout):
+    import websockets
+
+    before = mock_stats(base_url)
+    started = time.monotonic()
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                                  max_size=None) as websocket:
+        tab = BrowserTab(websocket)
+        reader = asyncio.create_task(tab.read())
+        try:
+            await tab.rerun()
+            await tab.settle()
+            for label, key in FIELDS:
+                await tab.settle(await tab.set_value(label, record[key]))
+
+            await tab.click(GENERATE_LABEL)
+            await asyncio.sleep(after)
+
+            if scenario == "resubmit":
+                await tab.set_value("Years of Experience", record["experience"] + " (edited)")
+                await tab.click(GENERATE_LABEL)
+                await tab.wait_until(lambda: DOWNLOAD_LABEL in tab.widgets, timeout)
+        finally:
+            tab.close()
+            reader.cancel()
+    elapsed = time.monotonic() - started
+
+    await wait_for_quiet(base_url, timeout=timeout)
+    stats = mock_stats(base_url)
+    return {
+        "requests": stats["requests"] - before["requests"],
+        "completion_tokens": stats["completion_tokens"] - before["completion_tokens"],
+        "aborted": stats["aborted"] - before["aborted"],
+        "tab_seconds": round(elapsed, 3),
+    }
+
+
+async def run(port, base_url, args):
+    results = {}
+    index = 0
+    for scenario in SCENARIOS:
+        rounds = []
+        for _ in range(args.rounds):
+            rounds.append(await run_round(port, base_url, scenario, make_record(index), args.after, args.timeout))
+            index += 1
+        results[scenario] = {key: round(sum(r[key] for r in rounds) / len(rounds), 3) for key in rounds[0]}
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"), help="Streamlit script to measure")
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds per scenario")
+    parser.add_argument("--after", type=float, default=1.0, help="Seconds into the generation to walk away")
+    parser.add_argument("--token-rate", type=float, default=100.0, help="Mock tokens per second")
+    parser.add_argument("--grace", type=float, default=2.0,
+                        help="PORTFOLIO_ABANDON_GRACE_SECONDS for the app")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a generation")
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    mock, base_url = start_server_process(token_rate=args.token_rate)
+    cache_dir = tempfile.mkdtemp(prefix="bench_cancel_")
+    app, port = start_app(os.path.abspath(args.app), base_url, os.path.join(cache_dir, "cache.sqlite3"),
+                          PORTFOLIO_ABANDON_GRACE_SECONDS=str(args.grace))
+    try:
+        results = asyncio.run(run(port, base_url, args))
+    finally:
+        app.terminate()
+        app.wait()
+        mock.terminate()
+
+    report = {
+        "app": os.path.abspath(args.app),
+        "rounds": args.rounds,
+        "after_s": args.after,
+        "full_generation_tokens": count_tokens(json.dumps(SAMPLE_PORTFOLIO, indent=2)),
+        "per_round": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
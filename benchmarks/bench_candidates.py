@@ -0,0 +1,142 @@
+"""
+Alternatives benchmark: several headline/bio options from one call vs asking again
+
+Usage:
+    python benchmarks/bench_candidates.py [--requests 10] [--count 3] [--output results.json]
+
+Starts benchmarks/mock_groq.py paced like llama-3.3-70b-versatile and gets
+--count options for both the headline and the bio three ways:
+
+    regenerate  what users did before: click Generate again, --count full
+                generations with the response cache bypassed
+    sections    --count single-section regenerations per section, one after
+                another (the "Regenerate a section" expander)
+    candidates  one generate_candidates call asking for --count alternatives
+                per section
+
+Per mode it prints the p50/p95 time to have every option, the API calls and
+the prompt and completion tokens spent per request, and how many distinct
+options came back. Requests run one at a time.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_pipeline import make_record, percentile  # noqa: E402
+from benchmarks.mock_groq import start_server_process  # noqa: E402
+from utils.ai_helper import AIPortfolioGenerator, CANDIDATE_SECTIONS  # noqa: E402
+from utils.cache import ResponseCache  # noqa: E402
+from utils.metrics import RequestTrace  # noqa: E402
+from utils.rate_limiter import RateLimiter  # noqa: E402
+from utils.response_parser import parse_portfolio_response  # noqa: E402
+
+
+def regenerate(generator, record, count):
+    options = {section: [] for section in CANDIDATE_SECTIONS}
+    tokens = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for _ in range(count):
+        trace = RequestTrace()
+        result = generator.generate_portfolio_content(record, bypass_cache=True, trace=trace)
+        tokens["calls"] += 1
+        tokens["prompt_tokens"] += trace.attributes.get("prompt_tokens", 0)
+        tokens["completion_tokens"] += trace.attributes.get("completion_tokens", 0)
+        if result["success"]:
+            data = parse_portfolio_response(result["content"])["data"]
+            for section in CANDIDATE_SECTIONS:
+                options[section].append(data.get(section))
+    return options, tokens
+
+
+def sections(generator, record, count):
+    options = {section: [] for section in CANDIDATE_SECTIONS}
+    tokens = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    for section in CANDIDATE_SECTIONS:
+        for _ in range(count):
+            result = generator.generate_section(record, section)
+            tokens["calls"] += 1
+            tokens["prompt_tokens"] += result.get("prompt_tokens", 0)
+            tokens["completion_tokens"] += result.get("completion_tokens", 0)
+            if result["success"]:
+                options[section].append(result["value"])
+    return options, tokens
+
+
+def candidates(generator, record, count):
+    result = generator.generate_candidates(record, count=count)
+    tokens = {
+        "calls": 1,
+        "prompt_tokens": result.get("prompt_tokens", 0),
+        "completion_tokens": result.get("completion_tokens", 0),
+    }
+    return result.get("candidates", {section: [] for section in CANDIDATE_SECTIONS}), tokens
+
+
+MODES = {"regenerate": regenerate, "sections": sections, "candidates": candidates}
+
+
+def run_mode(generator, mode, records, count):
+    latencies = []
+    totals = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    distinct = 0
+    for record in records:
+        started = time.perf_counter()
+        options, tokens = MODES[mode](generator, record, count)
+        latencies.append(time.perf_counter() - started)
+        for key, value in tokens.items():
+            totals[key] += value
+        distinct += sum(len({json.dumps(value) for value in values if value}) for values in options.values())
+
+    return {
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "calls_per_request": totals["calls"] / len(records),
+        "prompt_tokens_per_request": round(totals["prompt_tokens"] / len(records), 1),
+        "completion_tokens_per_request": round(totals["completion_tokens"] / len(records), 1),
+        "distinct_options_per_request": round(distinct / len(records), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="Profiles per mode")
+    parser.add_argument("--count", type=int, default=3, help="Options wanted per section")
+    parser.add_argument("--token-rate", type=float, default=275.0, help="Mock tokens per second")
+    parser.add_argument("--first-token-delay", type=float, default=0.3, help="Mock seconds to first token")
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    process, base_url = start_server_process(token_rate=args.token_rate, first_token_delay=args.first_token_delay)
+    try:
+        os.environ["GROQ_API_KEY"] = "mock-key"
+        limiter = RateLimiter(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9)
+        generator = AIPortfolioGenerator(cache=ResponseCache(path=None), limiter=limiter,
+                                         base_url=base_url, model_plan={})
+        # Warm up the connection pool
+        generator.generate_section(make_record(-1), "HEADLINE")
+
+        records = [make_record(index) for index in range(args.requests)]
+        results = {mode: run_mode(generator, mode, records, args.count) for mode in MODES}
+    finally:
+        process.terminate()
+        process.join()
+
+    report = {
+        "config": {"requests": args.requests, "count": args.count, "token_rate": args.token_rate,
+                   "first_token_delay": args.first_token_delay},
+        "modes": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Export size report: bytes per template at every step of the export pipeline
+
+Usage:
+    python benchmarks/bench_export.py [--input portfolio.json] [--json]
+
+Renders a portfolio (the template benchmark's sample by default, or the
+template data in --input) through every entry in TEMPLATES and reports:
+
+    raw          the page as get_template returns it
+    raw_gz       raw page gzipped, i.e. what on-the-fly CDN compression sends
+    minified     whitespace and comments removed, CSS minified
+    css_stripped minified with CSS rules that match nothing removed
+    gz / br      the precompressed siblings written by `batch.py --precompress`
+
+plus how long minify_html takes per page.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_templates import SAMPLE_DATA  # noqa: E402
+from utils.export import minify_html, template_size_report  # noqa: E402
+from utils.portfolio_templates import render_all  # noqa: E402
+
+
+def time_minify(html, runs=200):
+    """Average milliseconds per minify_html call"""
+    started = time.perf_counter()
+    for _ in range(runs):
+        minify_html(html)
+    return (time.perf_counter() - started) / runs * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--input", default=None, help="JSON file with template data (name, headline, bio, ...)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    data = SAMPLE_DATA
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            data = json.load(f)
+
+    report = template_size_report(data)
+    for template_name, html in render_all(data).items():
+        report[template_name]["minify_ms"] = round(time_minify(html), 3)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    columns = ("raw", "raw_gz", "minified", "css_stripped", "gz", "br")
+    print(f"{'template':<20}" + "".join(f"{column:>14}" for column in columns) + f"{'minify ms':>12}")
+    for template_name, sizes in report.items():
+        cells = "".join(f"{sizes.get(f'{column}_bytes', '-'):>14}" for column in columns)
+        print(f"{template_name:<20}{cells}{sizes['minify_ms']:>12}")
+
+
+if __name__ == "__main__":
+    main()
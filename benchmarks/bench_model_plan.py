@@ -0,0 +1,147 @@
+"""
+Model plan benchmark: one large-model call vs small + large models in parallel
+
+Usage:
+    python benchmarks/bench_model_plan.py [--requests 20] [--small-invalid-rate 0.2] [--output results.json]
+
+Starts benchmarks/mock_groq.py with one pacing per model (by default Groq's
+published speeds for llama-3.3-70b-versatile and llama-3.1-8b-instant) and
+generates the same portfolios two ways:
+
+    single  today's path: every section from the large model in one call
+    plan    SMALL_MODEL_SECTIONS from the small model and ABOUT_SECTION from
+            the large one, issued concurrently and merged; a small-model
+            section that fails validation is rewritten by the large model
+
+--small-invalid-rate is the share of small-model replies with a section that
+fails validation, so the cost of escalations shows up in the numbers.
+
+Per mode it prints p50/p95 latency, tokens per model, the estimated cost
+per portfolio (PRICES, USD per million tokens) and how many sections were
+escalated. Requests run one at a time and bypass the response cache.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_pipeline import make_record, percentile  # noqa: E402
+from benchmarks.mock_groq import start_server_process  # noqa: E402
+from utils.ai_helper import AIPortfolioGenerator, SMALL_MODEL_SECTIONS  # noqa: E402
+from utils.cache import ResponseCache  # noqa: E402
+from utils.metrics import RequestTrace  # noqa: E402
+from utils.rate_limiter import RateLimiter  # noqa: E402
+from utils.response_parser import parse_portfolio_response  # noqa: E402
+
+
+LARGE_MODEL = "llama-3.3-70b-versatile"
+SMALL_MODEL = "llama-3.1-8b-instant"
+
+# USD per million (input, output) tokens from Groq's price list; edit to match yours
+PRICES = {
+    LARGE_MODEL: (0.59, 0.79),
+    SMALL_MODEL: (0.05, 0.08),
+}
+
+
+def cost(usage_by_model):
+    total = 0.0
+    for model, usage in usage_by_model.items():
+        input_price, output_price = PRICES.get(model, (0.0, 0.0))
+        total += (usage["prompt_tokens"] * input_price + usage["completion_tokens"] * output_price) / 1e6
+    return total
+
+
+def run_mode(generator, records):
+    latencies, costs = [], []
+    usage_by_model = {}
+    escalated = valid = failures = 0
+
+    for record in records:
+        started = time.perf_counter()
+        trace = RequestTrace()
+        result = generator.generate_portfolio_content(record, bypass_cache=True, trace=trace)
+        latency = time.perf_counter() - started
+        if not result["success"]:
+            failures += 1
+            continue
+
+        latencies.append(latency)
+        valid += parse_portfolio_response(result["content"])["valid"]
+        escalated += len(result.get("escalated", ()))
+        # A single call's result has no per-model split; its trace has the tokens
+        usage = result.get("usage_by_model") or {generator.model: {
+            "prompt_tokens": trace.attributes["prompt_tokens"],
+            "completion_tokens": trace.attributes["completion_tokens"],
+        }}
+        costs.append(cost(usage))
+        for model, tokens in usage.items():
+            totals = usage_by_model.setdefault(model, {"prompt_tokens": 0, "completion_tokens": 0})
+            totals["prompt_tokens"] += tokens["prompt_tokens"]
+            totals["completion_tokens"] += tokens["completion_tokens"]
+
+    return {
+        "requests": len(records),
+        "failures": failures,
+        "valid": valid,
+        "p50_s": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95_s": round(percentile(latencies, 95), 3) if latencies else None,
+        "escalated_sections": escalated,
+        "tokens_by_model": usage_by_model,
+        "usd_per_portfolio": round(sum(costs) / len(costs), 6) if costs else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Portfolios per mode")
+    parser.add_argument("--large-rate", type=float, default=275.0, help="Large model tokens per second")
+    parser.add_argument("--small-rate", type=float, default=750.0, help="Small model tokens per second")
+    parser.add_argument("--large-delay", type=float, default=0.3, help="Large model seconds to first token")
+    parser.add_argument("--small-delay", type=float, default=0.15, help="Small model seconds to first token")
+    parser.add_argument("--small-invalid-rate", type=float, default=0.2)
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    models = {
+        LARGE_MODEL: {"token_rate": args.large_rate, "first_token_delay": args.large_delay},
+        SMALL_MODEL: {"token_rate": args.small_rate, "first_token_delay": args.small_delay,
+                      "invalid_rate": args.small_invalid_rate},
+    }
+    process, base_url = start_server_process(models=models)
+
+    try:
+        os.environ["GROQ_API_KEY"] = "mock-key"
+        limiter = RateLimiter(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9)
+        plans = {
+            "single": {},
+            "plan": {section: SMALL_MODEL for section in SMALL_MODEL_SECTIONS},
+        }
+        records = [make_record(index) for index in range(args.requests)]
+
+        results = {}
+        for mode, plan in plans.items():
+            generator = AIPortfolioGenerator(cache=ResponseCache(path=None), limiter=limiter,
+                                             base_url=base_url, model_plan=plan)
+            # Warm up the connection pool
+            generator.generate_portfolio_content(make_record(-1), bypass_cache=True)
+            results[mode] = run_mode(generator, records)
+    finally:
+        process.terminate()
+        process.join()
+
+    report = {"config": {"models": models, "requests": args.requests, "prices": PRICES}, "modes": results}
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
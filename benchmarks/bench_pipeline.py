@@ -0,0 +1,243 @@
+"""
+End-to-end benchmark: generate -> parse -> render against a local mock Groq API
+
+Usage:
+    python benchmarks/bench_pipeline.py [--requests 20] [--concurrency 8] [--output results.json]
+
+Starts benchmarks/mock_groq.py in a child process, points AIPortfolioGenerator
+at it through its base_url setting and runs the same pipeline as the app:
+
+    single      generate_portfolio_content, one request at a time
+    streaming   generate_portfolio_content_stream fed into IncrementalJSONParser
+    concurrent  agenerate_portfolio_content with --concurrency requests in flight
+
+Every request bypasses the response cache and is followed by
+parse_portfolio_response and a template render. Results (p50/p95/p99 latency,
+requests/s and completion tokens/s per mode) are printed as JSON, so runs on
+different commits can be diffed. Only the client side is measured; the mock's
+pacing (--token-rate, --first-token-delay) sets the floor.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from batch import build_portfolio_data  # noqa: E402
+from benchmarks.mock_groq import DEFAULT_CONFIG, start_server_process  # noqa: E402
+from utils.ai_helper import AIPortfolioGenerator  # noqa: E402
+from utils.cache import ResponseCache  # noqa: E402
+from utils.client_pool import get_pool_stats  # noqa: E402
+from utils.portfolio_templates import get_template, TEMPLATES  # noqa: E402
+from utils.rate_limiter import RateLimiter  # noqa: E402
+from utils.response_parser import parse_portfolio_response  # noqa: E402
+from utils.stream_parser import IncrementalJSONParser  # noqa: E402
+
+
+MODES = ("single", "streaming", "concurrent")
+
+
+def make_record(index):
+    return {
+        "name": f"Bench User {index}",
+        "role": "Machine Learning Engineer",
+        "skills": "Python, PyTorch, NLP, RAG, LangChain, Kubernetes",
+        "experience": "5 years",
+        "projects": "DocuChat (RAG-based PDF Q&A), Parkinson's Disease Detection",
+        "email": "bench@example.com",
+        "linkedin": "",
+        "github": "",
+    }
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100.0 * len(ordered) + 0.5)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def finish_pipeline(record, content, template):
+    """Parse and render one generated reply; returns the parse result"""
+    parsed = parse_portfolio_response(content)
+    get_template(template, build_portfolio_data(record, parsed["data"]))
+    return parsed
+
+
+def new_sample(latency, result, parsed=None, first_token=None):
+    return {
+        "latency": latency,
+        "first_token": first_token,
+        "success": result["success"],
+        "tokens": result.get("tokens_used", 0) if result["success"] else 0,
+        "retries": result.get("retries", 0),
+        "valid": bool(parsed and parsed["valid"]),
+        "repaired": bool(parsed and parsed["repaired"]),
+    }
+
+
+def run_single(generator, records, template):
+    samples = []
+    for record in records:
+        started = time.perf_counter()
+        result = generator.generate_portfolio_content(record, bypass_cache=True)
+        parsed = finish_pipeline(record, result["content"], template) if result["success"] else None
+        samples.append(new_sample(time.perf_counter() - started, result, parsed))
+    return samples
+
+
+def run_streaming(generator, records, template):
+    samples = []
+    for record in records:
+        started = time.perf_counter()
+        first_token = None
+        stream_parser = IncrementalJSONParser()
+        result = None
+        for event in generator.generate_portfolio_content_stream(record, bypass_cache=True):
+            if "delta" in event:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                stream_parser.feed(event["delta"])
+            else:
+                result = event
+        parsed = finish_pipeline(record, result["content"], template) if result["success"] else None
+        samples.append(new_sample(time.perf_counter() - started, result, parsed, first_token))
+    return samples
+
+
+async def run_concurrent(generator, records, template, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(record):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await generator.agenerate_portfolio_content(record, bypass_cache=True)
+            parsed = finish_pipeline(record, result["content"], template) if result["success"] else None
+            return new_sample(time.perf_counter() - started, result, parsed)
+
+    return await asyncio.gather(*(one(record) for record in records))
+
+
+def summarize(samples, elapsed):
+    latencies = [sample["latency"] for sample in samples]
+    first_tokens = [sample["first_token"] for sample in samples if sample["first_token"] is not None]
+    tokens = sum(sample["tokens"] for sample in samples)
+
+    def rounded(value):
+        return round(value, 4) if value is not None else None
+
+    summary = {
+        "requests": len(samples),
+        "succeeded": sum(sample["success"] for sample in samples),
+        "valid": sum(sample["valid"] for sample in samples),
+        "repaired": sum(sample["repaired"] for sample in samples),
+        "retries": sum(sample["retries"] for sample in samples),
+        "elapsed_s": rounded(elapsed),
+        "latency_s": {
+            "p50": rounded(percentile(latencies, 50)),
+            "p95": rounded(percentile(latencies, 95)),
+            "p99": rounded(percentile(latencies, 99)),
+            "mean": rounded(sum(latencies) / len(latencies)) if latencies else None,
+        },
+        "requests_per_s": rounded(len(samples) / elapsed) if elapsed else None,
+        "tokens_per_s": rounded(tokens / elapsed) if elapsed else None,
+    }
+    if first_tokens:
+        summary["first_token_s"] = {
+            "p50": rounded(percentile(first_tokens, 50)),
+            "p95": rounded(percentile(first_tokens, 95)),
+            "p99": rounded(percentile(first_tokens, 99)),
+        }
+    return summary
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=8, help="In-flight requests in concurrent mode")
+    parser.add_argument("--modes", nargs="+", default=list(MODES), choices=MODES)
+    parser.add_argument("--template", default="Modern Gradient", choices=list(TEMPLATES.keys()))
+    parser.add_argument("--token-rate", type=float, default=DEFAULT_CONFIG["token_rate"],
+                        help="Mock tokens per second")
+    parser.add_argument("--first-token-delay", type=float, default=DEFAULT_CONFIG["first_token_delay"],
+                        help="Mock seconds before the first token")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_CONFIG["error_rate"],
+                        help="Share of mock 503 replies")
+    parser.add_argument("--malformed-rate", type=float, default=DEFAULT_CONFIG["malformed_rate"],
+                        help="Share of malformed mock replies")
+    parser.add_argument("--seed", type=int, default=DEFAULT_CONFIG["seed"])
+    parser.add_argument("--output", default=None, help="Also write the JSON results to this file")
+    args = parser.parse_args(argv)
+
+    mock_config = {
+        "token_rate": args.token_rate,
+        "first_token_delay": args.first_token_delay,
+        "error_rate": args.error_rate,
+        "malformed_rate": args.malformed_rate,
+        "seed": args.seed,
+    }
+    process, base_url = start_server_process(**mock_config)
+
+    try:
+        os.environ["GROQ_API_KEY"] = "mock-key"
+        # Memory-only cache and an effectively unlimited budget, so only the
+        # pipeline itself is measured
+        generator = AIPortfolioGenerator(
+            cache=ResponseCache(path=None),
+            limiter=RateLimiter(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9),
+            base_url=base_url
+        )
+        records = [make_record(index) for index in range(args.requests)]
+
+        # Warm up the connection pool and the template renderers
+        generator.generate_portfolio_content(make_record(-1), bypass_cache=True)
+
+        results = {}
+        for mode in args.modes:
+            started = time.perf_counter()
+            if mode == "single":
+                samples = run_single(generator, records, args.template)
+            elif mode == "streaming":
+                samples = run_streaming(generator, records, args.template)
+            else:
+                samples = asyncio.run(run_concurrent(generator, records, args.template, args.concurrency))
+            results[mode] = summarize(samples, time.perf_counter() - started)
+    finally:
+        process.terminate()
+        process.join()
+
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "config": dict(mock_config, requests=args.requests, concurrency=args.concurrency,
+                       template=args.template),
+        "modes": results,
+        "pools": get_pool_stats(),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Prompt token accounting: original prompt vs. the current cache-friendly prompt
+
+Usage:
+    python benchmarks/bench_prompt.py            # offline token estimates
+    python benchmarks/bench_prompt.py --live     # real Groq usage + latency (needs GROQ_API_KEY)
+
+Offline, prompt tokens are counted with tiktoken when installed (cl100k_base)
+or estimated at ~4 characters per token otherwise; the ratio between the two
+prompts is what matters. With --live each prompt is sent once per sample with
+max_tokens=1, and the reported prompt_tokens come from the API's usage while
+latency is the time to the first streamed token.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.ai_helper import SYSTEM_PROMPT  # noqa: E402
+
+
+SAMPLE_INPUTS = [
+    {
+        "name": "Syed Ebad",
+        "role": "Machine Learning Engineer",
+        "skills": "Python, PyTorch, TensorFlow, NLP, Gen AI, RAG, LangChain",
+        "experience": "5+ years",
+        "projects": "DocuChat (RAG-based PDF Q&A), Parkinson's Disease Detection"
+    },
+    {
+        "name": "Maria Lopez",
+        "role": "Frontend Developer",
+        "skills": "React, TypeScript, CSS, Accessibility, Figma",
+        "experience": "3 years",
+        "projects": "Design system for a banking app, accessible checkout flow"
+    },
+    {
+        "name": "Kwame Mensah",
+        "role": "DevOps Engineer",
+        "skills": "Kubernetes, Terraform, AWS, CI/CD, Observability",
+        "experience": "7 years",
+        "projects": "Zero-downtime migration to EKS, self-service deployment platform"
+    },
+    {
+        "name": "Li Wei",
+        "role": "Data Analyst",
+        "skills": "SQL, Python, Tableau, Statistics",
+        "experience": "2 years",
+        "projects": "Churn dashboard, A/B testing framework for marketing"
+    },
+    {
+        "name": "Anna Novak",
+        "role": "Product Designer",
+        "skills": "UX research, Prototyping, Figma, Design systems",
+        "experience": "4 years",
+        "projects": "Onboarding redesign that lifted activation, mobile banking app"
+    },
+]
+
+
+# The generation prompt as it was before the static instructions were moved
+# into a fixed system prompt (kept here only for comparison)
+LEGACY_SYSTEM_PROMPT = "You are a professional portfolio content writer. You create engaging, achievement-focused content. You ONLY respond with valid JSON, no markdown formatting."
+
+
+def legacy_messages(user_data):
+    prompt = f"""
+    You are an expert portfolio writer. Generate professional portfolio content for:
+
+    Name: {user_data.get('name', 'User')}
+    Role: {user_data.get('role', 'Developer')}
+    Skills: {user_data.get('skills', 'Python, AI, Web Development')}
+    Experience: {user_data.get('experience', '2 years')}
+    Projects: {user_data.get('projects', 'Various web applications')}
+
+    Generate a JSON object with this EXACT structure:
+
+    {{
+    "PROFESSIONAL_BIO": "A compelling 2-3 sentence professional bio (60-80 words) that highlights expertise and impact",
+    "HEADLINE": "A catchy professional headline (8-12 words)",
+    "ABOUT_SECTION": "Detailed about section (150-200 words) describing background, journey, expertise, achievements, and what drives this professional. Make it personal and compelling.",
+    "SKILLS_DESCRIPTION": {{
+        "Python & ML Frameworks": "Expertise in building production ML models with PyTorch, TensorFlow, and scikit-learn. Developed end-to-end AI systems from research to deployment.",
+        "NLP & Gen AI": "Specialized in transformer models, LangChain, and prompt engineering. Built RAG systems and conversational AI applications.",
+        "Full-Stack AI Development": "Creating production-ready AI applications with Streamlit and FastAPI. Experience with REST APIs and microservices architecture.",
+        "Data Science & Analytics": "Expert in EDA, feature engineering, and ML pipelines. Proficient with pandas, numpy, and visualization tools.",
+        "MLOps & DevOps": "Skilled in Git, Docker, and CI/CD for ML systems. Experience deploying models to cloud platforms.",
+        "Domain Expertise": "Applied ML to healthcare analytics and enterprise systems. Strong background in SAP integration and business processes."
+    }}
+    }}
+
+    CRITICAL RULES:
+    1. Return ONLY valid JSON - no markdown code blocks, no extra text
+    2. Each skill description should be 15-25 words and describe WHAT was built or achieved
+    3. Use concrete examples from the projects mentioned
+    4. Make it achievement-oriented and specific
+    5. The SKILLS_DESCRIPTION must have exactly 6 skills with detailed descriptions
+    6. Do NOT use generic terms like "Expert", "Proficient", "Skilled" - describe actual accomplishments
+
+    Return only the JSON object.
+    """
+    return [
+        {"role": "system", "content": LEGACY_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def current_messages(user_data):
+    # Same as AIPortfolioGenerator.build_messages, without needing an API key
+    prompt = (
+        f"Name: {user_data.get('name', 'User')}\n"
+        f"Role: {user_data.get('role', 'Developer')}\n"
+        f"Skills: {user_data.get('skills', 'Python, AI, Web Development')}\n"
+        f"Experience: {user_data.get('experience', '2 years')}\n"
+        f"Projects: {user_data.get('projects', 'Various web applications')}"
+    )
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def get_token_counter():
+    """Return (name, count_function) for the best available tokenizer"""
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return "tiktoken/cl100k_base", lambda text: len(encoding.encode(text))
+    except ImportError:
+        return "chars/4 estimate", lambda text: max(1, round(len(text) / 4))
+
+
+def shared_prefix_chars(prompts):
+    """Length of the text every prompt starts with (what prefix caching can reuse)"""
+    prefix = os.path.commonprefix(prompts)
+    return len(prefix)
+
+
+def flatten(messages):
+    return "".join(message["role"] + ":" + message["content"] for message in messages)
+
+
+def offline_report():
+    counter_name, count = get_token_counter()
+    report = {"tokenizer": counter_name, "prompts": {}}
+
+    for label, build in (("legacy", legacy_messages), ("current", current_messages)):
+        flattened = [flatten(build(user_data)) for user_data in SAMPLE_INPUTS]
+        tokens = [count(text) for text in flattened]
+        prefix = shared_prefix_chars(flattened)
+        report["prompts"][label] = {
+            "prompt_tokens": tokens,
+            "mean_prompt_tokens": round(sum(tokens) / len(tokens), 1),
+            "shared_prefix_chars": prefix,
+            "shared_prefix_share": round(prefix / (sum(map(len, flattened)) / len(flattened)), 3),
+        }
+
+    legacy = report["prompts"]["legacy"]["mean_prompt_tokens"]
+    current = report["prompts"]["current"]["mean_prompt_tokens"]
+    report["prompt_token_reduction"] = round(1 - current / legacy, 3)
+    return report
+
+
+def live_report(repeats):
+    from utils.ai_helper import AIPortfolioGenerator
+
+    generator = AIPortfolioGenerator()
+    report = {"model": generator.model, "prompts": {}}
+
+    for label, build in (("legacy", legacy_messages), ("current", current_messages)):
+        prompt_tokens = []
+        cached_tokens = []
+        first_token_s = []
+        for _ in range(repeats):
+            for user_data in SAMPLE_INPUTS:
+                started = time.perf_counter()
+                stream, _retries = generator.create_completion(build(user_data), max_tokens=1, stream=True)
+                first = None
+                usage = None
+                for chunk in stream:
+                    if first is None and chunk.choices and chunk.choices[0].delta.content:
+                        first = time.perf_counter() - started
+                    usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                first_token_s.append(first if first is not None else time.perf_counter() - started)
+                if usage is not None:
+                    prompt_tokens.append(usage.prompt_tokens)
+                    details = getattr(usage, "prompt_tokens_details", None)
+                    cached_tokens.append(getattr(details, "cached_tokens", 0) or 0)
+
+        first_token_s.sort()
+        report["prompts"][label] = {
+            "mean_prompt_tokens": round(sum(prompt_tokens) / len(prompt_tokens), 1) if prompt_tokens else None,
+            "mean_cached_tokens": round(sum(cached_tokens) / len(cached_tokens), 1) if cached_tokens else None,
+            "p50_first_token_s": round(first_token_s[len(first_token_s) // 2], 3),
+            "mean_first_token_s": round(sum(first_token_s) / len(first_token_s), 3),
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--live", action="store_true", help="Measure against the real API")
+    parser.add_argument("--repeats", type=int, default=3, help="Live runs per sample input")
+    args = parser.parse_args(argv)
+
+    report = live_report(args.repeats) if args.live else offline_report()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Routing benchmark: one backend vs latency-aware routing vs hedged routing
+
+Usage:
+    python benchmarks/bench_router.py [--requests 30] [--hedge-delay 1.0] [--output results.json]
+
+Starts three mock servers (benchmarks/mock_groq.py, reached through the
+OpenAI-compatible /v1 path) that stand in for backends of different quality:
+
+    primary first in the config; --primary-error-rate of its replies are
+            503s (default 1.0: an outage)
+    slow    reliable, --slow-delay seconds to the first token
+    fast    reliable and fast
+
+and sends the same sequential requests through:
+
+    single  only the first configured backend (the pre-router behaviour)
+    routed  utils.router.Router over all three, no hedging
+    hedged  the same with hedge_delay=--hedge-delay
+
+Per scenario it prints success rate, p50/p95/max latency, failovers, hedges
+and which backend answered. Nothing leaves the machine.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_pipeline import percentile  # noqa: E402
+from benchmarks.mock_groq import start_server_process  # noqa: E402
+from utils.providers import OpenAICompatibleBackend  # noqa: E402
+from utils.router import AllBackendsFailed, Router  # noqa: E402
+
+
+MESSAGES = [{"role": "user", "content": "Name: Bench User\nRole: Machine Learning Engineer"}]
+SCENARIOS = ("single", "routed", "hedged")
+
+
+def start_backends(args):
+    configs = {
+        "primary": {"first_token_delay": 0.05, "error_rate": args.primary_error_rate},
+        "slow": {"first_token_delay": args.slow_delay},
+        "fast": {"first_token_delay": 0.15},
+    }
+    processes, backends = [], []
+    for name, config in configs.items():
+        process, base_url = start_server_process(token_rate=args.token_rate, seed=len(processes), **config)
+        processes.append(process)
+        backends.append(OpenAICompatibleBackend("mock-model", base_url + "/v1", name=name, kind="openai"))
+    return processes, backends
+
+
+def run_scenario(router, requests):
+    latencies, answered_by = [], {}
+    failures = failovers = hedged = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            _, _, info = router.complete(MESSAGES, max_tokens=512)
+        except AllBackendsFailed:
+            failures += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+        name = info["backend"].name
+        answered_by[name] = answered_by.get(name, 0) + 1
+        failovers += info["failovers"]
+        hedged += info["hedged"]
+
+    return {
+        "requests": requests,
+        "failed": failures,
+        "success_rate": round(len(latencies) / requests, 3),
+        "p50_s": round(percentile(latencies, 50), 3) if latencies else None,
+        "p95_s": round(percentile(latencies, 95), 3) if latencies else None,
+        "max_s": round(max(latencies), 3) if latencies else None,
+        "failovers": failovers,
+        "hedged": hedged,
+        "answered_by": answered_by,
+        "backends": router.get_stats(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=30, help="Requests per scenario")
+    parser.add_argument("--hedge-delay", type=float, default=1.0, help="Seconds before hedging")
+    parser.add_argument("--primary-error-rate", type=float, default=1.0)
+    parser.add_argument("--slow-delay", type=float, default=1.5)
+    parser.add_argument("--token-rate", type=float, default=2000.0, help="Mock tokens per second")
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    processes, backends = start_backends(args)
+    try:
+        results = {}
+        for scenario in SCENARIOS:
+            # Fresh backends per scenario: no latency history carries over
+            fresh = [OpenAICompatibleBackend(b.model, b.base_url, name=b.name) for b in backends]
+            if scenario == "single":
+                router = Router(fresh[:1], explore=0)
+            else:
+                router = Router(fresh, hedge_delay=args.hedge_delay if scenario == "hedged" else None)
+            results[scenario] = run_scenario(router, args.requests)
+    finally:
+        for process in processes:
+            process.terminate()
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
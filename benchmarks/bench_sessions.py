@@ -0,0 +1,135 @@
+"""
+Session memory benchmark: server resident memory per open tab
+
+Usage:
+    python benchmarks/bench_sessions.py [--tabs 30] [--same-inputs] [--app app.py] [--output results.json]
+
+Starts `streamlit run` against benchmarks/mock_groq.py and opens browser
+tabs one after another (the websocket client from bench_ui.py). Each tab
+fills in the form, generates a portfolio, switches template once and then
+stays open and idle, the way tabs pile up on a shared server.
+
+It reads the server's VmRSS (from /proc, so Linux only) after a couple of
+warm-up tabs and again once --tabs more are open, and reports the growth per
+tab. With --same-inputs every tab submits the same profile, so all of them
+end up with the same portfolio (served from the response cache after the
+first), which is where a shared, content-addressed session store pays off.
+
+To measure an older app.py:
+
+    git show HEAD~1:app.py > /tmp/app_before.py
+    python benchmarks/bench_sessions.py --app /tmp/app_before.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_pipeline import make_record  # noqa: E402
+from benchmarks.bench_ui import (  # noqa: E402
+    BrowserTab, DOWNLOAD_LABEL, FIELDS, GENERATE_LABEL, TEMPLATE_LABEL, start_app,
+)
+from benchmarks.mock_groq import start_server_process  # noqa: E402
+
+
+WARMUP_TABS = 2
+
+
+def resident_kb(pid):
+    """VmRSS of a process in KB, or None where /proc is missing"""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+async def open_tab(port, record, timeout):
+    import websockets
+
+    websocket = await websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                                         max_size=None)
+    tab = BrowserTab(websocket)
+    tab.reader = asyncio.create_task(tab.read())
+
+    await tab.rerun()
+    await tab.settle()
+    for label, key in FIELDS:
+        await tab.settle(await tab.set_value(label, record[key]))
+
+    await tab.click(GENERATE_LABEL)
+    await tab.wait_until(lambda: DOWNLOAD_LABEL in tab.widgets, timeout)
+    await tab.idle(timeout=timeout)
+
+    options = list(tab.find(TEMPLATE_LABEL)[1].options)
+    await tab.settle(await tab.set_value(TEMPLATE_LABEL, options[-1]))
+    return tab
+
+
+async def run(pid, port, args):
+    tabs = []
+    try:
+        for index in range(WARMUP_TABS):
+            tabs.append(await open_tab(port, make_record(index), args.timeout))
+        await asyncio.sleep(1.0)
+        before = resident_kb(pid)
+
+        for index in range(WARMUP_TABS, WARMUP_TABS + args.tabs):
+            record = make_record(0 if args.same_inputs else index)
+            tabs.append(await open_tab(port, record, args.timeout))
+        await asyncio.sleep(1.0)
+        after = resident_kb(pid)
+    finally:
+        for tab in tabs:
+            tab.close()
+            tab.reader.cancel()
+            await tab.websocket.close()
+
+    return {
+        "app": os.path.abspath(args.app),
+        "tabs": args.tabs,
+        "same_inputs": args.same_inputs,
+        "rss_before_kb": before,
+        "rss_after_kb": after,
+        "kb_per_tab": round((after - before) / args.tabs, 1) if before is not None else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"), help="Streamlit script to measure")
+    parser.add_argument("--tabs", type=int, default=30, help="Tabs to open after the warm-up")
+    parser.add_argument("--same-inputs", action="store_true", help="Every tab submits the same profile")
+    parser.add_argument("--token-rate", type=float, default=2000.0, help="Mock tokens per second")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a generation")
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    mock, base_url = start_server_process(token_rate=args.token_rate)
+    cache_dir = tempfile.mkdtemp(prefix="bench_sessions_")
+    app, port = start_app(os.path.abspath(args.app), base_url, os.path.join(cache_dir, "cache.sqlite3"))
+    try:
+        report = asyncio.run(run(app.pid, port, args))
+    finally:
+        app.terminate()
+        app.wait()
+        mock.terminate()
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
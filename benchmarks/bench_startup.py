@@ -0,0 +1,123 @@
+"""
+Cold-start benchmark: import cost of app.py and time to the first script run
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--top 15] [--json]
+
+Each run uses a fresh interpreter:
+  - `python -X importtime -c "import app"` gives the cumulative import time
+    of every module; the report lists the most expensive ones and the totals
+    for app.py's own dependencies (groq, httpx, dotenv, streamlit, utils)
+  - a Streamlit AppTest run of app.py measures how long the first script run
+    (what a new session waits for before the form appears) takes
+
+Medians over --runs are reported, so run it before and after a change.
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+WATCHED_PACKAGES = ("groq", "httpx", "dotenv", "streamlit", "utils")
+
+FIRST_RUN_SCRIPT = """
+import time, json
+from streamlit.testing.v1 import AppTest
+started = time.perf_counter()
+at = AppTest.from_file("app.py", default_timeout=60).run()
+elapsed = time.perf_counter() - started
+print(json.dumps({"first_run_s": elapsed, "exception": bool(at.exception)}))
+"""
+
+
+def run_importtime():
+    """Import app in a fresh interpreter; returns {module: (self_us, cumulative_us)}"""
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    modules = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, module = match.groups()
+            modules[module] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def run_first_script_run():
+    completed = subprocess.run(
+        [sys.executable, "-c", FIRST_RUN_SCRIPT],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {"first_run_s": None, "exception": True, "stderr": completed.stderr[-500:]}
+
+
+def summarize(runs, top):
+    # Median of each module's numbers across runs
+    names = set().union(*runs)
+    medians = {}
+    for name in names:
+        samples = [run[name] for run in runs if name in run]
+        medians[name] = (
+            statistics.median(sample[0] for sample in samples),
+            statistics.median(sample[1] for sample in samples),
+        )
+
+    # A package's cost is the cumulative time of its top-level module, which
+    # is recorded the first time anything from the package is imported
+    packages = {package: round(medians[package][1] / 1000, 1) if package in medians else 0.0
+                for package in WATCHED_PACKAGES}
+
+    slowest = sorted(medians.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "app_import_ms": round(medians.get("app", (0, 0))[1] / 1000, 1),
+        "package_import_ms": packages,
+        "slowest_modules_self_ms": {name: round(values[0] / 1000, 2) for name, values in slowest},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--skip-first-run", action="store_true", help="Only measure imports")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    report = summarize([run_importtime() for _ in range(args.runs)], args.top)
+    report["runs"] = args.runs
+
+    if not args.skip_first_run:
+        first_runs = [run_first_script_run() for _ in range(args.runs)]
+        timings = [run["first_run_s"] for run in first_runs if run["first_run_s"] is not None]
+        report["first_script_run_ms"] = round(statistics.median(timings) * 1000, 1) if timings else None
+        report["first_script_run_errors"] = sum(run["exception"] for run in first_runs)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"app.py import (cumulative): {report['app_import_ms']} ms")
+    for package, cost in report["package_import_ms"].items():
+        print(f"  {package:<10} {cost:>8} ms")
+    if "first_script_run_ms" in report:
+        print(f"first script run (AppTest): {report['first_script_run_ms']} ms")
+    print("slowest modules (self time):")
+    for name, cost in report["slowest_modules_self_ms"].items():
+        print(f"  {name:<50} {cost:>8} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Microbenchmark: portfolio template renders per second
+
+Usage:
+    python benchmarks/bench_templates.py [--seconds 2] [--before old_templates.py] [--json]
+
+Renders a fixed, realistic portfolio through every entry in TEMPLATES and
+reports renders/second two ways:
+
+    raw       template(data) on plain data, which escapes it on every call
+    prepared  template(prepare_data(data)) with the data escaped once, as
+              render_all and the app's callers do for each portfolio
+
+To compare with an older version of the templates, pass its file with
+--before; it is loaded on its own and timed with the same data:
+
+    git show 0bae021:utils/portfolio_templates.py > /tmp/templates_before.py
+    python benchmarks/bench_templates.py --before /tmp/templates_before.py
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.portfolio_templates import prepare_data, TEMPLATES  # noqa: E402
+
+
+SAMPLE_DATA = {
+    "name": "Syed Ebad",
+    "headline": "Machine Learning Engineer building production-grade NLP and RAG systems",
+    "bio": "Machine learning engineer with five years of enterprise experience, "
+           "shipping retrieval-augmented assistants and forecasting models to production. " * 2,
+    "about": "I started in enterprise systems and moved into applied machine learning, "
+             "where I focus on turning research prototypes into reliable services. " * 6,
+    "skills_description": {
+        f"Skill {i}": "Built and deployed an end-to-end pipeline that cut manual review time "
+                      "by forty percent across three business units."
+        for i in range(1, 7)
+    },
+    "email": "syed@example.com",
+    "linkedin": "https://linkedin.com/in/example",
+    "github": "https://github.com/example",
+}
+
+
+def bench(candidates, seconds, batch=500):
+    """
+    Time every (func, data) in `candidates`, interleaved in short batches
+    for roughly `seconds` each, and return the best renders/second of each
+
+    Interleaving and keeping the best batch keeps noise from other processes
+    from favouring whichever candidate happened to run in a quiet moment.
+    """
+    # Warm up
+    for func, data in candidates.values():
+        for _ in range(50):
+            func(data)
+
+    best = dict.fromkeys(candidates, 0.0)
+    deadline = time.perf_counter() + seconds * len(candidates)
+    while time.perf_counter() < deadline:
+        for key, (func, data) in candidates.items():
+            started = time.perf_counter()
+            for _ in range(batch):
+                func(data)
+            best[key] = max(best[key], batch / (time.perf_counter() - started))
+    return best
+
+
+def load_templates(path):
+    """Load TEMPLATES from another copy of portfolio_templates.py"""
+    spec = importlib.util.spec_from_file_location("templates_before", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.TEMPLATES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=2.0, help="Seconds spent per template and mode")
+    parser.add_argument("--before", default=None, help="Older portfolio_templates.py to compare with")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args(argv)
+
+    before = load_templates(args.before) if args.before else {}
+    prepared = prepare_data(SAMPLE_DATA)
+    results = {}
+    for name, func in TEMPLATES.items():
+        candidates = {"raw": (func, SAMPLE_DATA), "prepared": (func, prepared)}
+        if name in before:
+            candidates["before"] = (before[name], SAMPLE_DATA)
+        results[name] = {key: round(rate) for key, rate in bench(candidates, args.seconds).items()}
+
+    if args.json:
+        print(json.dumps({"renders_per_second": results}))
+        return
+
+    for name, rates in results.items():
+        line = f"{name:<20} raw {rates['raw']:>10,}/s   prepared {rates['prepared']:>10,}/s"
+        if "before" in rates:
+            line += f"   before {rates['before']:>10,}/s ({rates['prepared'] / rates['before']:.2f}x prepared)"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
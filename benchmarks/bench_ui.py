@@ -0,0 +1,366 @@
+"""
+UI benchmark: script reruns, bytes sent and server CPU for one editing session
+
+Usage:
+    python benchmarks/bench_ui.py [--sessions 3] [--app app.py] [--output results.json]
+
+Starts `streamlit run` with the generator pointed at benchmarks/mock_groq.py
+and drives the page over its websocket the way a browser tab does: values of
+widgets inside a form are held back until the form is submitted, widgets
+inside a fragment rerun only that fragment, fragments with run_every are
+re-requested on their interval, and elements the tab has already received
+are announced by hash so the server can send a reference instead.
+
+Each session follows the same script:
+
+    1. open the page
+    2. fill in the eight profile fields, one commit per field
+    3. click "Generate Portfolio" and wait for the download button
+    4. edit one field again
+    5. switch to the other template and back
+    6. click the download button
+
+--think-time adds a pause before step 3, like a user reading the form
+over, and click_to_result_s is how long step 3 waited. Settings for the
+app (e.g. --set PORTFOLIO_SPECULATE=1) are passed to it as environment
+variables.
+
+Per session it reports script runs (full page and fragment-only), the
+server process's CPU seconds (read from /proc, so Linux only), bytes
+received, and how often the preview iframe arrived in full vs by reference.
+
+Streamlit reads .streamlit/config.toml from the app's directory, so to
+measure an older app.py without this repo's config:
+
+    git show HEAD~1:app.py > /tmp/app_before.py
+    python benchmarks/bench_ui.py --app /tmp/app_before.py
+
+Needs the `websockets` package (a Streamlit dependency since 1.4x).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_pipeline import make_record  # noqa: E402
+from benchmarks.mock_groq import start_server_process  # noqa: E402
+
+
+# Sidebar fields in the order a user fills them in
+FIELDS = [
+    ("Full Name*", "name"),
+    ("Professional Role*", "role"),
+    ("Skills (comma-separated)*", "skills"),
+    ("Years of Experience", "experience"),
+    ("Key Projects (brief description)*", "projects"),
+    ("Email", "email"),
+    ("LinkedIn URL", "linkedin"),
+    ("GitHub URL", "github"),
+]
+GENERATE_LABEL = "✨ Generate Portfolio"
+DOWNLOAD_LABEL = "📥 Download Portfolio HTML"
+TEMPLATE_LABEL = "Portfolio Style"
+
+WIDGET_TYPES = ("text_input", "text_area", "selectbox", "checkbox", "button", "download_button")
+
+
+def cpu_seconds(pid):
+    """User + system CPU time of a process, or None where /proc is missing"""
+    try:
+        with open(f"/proc/{pid}/stat", encoding="ascii") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_app(app_path, base_url, cache_path, **settings):
+    port = free_port()
+    env = dict(os.environ, GROQ_BASE_URL=base_url, GROQ_API_KEY="mock-key",
+               PORTFOLIO_CACHE_PATH=cache_path, PYTHONPATH=ROOT, **settings)
+    for name in ("PORTFOLIO_BACKENDS", "PORTFOLIO_SMALL_MODEL", "PORTFOLIO_DEBUG"):
+        env.pop(name, None)
+
+    process = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app_path,
+         "--server.headless", "true", "--server.port", str(port),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=os.path.dirname(app_path), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).read()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("streamlit did not start within 60 s")
+
+
+class BrowserTab:
+    """Just enough of the Streamlit frontend to drive the app and count what it is sent"""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.widgets = {}        # label -> (element type, proto, fragment id)
+        self.values = {}         # widget id -> WidgetState sent with every rerun
+        self.pending = {}        # form id -> {widget id: WidgetState} until submitted
+        self.cache = {}          # hash -> ForwardMsg, like the frontend's message cache
+        self.timers = {}         # fragment id -> (interval, task)
+        self.page_script_hash = ""
+        self.running = False
+        self.finished = 0
+        self.finished_at_request = 0
+        self.last_message = time.monotonic()
+        self.stats = {
+            "reruns_requested": 0,
+            "full_runs": 0,
+            "fragment_runs": 0,
+            "messages": 0,
+            "bytes_received": 0,
+            "iframe_sent": 0,
+            "iframe_bytes": 0,
+            "iframe_by_reference": 0,
+        }
+
+    async def read(self):
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        async for data in self.websocket:
+            self.last_message = time.monotonic()
+            self.stats["messages"] += 1
+            self.stats["bytes_received"] += len(data)
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof("type")
+
+            if kind == "ref_hash":
+                msg, kind = self.cache[msg.ref_hash], "delta"
+                if msg.delta.new_element.WhichOneof("type") == "iframe":
+                    self.stats["iframe_by_reference"] += 1
+            elif msg.metadata.cacheable:
+                self.cache[msg.hash] = msg
+                if msg.delta.new_element.WhichOneof("type") == "iframe":
+                    self.stats["iframe_sent"] += 1
+                    self.stats["iframe_bytes"] += len(data)
+            elif kind == "delta" and msg.delta.new_element.WhichOneof("type") == "iframe":
+                self.stats["iframe_sent"] += 1
+                self.stats["iframe_bytes"] += len(data)
+
+            if kind == "new_session":
+                self.running = True
+                self.page_script_hash = msg.new_session.page_script_hash
+                if msg.new_session.fragment_ids_this_run:
+                    self.stats["fragment_runs"] += 1
+                else:
+                    # A full run re-registers the fragments it still shows
+                    self.stats["full_runs"] += 1
+                    self.close()
+            elif kind == "script_finished":
+                self.running = False
+                self.finished += 1
+            elif kind == "auto_rerun":
+                self.start_timer(msg.auto_rerun.fragment_id, msg.auto_rerun.interval)
+            elif kind == "stop_auto_rerun":
+                for fragment_id in msg.stop_auto_rerun.fragment_ids:
+                    self.stop_timer(fragment_id)
+            elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element_type = msg.delta.new_element.WhichOneof("type")
+                if element_type in WIDGET_TYPES:
+                    proto = getattr(msg.delta.new_element, element_type)
+                    self.widgets[proto.label] = (element_type, proto, msg.delta.fragment_id)
+
+    def start_timer(self, fragment_id, interval):
+        if fragment_id in self.timers and self.timers[fragment_id][0] == interval:
+            return
+        self.stop_timer(fragment_id)
+
+        async def tick():
+            while True:
+                await asyncio.sleep(interval)
+                await self.rerun(fragment_id=fragment_id, auto=True)
+
+        self.timers[fragment_id] = (interval, asyncio.create_task(tick()))
+
+    def stop_timer(self, fragment_id):
+        if fragment_id in self.timers:
+            self.timers.pop(fragment_id)[1].cancel()
+
+    async def rerun(self, fragment_id="", triggers=(), auto=False):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = ""
+        state.page_script_hash = self.page_script_hash
+        state.fragment_id = fragment_id
+        state.is_auto_rerun = auto
+        for value in self.values.values():
+            state.widget_states.widgets.add().CopyFrom(value)
+        for widget_id in triggers:
+            trigger = state.widget_states.widgets.add()
+            trigger.id = widget_id
+            trigger.trigger_value = True
+        state.cached_message_hashes.extend(self.cache)
+        if not auto:
+            self.stats["reruns_requested"] += 1
+            self.finished_at_request = self.finished
+        await self.websocket.send(msg.SerializeToString())
+
+    async def set_value(self, label, value):
+        """Commit a new widget value; returns whether the server was asked to rerun"""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        element_type, proto, fragment_id = self.find(label)
+        state = WidgetState(id=proto.id)
+        if element_type == "checkbox":
+            state.bool_value = value
+        else:
+            state.string_value = value
+
+        if proto.form_id:
+            self.pending.setdefault(proto.form_id, {})[proto.id] = state
+            return False
+        self.values[proto.id] = state
+        await self.rerun(fragment_id=fragment_id)
+        return True
+
+    async def click(self, label):
+        element_type, proto, fragment_id = self.find(label)
+        if element_type == "download_button" and proto.ignore_rerun:
+            return False
+        if element_type == "button" and proto.is_form_submitter:
+            self.values.update(self.pending.pop(proto.form_id, {}))
+        await self.rerun(fragment_id=fragment_id, triggers=[proto.id])
+        return True
+
+    def find(self, label):
+        for widget_label, widget in self.widgets.items():
+            if widget_label == label or widget_label.endswith(label):
+                return widget
+        raise KeyError(f"no widget labelled {label!r} on the page")
+
+    async def wait_until(self, predicate, timeout):
+        deadline = time.monotonic() + timeout
+        while not predicate():
+            if time.monotonic() > deadline:
+                raise TimeoutError("page did not reach the expected state")
+            await asyncio.sleep(0.02)
+
+    async def settle(self, sent=True, timeout=60):
+        """Wait for the rerun just requested to finish and the page to go quiet"""
+        if sent:
+            await self.wait_until(lambda: self.finished > self.finished_at_request, timeout)
+            await self.idle(timeout=timeout)
+
+    async def idle(self, quiet=0.3, timeout=60):
+        await self.wait_until(
+            lambda: not self.running and not self.timers and time.monotonic() - self.last_message > quiet, timeout
+        )
+
+    def close(self):
+        for fragment_id in list(self.timers):
+            self.stop_timer(fragment_id)
+
+
+async def run_session(port, record, timeout, think_time=0.0):
+    import websockets
+
+    async with websockets.connect(f"ws://127.0.0.1:{port}/_stcore/stream", subprotocols=["streamlit"],
+                                  max_size=None) as websocket:
+        tab = BrowserTab(websocket)
+        reader = asyncio.create_task(tab.read())
+        try:
+            await tab.rerun()
+            await tab.settle()
+
+            for label, key in FIELDS:
+                await tab.settle(await tab.set_value(label, record[key]))
+            await asyncio.sleep(think_time)
+
+            clicked = time.monotonic()
+            await tab.click(GENERATE_LABEL)
+            await tab.wait_until(lambda: DOWNLOAD_LABEL in tab.widgets, timeout)
+            tab.stats["click_to_result_s"] = round(time.monotonic() - clicked, 3)
+            await tab.idle(timeout=timeout)
+
+            await tab.settle(await tab.set_value("Years of Experience", record["experience"] + " (edited)"))
+
+            options = list(tab.find(TEMPLATE_LABEL)[1].options)
+            for option in options[1:] + options[:1]:
+                await tab.settle(await tab.set_value(TEMPLATE_LABEL, option))
+
+            await tab.settle(await tab.click(DOWNLOAD_LABEL))
+        finally:
+            tab.close()
+            reader.cancel()
+    return tab.stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"), help="Streamlit script to measure")
+    parser.add_argument("--sessions", type=int, default=3, help="Editing sessions, one after another")
+    parser.add_argument("--token-rate", type=float, default=2000.0, help="Mock tokens per second")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a generation")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Seconds between filling in the last field and clicking Generate")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Setting for the app, e.g. PORTFOLIO_SPECULATE=1 (repeatable)")
+    parser.add_argument("--output", default=None, help="Also write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    settings = dict(setting.split("=", 1) for setting in args.set)
+    mock, base_url = start_server_process(token_rate=args.token_rate)
+    cache_dir = tempfile.mkdtemp(prefix="bench_ui_")
+    app, port = start_app(os.path.abspath(args.app), base_url, os.path.join(cache_dir, "cache.sqlite3"), **settings)
+
+    sessions = []
+    try:
+        for index in range(args.sessions):
+            cpu_before = cpu_seconds(app.pid)
+            stats = asyncio.run(run_session(port, make_record(index), args.timeout, args.think_time))
+            cpu_after = cpu_seconds(app.pid)
+            if cpu_before is not None:
+                stats["server_cpu_s"] = round(cpu_after - cpu_before, 3)
+            sessions.append(stats)
+    finally:
+        app.terminate()
+        app.wait()
+        mock.terminate()
+
+    # The first session also pays for imports and the first script run
+    measured = sessions[1:] or sessions
+    report = {
+        "app": os.path.abspath(args.app),
+        "sessions": args.sessions,
+        "per_session": {key: round(sum(s[key] for s in measured) / len(measured), 3)
+                        for key in measured[0]},
+        "first_session": sessions[0],
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""
+Local stand-in for the Groq chat completions API (OpenAI-compatible)
+
+Usage:
+    python benchmarks/mock_groq.py --port 8765 --token-rate 300 --first-token-delay 0.2
+
+Then point the app or the batch CLI at it:
+    GROQ_BASE_URL=http://127.0.0.1:8765 GROQ_API_KEY=mock streamlit run app.py
+
+Only POST .../chat/completions is implemented (/openai/v1/... for the Groq
+SDK, /v1/... for OpenAI-compatible clients), with and without "stream": true,
+plus GET /stats with request counters (including completion tokens streamed
+and streams the client dropped part-way). Replies are a realistic portfolio JSON object, paced at
+`token_rate` tokens per second after `first_token_delay` seconds. A share of
+requests can fail with a 503 (`error_rate`) or return malformed output
+(`malformed_rate`): fenced, with a preamble, with a trailing comma or cut off.
+
+When the prompt quotes only some of the portfolio keys (a section
+regeneration or a model plan), only those sections come back. `models` gives
+single models their own token_rate / first_token_delay and an
+`invalid_rate`: the share of replies with a section that fails validation
+(too few skills, a three-word headline, a short bio), like a small model's.
+A prompt asking for "a list of N distinct alternatives" gets N variants of
+each section it quotes.
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Roughly how many characters the mock counts as one token
+CHARS_PER_TOKEN = 4
+
+DEFAULT_CONFIG = {
+    "token_rate": 300.0,
+    "first_token_delay": 0.2,
+    "error_rate": 0.0,
+    "malformed_rate": 0.0,
+    "seed": 0,
+    "models": {},
+}
+
+SAMPLE_PORTFOLIO = {
+    "PROFESSIONAL_BIO": "Machine learning engineer who turns research prototypes into dependable "
+                        "products. Shipped a retrieval-augmented document assistant used by four "
+                        "hundred analysts and a forecasting service that cut planning errors by a "
+                        "fifth, while mentoring a team of five engineers.",
+    "HEADLINE": "Building retrieval-augmented assistants that people actually rely on",
+    "ABOUT_SECTION": "I started out integrating enterprise systems, where I learned how much a "
+                     "reliable pipeline matters more than a clever model. That lesson followed me "
+                     "into machine learning. Over the past five years I have taken language models "
+                     "from notebooks to production, building DocuChat, a document question-answering "
+                     "service that answers questions over thousands of PDFs with cited sources, and "
+                     "an early-detection model for Parkinson's disease from voice recordings. I care "
+                     "about evaluation as much as training: every system I ship comes with datasets "
+                     "and dashboards that show when it drifts. Outside of work I write about applied "
+                     "NLP and contribute fixes to the open-source libraries I depend on. What drives "
+                     "me is seeing a tool I built quietly become part of someone's daily routine.",
+    "SKILLS_DESCRIPTION": {
+        "Retrieval-Augmented Generation": "Built DocuChat, answering questions over thousands of PDFs "
+                                          "with cited sources and sub-second retrieval.",
+        "Deep Learning": "Trained PyTorch and TensorFlow models for voice-based Parkinson's detection "
+                         "reaching ninety percent recall on held-out patients.",
+        "NLP Pipelines": "Designed tokenisation, chunking and embedding pipelines that process a "
+                         "million documents a day.",
+        "LLM Orchestration": "Composed LangChain agents with tool calling and guardrails for internal "
+                             "support workflows.",
+        "Model Evaluation": "Created evaluation suites and drift dashboards that caught three "
+                            "regressions before release.",
+        "Production Engineering": "Packaged models as FastAPI services with CI/CD and autoscaling on "
+                                  "Kubernetes.",
+    },
+}
+
+
+# Function to damage a well-formed reply the way real model output goes wrong
+def make_malformed(content, rng):
+    kind = rng.choice(("fenced", "preamble", "trailing_comma", "truncated"))
+    if kind == "fenced":
+        return "```json\n" + content + "\n```", "stop"
+    if kind == "preamble":
+        return "Here is the portfolio content you asked for:\n\n" + content, "stop"
+    if kind == "trailing_comma":
+        return content[:-1].rstrip() + ",\n}", "stop"
+    return content[:int(len(content) * 0.7)], "length"
+
+
+# Function to pick the sections a request asks for: the keys its prompt
+# quotes, or all of them
+def requested_sections(request):
+    text = " ".join(str(message.get("content") or "") for message in request.get("messages", []))
+    sections = [field for field in SAMPLE_PORTFOLIO if f'"{field}"' in text]
+    return sections or list(SAMPLE_PORTFOLIO)
+
+
+# Function to read how many alternatives per section a request asks for
+# (0 for a normal request)
+def requested_alternatives(request):
+    text = " ".join(str(message.get("content") or "") for message in request.get("messages", []))
+    match = re.search(r"list of (\d+) distinct alternatives", text)
+    return int(match.group(1)) if match else 0
+
+
+# Function to make `count` different versions of a text section
+def make_alternatives(text, count):
+    return [text if index == 0 else f"{text} (take {index + 1})" for index in range(count)]
+
+
+# Function to make one section fail validation the way a small model does
+def make_invalid(portfolio):
+    portfolio = dict(portfolio)
+    if "SKILLS_DESCRIPTION" in portfolio:
+        portfolio["SKILLS_DESCRIPTION"] = dict(list(portfolio["SKILLS_DESCRIPTION"].items())[:4])
+    elif "HEADLINE" in portfolio:
+        portfolio["HEADLINE"] = "Machine learning engineer"
+    else:
+        field = next(iter(portfolio))
+        portfolio[field] = " ".join(portfolio[field].split()[:20])
+    return portfolio
+
+
+def count_tokens(text):
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+# Function to get the config overrides for one model (matched by name)
+def config_for_model(config, model):
+    return config["models"].get(model or "", {})
+
+
+# This class answers chat completion requests using the server's config
+class MockGroqHandler(BaseHTTPRequestHandler):
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    # GET /stats reports how many requests the mock has answered
+    def do_GET(self):
+        if self.path.rstrip("/") != "/stats":
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+            return
+        with self.server.lock:
+            stats = dict(self.server.stats)
+        self._send_json(200, stats)
+
+    def do_POST(self):
+        length = int(self.headers.get("content-length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body", "type": "invalid_request_error"}})
+            return
+
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "not_found"}})
+            return
+
+        config = dict(self.server.config, **config_for_model(self.server.config, request.get("model")))
+        sections = requested_sections(request)
+        with self.server.lock:
+            self.server.stats["requests"] += 1
+            fail = self.server.rng.random() < config["error_rate"]
+            malformed = self.server.rng.random() < config["malformed_rate"]
+            invalid = self.server.rng.random() < config.get("invalid_rate", 0.0)
+            alternatives = requested_alternatives(request)
+            if alternatives:
+                reply = json.dumps({field: make_alternatives(SAMPLE_PORTFOLIO[field], alternatives)
+                                    for field in sections}, indent=2)
+            elif len(sections) == len(SAMPLE_PORTFOLIO) and not invalid:
+                reply = self.server.content
+            else:
+                portfolio = {field: SAMPLE_PORTFOLIO[field] for field in sections}
+                reply = json.dumps(make_invalid(portfolio) if invalid else portfolio, indent=2)
+            damaged = make_malformed(reply, self.server.rng) if malformed else None
+
+        if fail:
+            with self.server.lock:
+                self.server.stats["errors"] += 1
+            self._send_json(
+                503,
+                {"error": {"message": "Service unavailable (mock)", "type": "server_error"}},
+                headers={"retry-after-ms": "50"}
+            )
+            return
+
+        content, finish_reason = damaged or (reply, "stop")
+        if malformed:
+            with self.server.lock:
+                self.server.stats["malformed"] += 1
+
+        prompt_chars = sum(len(message.get("content") or "") for message in request.get("messages", []))
+        usage = {
+            "prompt_tokens": max(1, prompt_chars // CHARS_PER_TOKEN),
+            "completion_tokens": count_tokens(content),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+
+        if request.get("stream"):
+            self._stream(request, content, finish_reason, usage, config)
+        else:
+            time.sleep(config["first_token_delay"] + usage["completion_tokens"] / config["token_rate"])
+            self._send_json(200, {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": finish_reason,
+                }],
+                "usage": usage,
+            })
+
+    def _stream(self, request, content, finish_reason, usage, config):
+        self.send_response(200)
+        self.send_header("content-type", "text/event-stream")
+        self.send_header("transfer-encoding", "chunked")
+        self.end_headers()
+
+        def chunk(delta, finish=None, extra=None):
+            payload = {
+                "id": "chatcmpl-mock",
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+            }
+            if extra:
+                payload.update(extra)
+            return f"data: {json.dumps(payload)}\n\n"
+
+        time.sleep(config["first_token_delay"])
+        self._write_chunk(chunk({"role": "assistant", "content": ""}))
+
+        # One token per event, paced against a fixed schedule so sleep
+        # overhead doesn't accumulate. A client that hangs up stops the
+        # generation, like the real API.
+        started = time.perf_counter()
+        try:
+            for index in range(0, len(content), CHARS_PER_TOKEN):
+                due = started + (index // CHARS_PER_TOKEN) / config["token_rate"]
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                self._write_chunk(chunk({"content": content[index:index + CHARS_PER_TOKEN]}))
+                with self.server.lock:
+                    self.server.stats["completion_tokens"] += 1
+        except (BrokenPipeError, ConnectionResetError):
+            with self.server.lock:
+                self.server.stats["aborted"] += 1
+            return
+
+        # Groq sends usage in x_groq on the last chunk; OpenAI-compatible
+        # servers send it as "usage" when the client asks for it
+        extra = {"x_groq": {"id": "req-mock", "usage": usage}}
+        if (request.get("stream_options") or {}).get("include_usage"):
+            extra = {"usage": usage}
+        self._write_chunk(chunk({}, finish_reason, extra))
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+# This class is the HTTP server; it holds the config and request counters
+class MockGroqServer(ThreadingHTTPServer):
+
+    daemon_threads = True
+    # The default backlog of 5 makes concurrent clients wait on SYN retries
+    request_queue_size = 128
+
+    def __init__(self, host="127.0.0.1", port=0, **config):
+        super().__init__((host, port), MockGroqHandler)
+        self.config = dict(DEFAULT_CONFIG, **config)
+        self.content = json.dumps(SAMPLE_PORTFOLIO, indent=2)
+        self.rng = random.Random(self.config["seed"])
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "malformed": 0, "completion_tokens": 0, "aborted": 0}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+# Function to run a mock server on a background thread
+# Returns the server; call server.shutdown() when done
+def start_server(host="127.0.0.1", port=0, **config):
+    server = MockGroqServer(host, port, **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _serve_in_child(config, connection):
+    server = MockGroqServer(**config)
+    connection.send(server.base_url)
+    server.serve_forever()
+
+
+# Function to run a mock server in a child process, so it doesn't compete
+# with the code being measured for the GIL. Returns (process, base_url).
+def start_server_process(**config):
+    import multiprocessing
+
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve_in_child, args=(config, child), daemon=True)
+    process.start()
+    return process, parent.recv()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token-rate", type=float, default=DEFAULT_CONFIG["token_rate"], help="Tokens per second")
+    parser.add_argument("--first-token-delay", type=float, default=DEFAULT_CONFIG["first_token_delay"], help="Seconds")
+    parser.add_argument("--error-rate", type=float, default=DEFAULT_CONFIG["error_rate"], help="Share of 503 replies")
+    parser.add_argument("--malformed-rate", type=float, default=DEFAULT_CONFIG["malformed_rate"],
+                        help="Share of malformed replies")
+    parser.add_argument("--seed", type=int, default=DEFAULT_CONFIG["seed"])
+    parser.add_argument("--model", action="append", default=[], metavar="NAME=TOKEN_RATE[:DELAY[:INVALID_RATE]]",
+                        help="Own pacing and invalid-section rate for one model (repeatable)")
+    args = parser.parse_args(argv)
+
+    models = {}
+    for spec in args.model:
+        name, _, values = spec.partition("=")
+        fields = [float(value) for value in values.split(":")]
+        models[name] = dict(zip(("token_rate", "first_token_delay", "invalid_rate"), fields))
+
+    server = MockGroqServer(
+        args.host, args.port,
+        token_rate=args.token_rate,
+        first_token_delay=args.first_token_delay,
+        error_rate=args.error_rate,
+        malformed_rate=args.malformed_rate,
+        seed=args.seed,
+        models=models,
+    )
+    print(f"Mock Groq API listening on {server.base_url} (set GROQ_BASE_URL to this)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.mock_groq import start_server  # noqa: E402
+
+
+@pytest.fixture
+def mock_server():
+    """A local Groq/OpenAI-compatible mock, fast enough for unit tests"""
+    server = start_server(token_rate=5000.0, first_token_delay=0.0)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def slow_mock_server():
+    """A mock that streams slowly, so a test can stop a stream part-way"""
+    server = start_server(token_rate=200.0, first_token_delay=0.0)
+    yield server
+    server.shutdown()
+    server.server_close()
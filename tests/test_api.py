@@ -0,0 +1,104 @@
+import json
+
+import pytest
+from starlette.testclient import TestClient
+
+from api import create_app
+from utils.ai_helper import AIPortfolioGenerator
+from utils.cache import ResponseCache
+from utils.portfolio_templates import TEMPLATES
+from utils.rate_limiter import RateLimiter
+
+RECORD = {
+    "name": "Ada <Lovelace>",
+    "role": "Engineer",
+    "skills": "python, compilers",
+    "experience": "5 years",
+    "projects": "an analytical engine",
+}
+
+FIELDS = {
+    "HEADLINE": "Compiler engineer",
+    "PROFESSIONAL_BIO": "Builds compilers.",
+    "ABOUT_SECTION": "About Ada.",
+    "SKILLS_DESCRIPTION": {"Python": "Tooling & scripts"},
+}
+
+
+@pytest.fixture
+def client(mock_server, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "mock-key")
+    generator = AIPortfolioGenerator(cache=ResponseCache(path=None), limiter=RateLimiter(10 ** 6, 10 ** 9),
+                                     base_url=mock_server.base_url, model_plan={})
+    with TestClient(create_app(generator)) as client:
+        yield client
+
+
+def read_events(response):
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        event, data = block.split("\n", 1)
+        events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+    return events
+
+
+def test_health_and_templates(client):
+    assert client.get("/health").json()["status"] == "ok"
+    assert client.get("/templates").json() == {"templates": list(TEMPLATES.keys())}
+
+
+def test_render_all_templates_and_a_single_page(client):
+    body = dict(name=RECORD["name"], fields=FIELDS)
+    response = client.post("/render", json=body)
+    assert response.status_code == 200
+    html = response.json()["html"]
+    assert set(html) == set(TEMPLATES)
+    assert all("Ada &lt;Lovelace&gt;" in page and "Tooling &amp; scripts" in page for page in html.values())
+
+    template = next(iter(TEMPLATES))
+    page = client.post("/render?format=html", json=dict(body, template=template))
+    assert page.headers["content-type"].startswith("text/html")
+    assert page.text == html[template]
+
+
+def test_bad_requests_get_a_400(client):
+    assert client.post("/render", content="not json").status_code == 400
+    assert client.post("/render", json={"name": "Ada"}).json()["error"].startswith('"fields"')
+    response = client.post("/generate", json={"name": "Ada"})
+    assert response.status_code == 400
+    assert response.json() == {"success": False, "error": "Missing fields: role, skills, projects"}
+
+
+def test_generate_with_html(client):
+    template = next(iter(TEMPLATES))
+    response = client.post("/generate", json=dict(RECORD, template=template, fresh=True))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] and body["valid"], body
+    assert body["tokens_used"] > 0 and not body["cached"]
+    assert set(body["html"]) == {template}
+
+    # The same request again comes from the response cache
+    again = client.post("/generate", json=RECORD).json()
+    assert again["cached"] and again["fields"] == body["fields"]
+
+
+def test_generate_stream(client):
+    response = client.post("/generate?stream=1", json=RECORD)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = read_events(response)
+    names = [event for event, _ in events]
+    assert names[-1] == "done" and "delta" in names and "field" in names
+    done = events[-1][1]
+    assert done["success"]
+    fields = {tuple(data["path"]): data["value"] for event, data in events if event == "field"}
+    assert fields[("HEADLINE",)] == done["fields"]["HEADLINE"]
+
+
+def test_batch_keeps_the_order_and_reports_bad_records(client):
+    response = client.post("/batch", json={"records": [RECORD, {"name": "Ada"}, "nope"]})
+    body = response.json()
+    assert (body["succeeded"], body["failed"]) == (1, 2)
+    assert body["results"][0]["success"]
+    assert body["results"][1]["error"].startswith("Missing fields")
+    assert body["results"][2] == {"success": False, "error": "Each record must be a JSON object"}
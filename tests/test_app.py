@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+import app
+from conftest import ROOT
+from utils.session_store import SessionStore
+
+APP = os.path.join(ROOT, "app.py")
+
+FIELDS = {
+    "Full Name*": "Ada Lovelace",
+    "Professional Role*": "Backend Engineer",
+    "Skills (comma-separated)*": "Python, SQL",
+    "Key Projects (brief description)*": "Analytical engine",
+}
+
+
+def fill_in(at):
+    for widget in list(at.text_input) + list(at.text_area):
+        if widget.label in FIELDS:
+            widget.set_value(FIELDS[widget.label])
+
+
+def test_page_load_does_not_import_the_groq_sdk():
+    script = (
+        "import sys\n"
+        "from streamlit.testing.v1 import AppTest\n"
+        f"at = AppTest.from_file({APP!r}, default_timeout=60).run()\n"
+        "assert not at.exception, at.exception\n"
+        "print('groq' in sys.modules)\n"
+    )
+    env = dict(os.environ, GROQ_API_KEY="mock-key")
+    output = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert output.returncode == 0, output.stderr
+    assert output.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_missing_api_key_shows_the_setup_error(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    fill_in(at)
+    at.button[0].click().run()
+    assert not at.exception
+    assert any("GROQ_API_KEY" in error.value for error in at.error)
+    assert any(".env" in info.value for info in at.info)
+
+
+def test_evicted_record_is_not_cached_as_missing(monkeypatch):
+    store = SessionStore()
+    monkeypatch.setattr(app, "get_default_session_store", lambda: store)
+    record = {"ai_fields": {"HEADLINE": "Evicted <then> stored again"},
+              "user_data": {"name": "Ada", "role": "Engineer"}, "contact": {}}
+    key = store.put("tab", record)
+    store.discard("tab")
+
+    with pytest.raises(KeyError):
+        app.render_result(key, "Modern Gradient")
+    store.put("tab", record)
+    assert "Evicted &lt;then&gt; stored again" in app.render_result(key, "Modern Gradient")
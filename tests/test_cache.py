@@ -0,0 +1,72 @@
+import time
+
+from utils.cache import canonical_skills, CASE_INSENSITIVE_FIELDS, make_cache_key, ResponseCache
+
+
+def test_memory_hit_and_miss():
+    cache = ResponseCache(path=None)
+    assert cache.get("a") is None
+    cache.set("a", {"content": "x"})
+    assert cache.get("a") == {"content": "x"}
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_least_recently_used_is_evicted_from_memory():
+    cache = ResponseCache(path=None, max_memory_items=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get_stats()["memory_items"] == 2
+
+
+def test_disk_tier_survives_a_restart_and_evicts_oldest(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = ResponseCache(path=path, max_memory_items=1, max_disk_items=2)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    time.sleep(0.01)
+    cache.set("c", 3)
+    assert cache.get_stats()["disk_items"] == 2
+
+    reopened = ResponseCache(path=path)
+    assert reopened.get("a") is None
+    assert reopened.get("b") == 2
+    assert reopened.get_stats()["disk_hits"] == 1
+
+
+def test_expired_entries_are_misses():
+    cache = ResponseCache(path=None, ttl_seconds=0.05)
+    cache.set("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+
+
+def test_whitespace_does_not_change_the_key():
+    first = {"name": "Ada", "role": "Backend  engineer ", "skills": "Python, SQL"}
+    second = {"name": "Ada", "role": "Backend engineer", "skills": " Python,\tSQL"}
+    assert make_cache_key(first, "model", 1) == make_cache_key(second, "model", 1)
+    assert make_cache_key(first, "model", 1) != make_cache_key(first, "other-model", 1)
+    assert make_cache_key(first, "model", 1) != make_cache_key(first, "model", 2)
+
+
+def test_canonical_skills():
+    assert canonical_skills("Python,  SQL; python") == ["python", "sql"]
+    assert canonical_skills("sql | Python\n• CI/CD - Docker") == ["ci/cd", "docker", "python", "sql"]
+    assert canonical_skills(["Go", " go ", ""]) == ["go"]
+
+
+def test_cosmetic_differences_share_a_key():
+    first = {"name": "Ada", "role": "Backend Engineer.", "experience": "Five years",
+             "skills": "Python, SQL"}
+    second = {"name": "Ada", "role": "backend engineer", "experience": "five years",
+              "skills": "sql | python"}
+    assert set(CASE_INSENSITIVE_FIELDS) == {"role", "experience"}
+    assert make_cache_key(first, "model", 1) == make_cache_key(second, "model", 1)
+    # The name is copied into the text, so its case still matters
+    assert make_cache_key(first, "model", 1) != make_cache_key(dict(first, name="ada"), "model", 1)
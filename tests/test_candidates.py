@@ -0,0 +1,51 @@
+import app
+from benchmarks.mock_groq import SAMPLE_PORTFOLIO
+from utils.ai_helper import AIPortfolioGenerator
+from utils.cache import ResponseCache
+from utils.rate_limiter import RateLimiter
+
+USER_DATA = {
+    "name": "Ada Lovelace",
+    "role": "Engineer",
+    "skills": "python, compilers",
+    "experience": "5 years",
+    "projects": "an analytical engine",
+}
+
+
+def make_generator(server, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "mock-key")
+    return AIPortfolioGenerator(cache=ResponseCache(path=None), limiter=RateLimiter(10 ** 6, 10 ** 9),
+                                base_url=server.base_url, model_plan={})
+
+
+def test_alternatives_come_from_one_call(mock_server, monkeypatch):
+    generator = make_generator(mock_server, monkeypatch)
+    outcome = generator.generate_candidates(USER_DATA, sections=("HEADLINE", "PROFESSIONAL_BIO"), count=3)
+
+    assert outcome["success"], outcome
+    assert mock_server.stats["requests"] == 1
+    for section in ("HEADLINE", "PROFESSIONAL_BIO"):
+        assert len(outcome["candidates"][section]) == 3
+        assert outcome["candidates"][section][0] == SAMPLE_PORTFOLIO[section]
+    assert outcome["tokens_used"] > 0
+
+
+def test_unknown_section_is_rejected_without_a_call(mock_server, monkeypatch):
+    generator = make_generator(mock_server, monkeypatch)
+    outcome = generator.generate_candidates(USER_DATA, sections=("HEADLINE", "FOOTER"))
+    assert outcome == {"success": False, "error": "Unknown section: FOOTER"}
+    assert mock_server.stats["requests"] == 0
+
+
+def test_sections_missing_from_the_portfolio_are_still_offered():
+    ai_fields = {"HEADLINE": "Compiler engineer"}
+    candidates = {
+        "HEADLINE": ["Compiler engineer", "Language tooling engineer", ""],
+        "PROFESSIONAL_BIO": ["First bio", "Second bio"],
+        "ABOUT_SECTION": [""],
+    }
+    assert app.build_candidate_options(ai_fields, candidates) == {
+        "HEADLINE": ["Compiler engineer", "Language tooling engineer"],
+        "PROFESSIONAL_BIO": ["First bio", "Second bio"],
+    }
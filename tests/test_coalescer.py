@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from utils.coalescer import RequestCoalescer
+
+
+def make_source(log, count=50, delay=0.01):
+    async def source():
+        log.append("started")
+        try:
+            for index in range(count):
+                await asyncio.sleep(delay)
+                yield {"delta": str(index)}
+            yield {"done": True, "success": True}
+        finally:
+            log.append("closed")
+    return source
+
+
+def test_concurrent_readers_share_one_call():
+    log = []
+
+    async def main():
+        coalescer = RequestCoalescer()
+
+        async def read():
+            return [event async for event, _ in coalescer.stream("key", make_source(log, count=5))]
+
+        return await asyncio.gather(read(), read()), coalescer
+
+    (first, second), coalescer = asyncio.run(main())
+    assert first == second and first[-1]["done"]
+    assert log == ["started", "closed"]
+    assert coalescer.stats == {"calls": 1, "coalesced": 1}
+
+
+def test_last_reader_leaving_closes_the_source():
+    log = []
+
+    async def main():
+        coalescer = RequestCoalescer()
+        readers = [coalescer.stream("key", make_source(log)) for _ in range(2)]
+        for reader in readers:
+            await reader.__anext__()
+        await readers[0].aclose()
+        await asyncio.sleep(0.05)
+        assert log == ["started"]
+
+        await readers[1].aclose()
+        await asyncio.sleep(0.05)
+        assert log == ["started", "closed"]
+        assert coalescer.in_flight() == 0
+
+        # The same key starts a new call instead of joining the cancelled one
+        events = [event async for event, shared in coalescer.stream("key", make_source(log, count=2))]
+        assert events[-1]["done"]
+
+    asyncio.run(main())
+
+
+def test_reader_leaving_does_not_stop_the_others():
+    log = []
+
+    async def main():
+        coalescer = RequestCoalescer()
+        leaving = coalescer.stream("key", make_source(log, count=10))
+        await leaving.__anext__()
+        staying = coalescer.stream("key", make_source(log, count=10))
+        first = [(await staying.__anext__())[0]]
+        await leaving.aclose()
+        return first + [event async for event, _ in staying]
+
+    events = asyncio.run(main())
+    assert len(events) == 11 and events[-1]["done"]
+    assert log == ["started", "closed"]
+
+
+def test_sse_disconnect_drops_the_upstream_stream(slow_mock_server, monkeypatch):
+    from api import create_app
+    from utils.ai_helper import AIPortfolioGenerator
+    from utils.cache import ResponseCache
+    from utils.rate_limiter import RateLimiter
+
+    monkeypatch.setenv("GROQ_API_KEY", "mock-key")
+    generator = AIPortfolioGenerator(cache=ResponseCache(path=None), limiter=RateLimiter(10 ** 6, 10 ** 9),
+                                     base_url=slow_mock_server.base_url, router=None, model_plan={})
+    app = create_app(generator)
+
+    body = json.dumps({"name": "Ada", "role": "Engineer", "skills": "python", "projects": "engine"}).encode()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": "2.4"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/generate", "raw_path": b"/generate",
+        "query_string": b"stream=1", "root_path": "", "server": ("test", 80), "client": ("test", 1),
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    chunks = []
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            chunks.append(message["body"])
+            if len(chunks) == 3:
+                raise OSError("client went away")
+
+    async def main():
+        with pytest.raises(Exception):
+            await app(scope, receive, send)
+        await asyncio.sleep(0.1)
+        assert app.state.coalescer.in_flight() == 0
+
+    asyncio.run(main())
+    deadline = time.monotonic() + 5
+    while slow_mock_server.stats["aborted"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert slow_mock_server.stats["aborted"] == 1
+    assert slow_mock_server.stats["completion_tokens"] < 100
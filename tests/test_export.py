@@ -0,0 +1,118 @@
+import gzip
+import hashlib
+import os
+import sys
+import zipfile
+
+import pytest
+
+from utils.export import (
+    AssetStore, compress_variants, minify_css, minify_html, strip_unused_css, write_bundle_page,
+    write_export, write_index, zip_bundle
+)
+
+
+PAGE = """<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        /* layout */
+        .card { color: red ; }
+        .unused { color: blue; }
+        a :hover { content: "  keep  me  "; }
+        .card > p { width: calc(1px + 2px); }
+    </style>
+</head>
+<body>
+    <div class="card">
+        <p>Hello   <b>world</b> !</p>
+    </div>
+    <pre>  two
+  lines</pre>
+</body>
+</html>"""
+
+
+def test_minify_css():
+    css = minify_css(PAGE.split("<style>")[1].split("</style>")[0])
+    assert "/*" not in css
+    assert ".card{color:red}" in css
+    # Strings, descendant combinators and spaces around "+" are kept
+    assert 'a :hover{content:"  keep  me  "}' in css
+    assert "calc(1px + 2px)" in css
+
+
+def test_minify_html_keeps_inline_spacing_and_pre():
+    html = minify_html(PAGE, strip_unused=False)
+    assert "<p>Hello <b>world</b> !</p>" in html
+    assert "<pre>  two\n  lines</pre>" in html
+    assert "</div>\n" not in html and "<body><div" in html
+    assert ".unused{color:blue}" in html
+
+
+def test_unused_css_is_stripped():
+    html = minify_html(PAGE)
+    assert ".unused" not in html
+    assert ".card{color:red}" in html
+    assert ".card>p{" in html
+
+    assert strip_unused_css(".a{color:red}.b{color:blue}", '<p class="b"></p>') == ".b{color:blue}"
+
+
+def test_gzip_variant_is_deterministic():
+    first = compress_variants(PAGE)
+    assert gzip.decompress(first[".gz"]) == PAGE.encode("utf-8")
+    assert compress_variants(PAGE)[".gz"] == first[".gz"]
+
+
+def test_brotli_variant():
+    brotli = pytest.importorskip("brotli")
+    assert brotli.decompress(compress_variants(PAGE)[".br"]) == PAGE.encode("utf-8")
+
+
+def test_without_brotli_only_gzip_is_written(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "brotli", None)
+    path = str(tmp_path / "page.html")
+    sizes = write_export(path, PAGE, precompress=True)
+    assert set(sizes) == {path, path + ".gz"}
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == minify_html(PAGE)
+
+
+def test_css_assets_are_named_by_content(tmp_path):
+    assets = AssetStore(str(tmp_path))
+    href = assets.add_css(".a { color: red; }", "modern")
+    content = b".a{color:red}"
+    assert href == f"assets/modern.{hashlib.sha256(content).hexdigest()[:10]}.css"
+    with open(tmp_path / href, "rb") as f:
+        assert f.read() == content
+
+    # Same CSS (even formatted differently) gives the same file; new CSS a new name
+    assert assets.add_css(".a{color:red}", "modern") == href
+    other = assets.add_css(".a { color: blue; }", "modern")
+    assert other != href
+    assert assets.assets == {href: len(content), other: len(b".a{color:blue}")}
+
+
+def test_bundle_pages_share_one_stylesheet(tmp_path):
+    assets = AssetStore(str(tmp_path), precompress=True)
+    for name in ("one", "two"):
+        write_bundle_page(str(tmp_path / f"{name}.html"), PAGE, assets, "modern")
+    href, = assets.assets
+    assert os.path.exists(tmp_path / (href + ".gz"))
+    for name in ("one", "two"):
+        with open(tmp_path / f"{name}.html", encoding="utf-8") as f:
+            page = f.read()
+        assert f'<link rel="stylesheet" href="{href}">' in page and "<style>" not in page
+
+    index = write_index(str(tmp_path), [("two.html", "Zoe <Z>"), ("one.html", "adam")])
+    with open(index, encoding="utf-8") as f:
+        html = f.read()
+    assert html.index("one.html") < html.index("two.html")
+    assert "Zoe &lt;Z&gt;" in html
+
+    with zipfile.ZipFile(zip_bundle(str(tmp_path), str(tmp_path / "site.zip"))) as bundle:
+        names = set(bundle.namelist())
+        assert {"one.html", "two.html", "index.html", href} <= names
+        assert "site.zip" not in names
+        assert bundle.getinfo(href + ".gz").compress_type == zipfile.ZIP_STORED
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from utils.job_queue import CANCELLED, DONE, FAILED, JobQueue, RUNNING
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def blocking_target(release):
+    def target(job, value):
+        release.wait(5)
+        return value
+    return target
+
+
+def test_no_more_jobs_run_than_workers():
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+    job_ids = [queue.submit(blocking_target(release), index) for index in range(4)]
+    try:
+        wait_for(lambda: queue.get_stats()["running"] == 2)
+        stats = queue.get_stats()
+        assert (stats["queue_depth"], stats["workers"], stats["busy_workers_ratio"]) == (2, 2, 1.0)
+        assert [queue.position(job_id) for job_id in job_ids] == [0, 0, 1, 2]
+    finally:
+        release.set()
+    wait_for(lambda: all(queue.get(job_id).is_finished() for job_id in job_ids))
+    assert [queue.get(job_id).result for job_id in job_ids] == [0, 1, 2, 3]
+    assert queue.get_stats()["completed"] == 4
+    queue.shutdown()
+
+
+def test_queued_job_is_cancelled_before_it_runs():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    running = queue.submit(blocking_target(release), "first")
+    queued = queue.submit(blocking_target(release), "second")
+    wait_for(lambda: queue.get(running).status == RUNNING)
+
+    assert queue.cancel(queued)
+    # A running job can't be cancelled, only asked to stop
+    assert not queue.cancel(running)
+    release.set()
+    wait_for(lambda: queue.get(running).is_finished())
+    assert queue.get(queued).status == CANCELLED and queue.get(queued).result is None
+    assert queue.get(running).status == DONE
+    assert queue.get_stats()["cancelled"] == 1
+    queue.shutdown()
+
+
+def test_running_job_stops_when_asked():
+    queue = JobQueue(max_workers=1)
+    started = threading.Event()
+
+    def target(job):
+        started.set()
+        while not job.stop_requested():
+            time.sleep(0.005)
+        return job.cancel_token.reason
+
+    job_id = queue.submit(target)
+    started.wait(5)
+    assert queue.stop(job_id, "superseded")
+    wait_for(lambda: queue.get(job_id).is_finished())
+    assert queue.get(job_id).result == "superseded"
+    # Finished jobs can't be stopped and can be dropped
+    assert not queue.stop(job_id)
+    queue.discard(job_id)
+    assert queue.get(job_id) is None
+    queue.shutdown()
+
+
+def test_failures_are_recorded():
+    queue = JobQueue(max_workers=1)
+
+    def target(job):
+        job.update(step="parse")
+        raise ValueError("bad reply")
+
+    job_id = queue.submit(target)
+    wait_for(lambda: queue.get(job_id).is_finished())
+    snapshot = queue.get(job_id).snapshot()
+    assert (snapshot["status"], snapshot["error"], snapshot["progress"]) == (FAILED, "bad reply", {"step": "parse"})
+    assert queue.get_stats()["failed"] == 1
+    queue.shutdown()
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from benchmarks.mock_groq import start_server
+from utils.ai_helper import AIPortfolioGenerator, SMALL_MODEL_SECTIONS
+from utils.cache import ResponseCache
+from utils.rate_limiter import RateLimiter
+
+USER_DATA = {
+    "name": "Ada Lovelace",
+    "role": "Engineer",
+    "skills": "python, compilers",
+    "experience": "5 years",
+    "projects": "an analytical engine",
+}
+
+
+def run_plan(monkeypatch, small_invalid_rate):
+    monkeypatch.setenv("GROQ_API_KEY", "mock-key")
+    server = start_server(token_rate=5000.0, first_token_delay=0.0,
+                          models={"small": {"invalid_rate": small_invalid_rate}})
+    try:
+        generator = AIPortfolioGenerator(
+            cache=ResponseCache(path=None),
+            limiter=RateLimiter(10 ** 6, 10 ** 9),
+            base_url=server.base_url,
+            model_plan={section: "small" for section in SMALL_MODEL_SECTIONS},
+        )
+        events = list(generator.generate_portfolio_content_stream(USER_DATA, bypass_cache=True))
+        return generator, events, server.stats["requests"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("invalid_rate", [0.0, 1.0])
+def test_small_model_writes_its_sections_and_bad_ones_are_escalated(monkeypatch, invalid_rate):
+    generator, events, requests = run_plan(monkeypatch, invalid_rate)
+    done = events[-1]
+    assert done["done"] and done["success"], done
+    # The streamed deltas form the same JSON object as the stored content
+    assert json.loads("".join(event["delta"] for event in events[:-1])) == json.loads(done["content"])
+
+    # The mock cuts SKILLS_DESCRIPTION short when it returns an invalid reply
+    escalated = ["SKILLS_DESCRIPTION"] if invalid_rate else []
+    assert done["escalated"] == escalated
+    assert requests == 2 + len(escalated)
+    assert done["models"] == {
+        "HEADLINE": "small",
+        "PROFESSIONAL_BIO": "small",
+        "SKILLS_DESCRIPTION": generator.model if escalated else "small",
+        "ABOUT_SECTION": generator.model,
+    }
+    assert set(done["usage_by_model"]) == {"small", generator.model}
+    assert done["tokens_used"] == sum(
+        totals["prompt_tokens"] + totals["completion_tokens"] for totals in done["usage_by_model"].values()
+    )
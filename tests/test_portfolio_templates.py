@@ -0,0 +1,34 @@
+from utils.portfolio_templates import get_template, prepare_data, render_all, TEMPLATES
+
+
+DATA = {
+    "name": "Ada <Lovelace>",
+    "headline": "Engines & \"analysis\"",
+    "bio": "Bio",
+    "about": "About",
+    "skills_description": {"C & C++": "<fast>"},
+    "email": "ada@example.com",
+    "linkedin": "#",
+    "github": "#",
+}
+
+
+def test_values_are_escaped():
+    html = get_template("Modern Gradient", DATA)
+    assert "Ada &lt;Lovelace&gt;" in html
+    assert "Engines &amp; &quot;analysis&quot;" in html
+    assert "C &amp; C++" in html and "&lt;fast&gt;" in html
+    assert "<Lovelace>" not in html
+
+
+def test_prepared_data_is_not_escaped_twice():
+    prepared = prepare_data(DATA)
+    assert prepare_data(prepared) is prepared
+    for name in TEMPLATES:
+        html = get_template(name, prepared)
+        assert html == get_template(name, DATA)
+        assert "&amp;amp;" not in html
+
+
+def test_render_all_matches_get_template():
+    assert render_all(DATA) == {name: get_template(name, DATA) for name in TEMPLATES}
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from utils.rate_limiter import parse_duration, RateLimiter
+
+
+def test_acquire_spends_one_request_and_the_estimated_tokens():
+    limiter = RateLimiter(requests_per_minute=30, tokens_per_minute=12000)
+    limiter.acquire(1000)
+    stats = limiter.get_stats()
+    assert stats["acquired"] == 1
+    assert stats["available_requests"] == pytest.approx(29, abs=0.01)
+    assert stats["available_tokens"] == pytest.approx(11000, abs=1)
+
+
+def test_record_usage_corrects_the_estimate():
+    limiter = RateLimiter(requests_per_minute=30, tokens_per_minute=12000)
+    limiter.acquire(1000)
+    limiter.record_usage(1000, 400)
+    assert limiter.get_stats()["available_tokens"] == pytest.approx(11600, abs=1)
+    limiter.record_usage(1000, 2500)
+    assert limiter.get_stats()["available_tokens"] == pytest.approx(10100, abs=1)
+    limiter.record_usage(1000, None)
+    assert limiter.get_stats()["available_tokens"] == pytest.approx(10100, abs=1)
+
+
+def test_oversized_request_is_clamped_to_the_whole_budget():
+    limiter = RateLimiter(requests_per_minute=30, tokens_per_minute=1000)
+    limiter.acquire(5000)
+    assert limiter.get_stats()["available_tokens"] == pytest.approx(0, abs=1)
+
+
+def test_headers_only_lower_the_buckets():
+    limiter = RateLimiter(requests_per_minute=30, tokens_per_minute=12000)
+    limiter.update_from_headers({"x-ratelimit-remaining-requests": "5", "x-ratelimit-remaining-tokens": "50000"})
+    stats = limiter.get_stats()
+    assert stats["available_requests"] == pytest.approx(5, abs=0.01)
+    assert stats["available_tokens"] == pytest.approx(12000, abs=1)
+
+
+def test_empty_request_bucket_makes_the_caller_wait():
+    limiter = RateLimiter(requests_per_minute=240, tokens_per_minute=10 ** 6)
+    for _ in range(240):
+        limiter.acquire(1)
+    started = time.monotonic()
+    limiter.acquire(1)
+    # One request refills in 60 / 240 = 0.25 s
+    assert 0.15 < time.monotonic() - started < 1.0
+    assert limiter.get_stats()["waited_s"] > 0.15
+
+
+def test_block_for_pauses_async_callers():
+    limiter = RateLimiter(requests_per_minute=30, tokens_per_minute=12000)
+    limiter.block_for(0.3)
+
+    async def main():
+        started = time.monotonic()
+        await limiter.acquire_async(10)
+        return time.monotonic() - started
+
+    assert asyncio.run(main()) >= 0.25
+    assert limiter.get_stats()["throttled"] == 1
+
+
+def test_parse_duration():
+    assert parse_duration("2m59.56s") == pytest.approx(179.56)
+    assert parse_duration("120ms") == pytest.approx(0.12)
+    assert parse_duration("7") == 7.0
+    assert parse_duration("soon") is None
@@ -0,0 +1,43 @@
+import json
+
+from utils.response_parser import parse_portfolio_response
+
+
+PORTFOLIO = {
+    "HEADLINE": "Backend engineer building reliable APIs",
+    "PROFESSIONAL_BIO": "Ada builds services.",
+    "ABOUT_SECTION": "Ada has spent years building services.",
+    "SKILLS_DESCRIPTION": {f"Skill {index}": f"Uses skill {index} daily" for index in range(6)},
+}
+
+
+def test_well_formed_json_inside_a_fence():
+    result = parse_portfolio_response("Here you go:\n```json\n" + json.dumps(PORTFOLIO) + "\n```")
+    assert result["data"] == PORTFOLIO
+    assert result["valid"] and not result["repaired"]
+
+
+def test_trailing_commas_and_key_spelling_are_repaired():
+    text = '{"headline": "Engineer", "Professional Bio": "Bio",}'
+    result = parse_portfolio_response(text)
+    assert result["repaired"]
+    assert result["data"]["HEADLINE"] == "Engineer"
+    assert result["data"]["PROFESSIONAL_BIO"] == "Bio"
+    assert not result["valid"]
+    assert "ABOUT_SECTION is missing" in result["errors"]
+
+
+def test_truncated_response_keeps_the_finished_fields():
+    text = json.dumps(PORTFOLIO)
+    result = parse_portfolio_response(text[:text.index('"Skill 3"')])
+    assert result["truncated"]
+    assert result["data"]["HEADLINE"] == PORTFOLIO["HEADLINE"]
+    assert len(result["data"]["SKILLS_DESCRIPTION"]) == 3
+    assert "SKILLS_DESCRIPTION" in result["recovered"]
+    assert result["errors"] == ["SKILLS_DESCRIPTION has 3 skills instead of 6"]
+
+
+def test_no_json_at_all():
+    result = parse_portfolio_response("Sorry, I can't help with that.")
+    assert result["data"] == {} and not result["valid"]
+    assert result["errors"] == ["No JSON object found in the response"]
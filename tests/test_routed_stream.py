@@ -0,0 +1,99 @@
+import asyncio
+import json
+import time
+
+from utils.ai_helper import AIPortfolioGenerator
+from utils.cache import ResponseCache
+from utils.cancellation import CancelToken
+from utils.providers import OpenAICompatibleBackend
+from utils.rate_limiter import RateLimiter
+from utils.router import Router
+
+USER_DATA = {
+    "name": "Ada Lovelace",
+    "role": "Engineer",
+    "skills": "python, compilers",
+    "experience": "5 years",
+    "projects": "an analytical engine",
+}
+
+
+def make_generator(server):
+    backend = OpenAICompatibleBackend("mock-model", server.base_url + "/v1")
+    return AIPortfolioGenerator(
+        cache=ResponseCache(path=None),
+        limiter=RateLimiter(10 ** 6, 10 ** 9),
+        router=Router([backend]),
+        model_plan={},
+    )
+
+
+def test_stream_through_openai_backend(mock_server):
+    generator = make_generator(mock_server)
+    events = list(generator.generate_portfolio_content_stream(USER_DATA, bypass_cache=True))
+
+    done = events[-1]
+    assert done["done"] and done["success"], done
+    assert json.loads(done["content"])["HEADLINE"]
+    assert "".join(event["delta"] for event in events[:-1]).strip() == done["content"]
+
+
+def test_cancelled_stream_through_openai_backend_drops_connection(slow_mock_server):
+    generator = make_generator(slow_mock_server)
+    token = CancelToken()
+    events = generator.generate_portfolio_content_stream(USER_DATA, bypass_cache=True, cancel_token=token)
+
+    received = 0
+    for event in events:
+        if event.get("done"):
+            break
+        received += 1
+        if received == 5:
+            token.cancel("superseded")
+
+    assert event["cancelled"] and not event["success"]
+    # The mock notices the hang-up on its next write
+    deadline = time.monotonic() + 5
+    while slow_mock_server.stats["aborted"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert slow_mock_server.stats["aborted"] == 1
+    assert slow_mock_server.stats["completion_tokens"] < 100
+
+
+def test_closing_stream_early_through_openai_backend(slow_mock_server):
+    generator = make_generator(slow_mock_server)
+    events = generator.generate_portfolio_content_stream(USER_DATA, bypass_cache=True)
+    next(events)
+    next(events)
+    events.close()
+
+    deadline = time.monotonic() + 5
+    while slow_mock_server.stats["aborted"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert slow_mock_server.stats["aborted"] == 1
+
+
+def test_async_stream_through_openai_backend(mock_server):
+    generator = make_generator(mock_server)
+
+    async def collect():
+        return [event async for event in generator.agenerate_portfolio_content_stream(USER_DATA, bypass_cache=True)]
+
+    done = asyncio.run(collect())[-1]
+    assert done["done"] and done["success"], done
+
+
+def test_async_stream_closed_early_through_openai_backend(slow_mock_server):
+    generator = make_generator(slow_mock_server)
+
+    async def read_two():
+        events = generator.agenerate_portfolio_content_stream(USER_DATA, bypass_cache=True)
+        await events.__anext__()
+        await events.__anext__()
+        await events.aclose()
+
+    asyncio.run(read_two())
+    deadline = time.monotonic() + 5
+    while slow_mock_server.stats["aborted"] == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert slow_mock_server.stats["aborted"] == 1
@@ -0,0 +1,72 @@
+import asyncio
+
+import pytest
+
+from utils.router import AllBackendsFailed, Router
+
+
+class FakeBackend:
+
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.model = f"{name}-model"
+        self.fail = fail
+        self.calls = 0
+
+    def create(self, messages, **params):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError(f"{self.name} is down")
+        return {"answer": self.name}, 0
+
+    async def acreate(self, messages, **params):
+        return self.create(messages, **params)
+
+
+def test_failed_backend_fails_over_to_the_next():
+    down, up = FakeBackend("down", fail=True), FakeBackend("up")
+    router = Router([down, up], explore=0)
+    response, retries, info = router.complete([{"role": "user", "content": "hi"}])
+    assert response == {"answer": "up"}
+    assert info["backend"] is up and info["model"] == "up-model"
+    assert info["failovers"] == 1
+    assert info["errors"][0][0] == "down"
+
+
+def test_backend_that_failed_goes_behind_the_working_ones():
+    down, up = FakeBackend("down", fail=True), FakeBackend("up")
+    router = Router([down, up], explore=0)
+    for _ in range(3):
+        router.complete([])
+    assert down.calls == 1 and up.calls == 3
+    assert router.rank() == [up, down]
+
+
+def test_repeated_failures_open_the_circuit():
+    down = FakeBackend("down", fail=True)
+    router = Router([down], failure_threshold=2, cooldown=60, explore=0)
+    for _ in range(2):
+        with pytest.raises(AllBackendsFailed):
+            router.complete([])
+    stats = router.get_stats()["down"]
+    assert not stats["healthy"]
+    assert stats["failures"] == 2 and stats["error_rate"] == 1.0
+
+    # Still attempted while open: it is the only backend left
+    down.fail = False
+    router.complete([])
+    assert router.get_stats()["down"]["healthy"]
+
+
+def test_every_backend_failing_raises():
+    router = Router([FakeBackend("a", fail=True), FakeBackend("b", fail=True)], explore=0)
+    with pytest.raises(AllBackendsFailed) as raised:
+        router.complete([])
+    assert [name for name, _ in raised.value.errors] == ["a", "b"]
+
+
+def test_async_failover():
+    down, up = FakeBackend("down", fail=True), FakeBackend("up")
+    router = Router([down, up], explore=0)
+    response, _, info = asyncio.run(router.acomplete([]))
+    assert response == {"answer": "up"} and info["failovers"] == 1
@@ -0,0 +1,55 @@
+import time
+
+from utils.session_store import SessionStore
+
+
+RECORD = {"ai_fields": {"HEADLINE": "Backend engineer"}, "user_data": {"name": "Ada"}, "contact": {}}
+
+
+def test_identical_records_are_stored_once():
+    store = SessionStore()
+    key = store.put("tab-1", RECORD)
+    assert store.put("tab-2", dict(RECORD)) == key
+    assert store.get(key) == RECORD
+    stats = store.get_stats()
+    assert (stats["sessions"], stats["records"], stats["shared"]) == (2, 1, 1)
+
+    # The record stays while any session still points at it
+    store.discard("tab-1")
+    assert store.get(key) == RECORD
+    store.discard("tab-2")
+    assert store.get(key) is None
+    assert store.get_stats()["bytes"] == 0
+
+
+def test_a_new_record_releases_the_previous_one():
+    store = SessionStore(compress=False)
+    old = store.put("tab", RECORD)
+    new = store.put("tab", dict(RECORD, contact={"email": "ada@example.com"}))
+    assert store.get(old) is None and store.get(new) is not None
+    # Storing the same record again keeps it
+    assert store.put("tab", dict(RECORD, contact={"email": "ada@example.com"})) == new
+    assert store.get(new) is not None
+
+
+def test_least_recently_seen_sessions_are_evicted_over_the_ceiling():
+    store = SessionStore(max_bytes=1, compress=False)
+    first = store.put("tab-1", RECORD)
+    # The session being stored is never evicted, even over the ceiling
+    assert store.get(first) == RECORD
+    second = store.put("tab-2", dict(RECORD, user_data={"name": "Grace"}))
+    assert store.get(first) is None and store.get(second) is not None
+    assert store.get_stats()["evicted_memory"] == 1
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(idle_seconds=0.05)
+    idle = store.put("idle", RECORD)
+    active = store.put("active", dict(RECORD, user_data={"name": "Grace"}))
+    time.sleep(0.03)
+    store.touch("active")
+    time.sleep(0.03)
+    store.touch("active")
+    assert store.get(idle) is None
+    assert store.get(active) is not None
+    assert store.get_stats()["evicted_idle"] == 1
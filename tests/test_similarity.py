@@ -0,0 +1,58 @@
+from utils.similarity import rename_draft, SimilarityIndex
+
+
+BASE = {
+    "name": "Ada Lovelace",
+    "role": "Backend engineer",
+    "skills": "Python, SQL, Docker, Kubernetes",
+    "experience": "Five years building payment APIs at a fintech startup",
+    "projects": "Built a fraud detection service and a ledger reconciliation pipeline used by ten teams",
+}
+
+
+def test_near_duplicate_is_found():
+    index = SimilarityIndex(threshold=0.85)
+    index.add("base", BASE)
+    # Other name, skills written differently, one extra word in the projects
+    near = dict(BASE, name="Grace Hopper", skills="sql; python | docker, kubernetes",
+                projects=BASE["projects"] + " daily")
+
+    match = index.find(near)
+    assert match["key"] == "base"
+    assert match["name"] == "Ada Lovelace"
+    assert 0.85 <= match["similarity"] < 1.0
+    assert index.get_stats()["near_hits"] == 1
+
+
+def test_below_threshold_is_a_miss():
+    index = SimilarityIndex(threshold=0.99)
+    index.add("base", BASE)
+    assert index.find(dict(BASE, projects=BASE["projects"] + " daily")) is None
+
+    unrelated = {"name": "Ada Lovelace", "role": "Graphic designer", "skills": "Figma, Illustrator",
+                 "experience": "Branding for cafes", "projects": "Menu redesign"}
+    assert index.find(unrelated) is None
+    stats = index.get_stats()
+    assert (stats["lookups"], stats["near_hits"]) == (2, 0)
+
+
+def test_excluded_and_removed_keys_are_not_returned():
+    index = SimilarityIndex(threshold=0.85)
+    index.add("base", BASE)
+    assert index.find(BASE, exclude_key="base") is None
+    index.remove("base")
+    assert index.find(BASE) is None
+
+
+def test_index_survives_a_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    SimilarityIndex(threshold=0.85, path=path).add("base", BASE)
+    assert SimilarityIndex(threshold=0.85, path=path).find(BASE)["key"] == "base"
+
+
+def test_rename_draft():
+    content = '{"HEADLINE": "Ada Lovelace, backend engineer"}'
+    assert rename_draft(content, "Ada Lovelace", "Grace \"G\" Hopper") == \
+        '{"HEADLINE": "Grace \\"G\\" Hopper, backend engineer"}'
+    # "Ada" alone would be left behind in the text
+    assert rename_draft('{"BIO": "Ada Lovelace. Ada builds APIs"}', "Ada Lovelace", "Grace Hopper") is None
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from utils.job_queue import JobQueue
+from utils.speculation import Speculator
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def generate(job, fingerprint, calls):
+    calls.append(fingerprint)
+    return fingerprint
+
+
+def test_only_the_settled_inputs_are_generated():
+    queue = JobQueue(max_workers=1)
+    speculator = Speculator(queue, debounce_seconds=0.1)
+    calls = []
+    for fingerprint in ("a", "ab", "abc"):
+        speculator.update("tab", fingerprint, generate, fingerprint, calls)
+        time.sleep(0.02)
+    # Reruns with unchanged inputs don't restart the debounce
+    speculator.update("tab", "abc", generate, "abc", calls)
+
+    wait_for(lambda: speculator.get_stats()["started"] == 1)
+    job_id = speculator.claim("tab", "abc")
+    wait_for(lambda: queue.get(job_id).is_finished())
+    assert queue.get(job_id).result == "abc"
+    assert calls == ["abc"]
+    stats = speculator.get_stats()
+    assert (stats["scheduled"], stats["started"], stats["claimed"]) == (3, 1, 1)
+    queue.shutdown()
+
+
+def test_speculations_per_session_are_capped():
+    queue = JobQueue(max_workers=1)
+    speculator = Speculator(queue, debounce_seconds=0.01, max_per_session=2)
+    calls = []
+    for started, fingerprint in enumerate(("a", "b"), start=1):
+        speculator.update("tab", fingerprint, generate, fingerprint, calls)
+        wait_for(lambda: len(calls) == started)
+    speculator.update("tab", "c", generate, "c", calls)
+    time.sleep(0.05)
+
+    assert calls == ["a", "b"]
+    assert speculator.get_stats()["skipped_budget"] == 1
+    # Other sessions have their own budget
+    speculator.update("other", "c", generate, "c", calls)
+    wait_for(lambda: calls == ["a", "b", "c"])
+    queue.shutdown()
+
+
+def test_nothing_is_started_while_workers_are_busy():
+    queue = JobQueue(max_workers=1)
+    release = threading.Event()
+    queue.submit(lambda job: release.wait(5))
+    wait_for(lambda: queue.get_stats()["running"] == 1)
+
+    speculator = Speculator(queue, debounce_seconds=0.01)
+    calls = []
+    speculator.update("tab", "a", generate, "a", calls)
+    wait_for(lambda: speculator.get_stats()["skipped_busy"] == 1)
+    release.set()
+    assert speculator.claim("tab", "a") is None
+    assert calls == []
+    queue.shutdown()
+
+
+def test_claim_with_other_inputs_drops_the_pending_speculation():
+    queue = JobQueue(max_workers=1)
+    speculator = Speculator(queue, debounce_seconds=0.05)
+    calls = []
+    speculator.update("tab", "a", generate, "a", calls)
+    assert speculator.claim("tab", "b") is None
+    time.sleep(0.1)
+    assert calls == [] and speculator.get_stats()["started"] == 0
+    queue.shutdown()
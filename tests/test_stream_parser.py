@@ -0,0 +1,33 @@
+import json
+
+from utils.stream_parser import IncrementalJSONParser
+
+
+PORTFOLIO = {
+    "HEADLINE": "Backend engineer building reliable APIs",
+    "PROFESSIONAL_BIO": "Ada builds services.",
+    "ABOUT_SECTION": "Ada has spent years building services.",
+    "SKILLS_DESCRIPTION": {f"Skill {index}": f"Uses skill {index} daily" for index in range(6)},
+}
+
+
+def test_stream_parser_reports_fields_as_they_close():
+    text = "```json\n" + json.dumps(PORTFOLIO, indent=2) + "\n```"
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), 7):
+        events += parser.feed(text[start:start + 7])
+
+    paths = [path for path, _ in events]
+    assert paths[:3] == [("HEADLINE",), ("PROFESSIONAL_BIO",), ("ABOUT_SECTION",)]
+    assert ("SKILLS_DESCRIPTION", "Skill 0") in paths
+    assert dict(events)[("HEADLINE",)] == PORTFOLIO["HEADLINE"]
+    assert parser.is_complete()
+    assert parser.result == PORTFOLIO
+
+
+def test_stream_parser_waits_for_the_closing_quote():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"HEADLINE": "Back') == []
+    assert not parser.is_complete()
+    assert parser.feed('end \\"engineer\\"", ') == [(("HEADLINE",), 'Backend "engineer"')]
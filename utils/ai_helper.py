@@ -1,107 +1,1083 @@
-import os
-from groq import Groq
-from dotenv import load_dotenv
+import asyncio
+import json
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-# Load environment variables from .env file
-load_dotenv()
+from utils.cache import get_default_cache, make_cache_key
+from utils.config import get_setting
+from utils.metrics import RequestTrace
+from utils.rate_limiter import acall_with_retry, call_with_retry, estimate_tokens, get_default_limiter
+from utils.response_parser import EXPECTED_FIELDS, find_invalid_sections, parse_portfolio_response
+from utils.router import get_default_router
+from utils.similarity import get_default_similarity_index, rename_draft
+
+# Bump this whenever the prompt changes so old cached answers are not reused
+PROMPT_VERSION = "2"
+
+# Fixed instructions for a full generation. Keep this byte-for-byte stable:
+# it is sent first on every request, so the provider can reuse its cached
+# prefix, and anything request-specific belongs in the user message instead.
+SYSTEM_PROMPT = """You are a professional portfolio content writer. You create engaging, achievement-focused content. You ONLY respond with a valid JSON object, no markdown formatting.
+
+Write portfolio content for the person described by the user, as a JSON object with exactly these keys:
+{"PROFESSIONAL_BIO": str, "HEADLINE": str, "ABOUT_SECTION": str, "SKILLS_DESCRIPTION": {"<skill area>": str, ...}}
+
+- PROFESSIONAL_BIO: compelling 2-3 sentence bio (60-80 words) highlighting expertise and impact
+- HEADLINE: catchy professional headline (8-12 words)
+- ABOUT_SECTION: 150-200 words on background, journey, expertise, achievements and what drives this professional; personal and compelling
+- SKILLS_DESCRIPTION: exactly 6 skill areas based on their skills, each with a 15-25 word description of WHAT was built or achieved
+
+Rules:
+1. Use concrete examples from the projects mentioned
+2. Make it achievement-oriented and specific
+3. Do NOT use generic terms like "Expert", "Proficient", "Skilled" - describe actual accomplishments"""
+
+# Instructions for a call that writes only some of the sections (a model
+# plan sends each model its own sections). Stable per set of sections, so
+# the prefix is still cached.
+PLAN_PROMPT = """You are a professional portfolio content writer. You create engaging, achievement-focused content. You ONLY respond with a valid JSON object, no markdown formatting.
+
+Write portfolio content for the person described by the user, as a JSON object with exactly these keys: {keys}
+
+{instructions}
+
+Rules:
+1. Use concrete examples from the projects mentioned
+2. Make it achievement-oriented and specific
+3. Do NOT use generic terms like "Expert", "Proficient", "Skilled" - describe actual accomplishments"""
+
+# Sections a small model writes when PORTFOLIO_SMALL_MODEL is set; the
+# long-form ABOUT_SECTION stays with the large model
+SMALL_MODEL_SECTIONS = ("HEADLINE", "PROFESSIONAL_BIO", "SKILLS_DESCRIPTION")
+
+# Quality guards for sections written by a smaller model, on top of the
+# schema check: a section under about half the length the prompt asks for,
+# or using the generic terms the prompt forbids, is rewritten by the large model
+MIN_WORDS = {
+    "HEADLINE": 4,
+    "PROFESSIONAL_BIO": 30,
+    "ABOUT_SECTION": 75,
+}
+MIN_SKILL_WORDS = 8
+GENERIC_TERMS = ("expert", "proficient", "skilled")
+
+# Compact instructions used to regenerate one section on its own:
+# section -> (what to write, max_tokens for the answer)
+SECTION_PROMPTS = {
+    "HEADLINE": (
+        "a catchy professional headline (8-12 words)",
+        80
+    ),
+    "PROFESSIONAL_BIO": (
+        "a compelling 2-3 sentence professional bio (60-80 words) that highlights expertise and impact",
+        250
+    ),
+    "ABOUT_SECTION": (
+        "a personal, compelling about section (150-200 words) covering background, journey, "
+        "expertise, achievements and what drives this professional",
+        500
+    ),
+    "SKILLS_DESCRIPTION": (
+        "an object with exactly 6 skill areas, each mapped to a 15-25 word description of what "
+        "was built or achieved, using the projects as concrete examples",
+        600
+    ),
+}
+
+# Short sections users most often want another take on; generate_candidates
+# writes several alternatives for them in one call
+CANDIDATE_SECTIONS = ("HEADLINE", "PROFESSIONAL_BIO")
 
 # This class will handle all AI-related tasks for our portfolio generator
 class AIPortfolioGenerator:
     
     # Constructor to set up the Groq client
-    def __init__(self):
+    # base_url (or GROQ_BASE_URL) points the client at another
+    # Groq-compatible endpoint, e.g. the local mock used by the benchmarks
+    # similarity: a utils.similarity.SimilarityIndex for near-duplicate drafts
+    # (default: on when PORTFOLIO_NEAR_DUP_THRESHOLD is set)
+    # router: a utils.router.Router spreading requests over several backends
+    # (default: built from PORTFOLIO_BACKENDS when set, otherwise Groq only)
+    # model_plan: section -> model for sections that another model writes
+    # (default: SMALL_MODEL_SECTIONS go to PORTFOLIO_SMALL_MODEL when set).
+    # Routed generators pick models per backend, so they don't use a plan.
+    def __init__(self, cache=None, limiter=None, base_url=None, similarity=None, router=None,
+                 model_plan=None):
         
-        api_key = os.getenv("GROQ_API_KEY")
+        # The Groq SDK is the slowest import in the app, so it is only loaded
+        # once a generator is actually needed
+        from utils.client_pool import get_client
+
+        self.router = router if router is not None else get_default_router()
+        api_key = get_setting("GROQ_API_KEY")
         
-        if not api_key:
+        if not api_key and self.router is None:
             raise ValueError("GROQ_API_KEY not found in .env file!")
         
-        self.client = Groq(api_key=api_key)
-        self.model = "llama-3.3-70b-versatile"
+        self.api_key = api_key
+        self.base_url = base_url or get_setting("GROQ_BASE_URL")
+        # Clients come from a process-wide pool so connections are reused
+        self.client = get_client(api_key, self.base_url) if api_key else None
+        # With a router the first backend's model names the cache entries
+        self.model = self.router.backends[0].model if self.router is not None else "llama-3.3-70b-versatile"
+        self.temperature = 0.7
+        self.max_tokens = 1800
+        self.cache = cache if cache is not None else get_default_cache()
+        self.limiter = limiter if limiter is not None else get_default_limiter()
+        self.similarity = similarity if similarity is not None else get_default_similarity_index()
+        
+        if model_plan is None:
+            small_model = get_setting("PORTFOLIO_SMALL_MODEL")
+            model_plan = {section: small_model for section in SMALL_MODEL_SECTIONS} if small_model else {}
+        self.model_plan = {} if self.router is not None else {
+            section: model for section, model in model_plan.items() if model and model != self.model
+        }
+        
+        # Completion sizes of recent streams, to estimate what a cancelled
+        # stream would still have cost
+        self.recent_completions = deque(maxlen=50)
+        self.cancellation_stats = {"cancelled": 0, "tokens_saved": 0}
+        self._stats_lock = threading.Lock()
+    
+    # This method builds the cache key for a request
+    def get_cache_key(self, user_data):
+        params = {"temperature": self.temperature, "max_tokens": self.max_tokens}
+        if self.model_plan:
+            params["model_plan"] = self.model_plan
+        return make_cache_key(user_data, self.model, PROMPT_VERSION, **params)
+    
+    # This method builds the chat messages sent to the AI
+    # The instructions live in SYSTEM_PROMPT, which never changes between
+    # requests, so only the short user message differs from call to call
+    def build_messages(self, user_data):
+        return [
+            {
+                "role": "system",
+                "content": SYSTEM_PROMPT
+            },
+            {
+                "role": "user",
+                "content": self.build_profile(user_data)
+            }
+        ]
+    
+    # This method builds the user message describing the person
+    @staticmethod
+    def build_profile(user_data):
+        return (
+            f"Name: {user_data.get('name', 'User')}\n"
+            f"Role: {user_data.get('role', 'Developer')}\n"
+            f"Skills: {user_data.get('skills', 'Python, AI, Web Development')}\n"
+            f"Experience: {user_data.get('experience', '2 years')}\n"
+            f"Projects: {user_data.get('projects', 'Various web applications')}"
+        )
+    
+    # This method builds the messages for a call that writes only `sections`
+    # Returns (messages, max_tokens)
+    def build_plan_messages(self, user_data, sections):
+        prompt = PLAN_PROMPT.format(
+            keys=", ".join(f'"{section}"' for section in sections),
+            instructions="\n".join(f"- {section}: {SECTION_PROMPTS[section][0]}" for section in sections)
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": prompt
+            },
+            {
+                "role": "user",
+                "content": self.build_profile(user_data)
+            }
+        ]
+        return messages, sum(SECTION_PROMPTS[section][1] for section in sections)
+    
+    # This method sends one chat completion through the shared rate limiter,
+    # retrying 429s and transient errors. Returns (response, retries).
+    # With a router, the backend that answered is recorded on `trace`.
+    def create_completion(self, messages, trace=None, **params):
+        params.setdefault("temperature", self.temperature)
+        params.setdefault("max_tokens", self.max_tokens)
+        if self.router is not None:
+            response, retries, route = self.router.complete(messages, **params)
+            self.trace_route(trace, route)
+            return response, retries
+        
+        params.setdefault("model", self.model)
+        estimated = estimate_tokens(messages, params["max_tokens"])
+        
+        raw_response, retries = call_with_retry(
+            lambda: self.client.chat.completions.with_raw_response.create(messages=messages, **params),
+            self.limiter,
+            estimated
+        )
+        response = raw_response.parse()
+        
+        # Streamed responses report usage at the end, so the caller records it
+        if not params.get("stream"):
+            self.limiter.record_usage(estimated, response.usage.total_tokens)
+        return response, retries
+    
+    # This method is the asyncio version of create_completion
+    async def acreate_completion(self, messages, trace=None, **params):
+        params.setdefault("temperature", self.temperature)
+        params.setdefault("max_tokens", self.max_tokens)
+        if self.router is not None:
+            response, retries, route = await self.router.acomplete(messages, **params)
+            self.trace_route(trace, route)
+            return response, retries
+        
+        from utils.client_pool import get_async_client
+
+        async_client = get_async_client(self.api_key, self.base_url)
+        params.setdefault("model", self.model)
+        estimated = estimate_tokens(messages, params["max_tokens"])
+        
+        raw_response, retries = await acall_with_retry(
+            lambda: async_client.chat.completions.with_raw_response.create(messages=messages, **params),
+            self.limiter,
+            estimated
+        )
+        response = await raw_response.parse()
+        
+        if not params.get("stream"):
+            self.limiter.record_usage(estimated, response.usage.total_tokens)
+        return response, retries
+    
+    # This method records cache status on a trace and returns the cached entry, if any
+    # On an exact miss, a near-duplicate earlier generation is returned as a
+    # draft (cache status "near") when a similarity index is configured
+    def lookup_cache(self, cache_key, bypass_cache, trace, user_data=None):
+        with trace.stage("cache_lookup"):
+            cached = None if bypass_cache else self.cache.get(cache_key)
+            if cached is None and not bypass_cache and user_data is not None:
+                cached = self.find_draft(cache_key, user_data)
+        
+        if cached is not None:
+            trace.set(cache="near" if cached.get("draft") else "hit", model=self.model, success=True)
+        else:
+            trace.set(cache="bypass" if bypass_cache else "miss", model=self.model)
+        return cached
+    
+    # This method looks for an earlier generation with nearly the same inputs
+    # and adapts it to this request's name
+    def find_draft(self, cache_key, user_data):
+        if self.similarity is None:
+            return None
+        match = self.similarity.find(user_data, exclude_key=cache_key)
+        if match is None:
+            return None
+        
+        entry = self.cache.get(match["key"])
+        if entry is None:
+            # The generation expired from the cache
+            self.similarity.remove(match["key"])
+            return None
+        content = rename_draft(entry["content"], match["name"], user_data.get("name"))
+        if content is None:
+            return None
+        return dict(entry, content=content, draft=True, similarity=round(match["similarity"], 3))
+    
+    # This method caches a fresh generation and indexes it for near-duplicate lookups
+    def store_generation(self, cache_key, user_data, content, tokens_used):
+        self.cache.set(cache_key, {
+            "content": content,
+            "tokens_used": tokens_used
+        })
+        if self.similarity is not None:
+            self.similarity.add(cache_key, user_data)
+    
+    # This method builds the result returned for a cached (or draft) entry
+    @staticmethod
+    def cached_result(cached):
+        result = {
+            "success": True,
+            "content": cached["content"],
+            "tokens_used": 0,
+            "cached": True
+        }
+        if cached.get("draft"):
+            result.update(draft=True, similarity=cached["similarity"])
+        return result
+    
+    # This method records which backend served a routed request
+    @staticmethod
+    def trace_route(trace, route):
+        if trace is not None:
+            trace.set(backend=route["backend"].name, model=route["model"])
+            trace.add(failovers=route["failovers"])
+            if route["hedged"]:
+                trace.set(hedged=True)
+    
+    # This method corrects the rate limit budget once a stream reports its usage
+    def record_stream_usage(self, messages, tokens_used, trace):
+        if self.router is not None:
+            backend = self.router.get_backend(trace.attributes.get("backend"))
+            if backend is not None:
+                backend.record_usage(messages, self.max_tokens, tokens_used or None)
+            return
+        self.limiter.record_usage(estimate_tokens(messages, self.max_tokens), tokens_used or None)
+    
+    # This method adds token usage and retries from a response to a trace
+    @staticmethod
+    def trace_usage(trace, usage, retries):
+        if usage is not None:
+            trace.add(prompt_tokens=usage.prompt_tokens, completion_tokens=usage.completion_tokens)
+        trace.add(retries=retries)
     
     # This method generates portfolio content based on user data
-    def generate_portfolio_content(self, user_data):
-
-    # A detailed prompt for the AI
-        prompt = f"""
-    You are an expert portfolio writer. Generate professional portfolio content for:
-
-    Name: {user_data.get('name', 'User')}
-    Role: {user_data.get('role', 'Developer')}
-    Skills: {user_data.get('skills', 'Python, AI, Web Development')}
-    Experience: {user_data.get('experience', '2 years')}
-    Projects: {user_data.get('projects', 'Various web applications')}
-
-    Generate a JSON object with this EXACT structure:
-
-    {{
-    "PROFESSIONAL_BIO": "A compelling 2-3 sentence professional bio (60-80 words) that highlights expertise and impact",
-    "HEADLINE": "A catchy professional headline (8-12 words)",
-    "ABOUT_SECTION": "Detailed about section (150-200 words) describing background, journey, expertise, achievements, and what drives this professional. Make it personal and compelling.",
-    "SKILLS_DESCRIPTION": {{
-        "Python & ML Frameworks": "Expertise in building production ML models with PyTorch, TensorFlow, and scikit-learn. Developed end-to-end AI systems from research to deployment.",
-        "NLP & Gen AI": "Specialized in transformer models, LangChain, and prompt engineering. Built RAG systems and conversational AI applications.",
-        "Full-Stack AI Development": "Creating production-ready AI applications with Streamlit and FastAPI. Experience with REST APIs and microservices architecture.",
-        "Data Science & Analytics": "Expert in EDA, feature engineering, and ML pipelines. Proficient with pandas, numpy, and visualization tools.",
-        "MLOps & DevOps": "Skilled in Git, Docker, and CI/CD for ML systems. Experience deploying models to cloud platforms.",
-        "Domain Expertise": "Applied ML to healthcare analytics and enterprise systems. Strong background in SAP integration and business processes."
-    }}
-    }}
-
-    CRITICAL RULES:
-    1. Return ONLY valid JSON - no markdown code blocks, no extra text
-    2. Each skill description should be 15-25 words and describe WHAT was built or achieved
-    3. Use concrete examples from the projects mentioned
-    4. Make it achievement-oriented and specific
-    5. The SKILLS_DESCRIPTION must have exactly 6 skills with detailed descriptions
-    6. Do NOT use generic terms like "Expert", "Proficient", "Skilled" - describe actual accomplishments
-
-    Return only the JSON object.
-    """
+    # Set bypass_cache=True to force a fresh generation (the result is still cached)
+    # Pass a utils.metrics.RequestTrace to collect stage timings and token counts
+    def generate_portfolio_content(self, user_data, bypass_cache=False, trace=None):
+        
+        trace = trace if trace is not None else RequestTrace()
+        cache_key = self.get_cache_key(user_data)
+        cached = self.lookup_cache(cache_key, bypass_cache, trace, user_data)
+        if cached is not None:
+            return self.cached_result(cached)
+        if self.model_plan:
+            return self.generate_with_plan(user_data, cache_key, trace)
         
         try:
-            # Call Groq AI
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a professional portfolio content writer. You create engaging, achievement-focused content. You ONLY respond with valid JSON, no markdown formatting."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.7,
-                max_tokens=1800,
-            )
+            # Call Groq AI (JSON mode makes the model return a bare JSON object)
+            with trace.stage("api_call"):
+                response, retries = self.create_completion(
+                    self.build_messages(user_data),
+                    trace=trace,
+                    response_format={"type": "json_object"}
+                )
+            self.trace_usage(trace, response.usage, retries)
             
-            # Extract the generated text
+            # Extract the generated text - fences or stray text are handled by
+            # utils.response_parser, so no cleanup copy is needed here
             generated_content = response.choices[0].message.content.strip()
             
-            # Clean up markdown code blocks if present
-            if generated_content.startswith('```'):
-                lines = generated_content.split('\n')
-                # Remove first line (```json or ```) and last line (```)
-                if lines[0].strip().startswith('```'):
-                    lines = lines[1:]
-                if lines and lines[-1].strip() == '```':
-                    lines = lines[:-1]
-                generated_content = '\n'.join(lines).strip()
+            self.store_generation(cache_key, user_data, generated_content, response.usage.total_tokens)
             
+            trace.set(success=True)
             return {
                 "success": True,
                 "content": generated_content,
-                "tokens_used": response.usage.total_tokens
+                "tokens_used": response.usage.total_tokens,
+                "cached": False,
+                "retries": retries
             }
             
         except Exception as e:
+            trace.set(success=False, error=str(e))
             return {
                 "success": False,
                 "error": str(e)
             }
+    
+    # This method is the asyncio version of generate_portfolio_content,
+    # used by the batch CLI to run many generations concurrently
+    async def agenerate_portfolio_content(self, user_data, bypass_cache=False, trace=None):
+        
+        trace = trace if trace is not None else RequestTrace()
+        cache_key = self.get_cache_key(user_data)
+        cached = self.lookup_cache(cache_key, bypass_cache, trace, user_data)
+        if cached is not None:
+            return self.cached_result(cached)
+        if self.model_plan:
+            return await self.agenerate_with_plan(user_data, cache_key, trace)
+        
+        try:
+            with trace.stage("api_call"):
+                response, retries = await self.acreate_completion(
+                    self.build_messages(user_data),
+                    trace=trace,
+                    response_format={"type": "json_object"}
+                )
+            self.trace_usage(trace, response.usage, retries)
+            
+            generated_content = response.choices[0].message.content.strip()
+            
+            self.store_generation(cache_key, user_data, generated_content, response.usage.total_tokens)
+            
+            trace.set(success=True)
+            return {
+                "success": True,
+                "content": generated_content,
+                "tokens_used": response.usage.total_tokens,
+                "cached": False,
+                "retries": retries
+            }
             
+        except Exception as e:
+            trace.set(success=False, error=str(e))
+            return {
+                "success": False,
+                "error": str(e)
+            }
+    
+    # This method regenerates a single section with a short, focused prompt
+    # instead of re-running the full generation (with `model`, on another model)
+    def generate_section(self, user_data, section, model=None):
+        
+        if section not in SECTION_PROMPTS:
+            return {
+                "success": False,
+                "error": f"Unknown section: {section}"
+            }
+        
+        messages, params = self.build_section_request(user_data, section, model)
+        try:
+            response, retries = self.create_completion(messages, **params)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        return self.read_section(response, retries, section)
+    
+    # This method is the asyncio version of generate_section
+    async def agenerate_section(self, user_data, section, model=None):
+        
+        if section not in SECTION_PROMPTS:
+            return {
+                "success": False,
+                "error": f"Unknown section: {section}"
+            }
+        
+        messages, params = self.build_section_request(user_data, section, model)
+        try:
+            response, retries = await self.acreate_completion(messages, **params)
+        except Exception as e:
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        return self.read_section(response, retries, section)
+    
+    # This method builds the messages and parameters for generate_section
+    def build_section_request(self, user_data, section, model=None):
+        instruction, max_tokens = SECTION_PROMPTS[section]
+        prompt = (
+            f"Name: {user_data.get('name', 'User')}\n"
+            f"Role: {user_data.get('role', 'Developer')}\n"
+            f"Skills: {user_data.get('skills', '')}\n"
+            f"Experience: {user_data.get('experience', '')}\n"
+            f"Projects: {user_data.get('projects', '')}\n\n"
+            f'Return a JSON object {{"{section}": ...}} whose value is {instruction}. '
+            f'Be specific and achievement-oriented; avoid generic words like "Expert" or "Skilled".'
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a professional portfolio content writer. You ONLY respond with valid JSON."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        params = {"max_tokens": max_tokens, "response_format": {"type": "json_object"}}
+        if model:
+            params["model"] = model
+        return messages, params
+    
+    # This method reads the section out of a generate_section response
+    @staticmethod
+    def read_section(response, retries, section):
+        parsed = parse_portfolio_response(response.choices[0].message.content)
+        value = parsed["data"].get(section)
+        problems = find_invalid_sections({section: value}, fields=(section,))
+        
+        if problems:
+            return {
+                "success": False,
+                "error": problems[section],
+                "tokens_used": response.usage.total_tokens,
+                "prompt_tokens": response.usage.prompt_tokens,
+                "completion_tokens": response.usage.completion_tokens,
+                "retries": retries
+            }
+        
+        return {
+            "success": True,
+            "section": section,
+            "value": value,
+            "tokens_used": response.usage.total_tokens,
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "retries": retries
+        }
+    
+    # This method writes `count` alternatives for each of `sections` in one
+    # call, so the profile is sent once instead of once per alternative.
+    # Groq only accepts n=1, so the prompt asks for a list per section rather
+    # than using the API's n parameter. Alternatives that fail validation or
+    # repeat another one are dropped.
+    def generate_candidates(self, user_data, sections=CANDIDATE_SECTIONS, count=3, trace=None):
+        
+        trace = trace if trace is not None else RequestTrace()
+        unknown = [section for section in sections if section not in SECTION_PROMPTS]
+        if unknown:
+            return {
+                "success": False,
+                "error": f"Unknown section: {unknown[0]}"
+            }
+        
+        messages, params = self.build_candidates_request(user_data, sections, count)
+        try:
+            with trace.stage("api_call"):
+                response, retries = self.create_completion(messages, trace=trace, **params)
+        except Exception as e:
+            trace.set(success=False, error=str(e))
+            return {
+                "success": False,
+                "error": str(e)
+            }
+        self.trace_usage(trace, response.usage, retries)
+        
+        result = self.read_candidates(response, retries, sections, count)
+        trace.set(success=result["success"],
+                  candidates=sum(len(values) for values in result.get("candidates", {}).values()))
+        return result
+    
+    # This method builds the messages and parameters for generate_candidates
+    def build_candidates_request(self, user_data, sections, count):
+        shape = ", ".join(f'"{section}": [...]' for section in sections)
+        instructions = "\n".join(f"- {section}: each alternative is {SECTION_PROMPTS[section][0]}"
+                                 for section in sections)
+        prompt = (
+            f"{self.build_profile(user_data)}\n\n"
+            f"Return a JSON object {{{shape}}} where each value is a list of {count} distinct alternatives:\n"
+            f"{instructions}\n"
+            f"Give every alternative a different angle, not just different wording. "
+            f'Be specific and achievement-oriented; avoid generic words like "Expert" or "Skilled".'
+        )
+        messages = [
+            {
+                "role": "system",
+                "content": "You are a professional portfolio content writer. You ONLY respond with valid JSON."
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        max_tokens = sum(SECTION_PROMPTS[section][1] for section in sections) * count
+        return messages, {"max_tokens": max_tokens, "response_format": {"type": "json_object"}}
+    
+    # This method reads the alternatives out of a generate_candidates response
+    @staticmethod
+    def read_candidates(response, retries, sections, count):
+        data = parse_portfolio_response(response.choices[0].message.content)["data"]
+        candidates = {}
+        for section in sections:
+            values = data.get(section)
+            values = [values] if isinstance(values, str) else values if isinstance(values, list) else []
+            kept = []
+            for value in values:
+                value = value.strip() if isinstance(value, str) else value
+                if value not in kept and not find_invalid_sections({section: value}, fields=(section,)):
+                    kept.append(value)
+            candidates[section] = kept[:count]
+        
+        usage = {
+            "tokens_used": response.usage.total_tokens,
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "retries": retries
+        }
+        if not any(candidates.values()):
+            return dict(usage, success=False, error="The response had no usable alternatives")
+        return dict(usage, success=True, candidates=candidates)
+    
+    # This method returns the model plan as [(model, sections)], the large
+    # model first, each model with the sections it writes
+    def get_plan_groups(self):
+        groups = {self.model: []}
+        for section in EXPECTED_FIELDS:
+            groups.setdefault(self.model_plan.get(section, self.model), []).append(section)
+        return [(model, sections) for model, sections in groups.items() if sections]
+    
+    # This method checks a section written by a smaller model. Returns the
+    # problem, or None when the large model doesn't need to rewrite it.
+    @staticmethod
+    def check_plan_section(section, value):
+        problems = find_invalid_sections({section: value}, fields=(section,))
+        if problems:
+            return problems[section]
+        
+        if section == "SKILLS_DESCRIPTION":
+            texts = list(value.values())
+            if any(len(text.split()) < MIN_SKILL_WORDS for text in texts):
+                return f"{section} has descriptions under {MIN_SKILL_WORDS} words"
+        else:
+            texts = [value]
+            if len(value.split()) < MIN_WORDS[section]:
+                return f"{section} is too short ({len(value.split())} words, min {MIN_WORDS[section]})"
+        
+        words = {word.strip(".,;:!?\"'()").casefold() for text in texts for word in text.split()}
+        generic = [term for term in GENERIC_TERMS if term in words]
+        if generic:
+            return f"{section} uses generic terms ({', '.join(generic)})"
+        return None
+    
+    # This method merges one model's answer into a plan's data. `outcome` is
+    # (response, retries) or the exception the call raised. Returns the
+    # sections the large model has to rewrite; a failed large model call raises.
+    def merge_plan_group(self, model, sections, outcome, data, usage, trace):
+        if isinstance(outcome, Exception):
+            if model == self.model:
+                raise outcome
+            return list(sections)
+        
+        response, retries = outcome
+        self.trace_usage(trace, response.usage, retries)
+        self.add_plan_usage(usage, model, response.usage.prompt_tokens,
+                            response.usage.completion_tokens, retries)
+        parsed = parse_portfolio_response(response.choices[0].message.content)
+        escalate = []
+        for section in sections:
+            value = parsed["data"].get(section)
+            if value is not None:
+                data[section] = value
+                usage["models"][section] = model
+            if model != self.model and self.check_plan_section(section, value):
+                escalate.append(section)
+        return escalate
+    
+    # This method adds one call's tokens to the totals of a plan
+    @staticmethod
+    def add_plan_usage(usage, model, prompt_tokens, completion_tokens, retries):
+        usage["tokens_used"] += prompt_tokens + completion_tokens
+        usage["retries"] += retries or 0
+        totals = usage["usage_by_model"].setdefault(model, {"prompt_tokens": 0, "completion_tokens": 0})
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+    
+    # This method applies a large model rewrite of one section
+    def merge_escalation(self, section, result, data, usage, trace):
+        trace.add(
+            prompt_tokens=result.get("prompt_tokens"),
+            completion_tokens=result.get("completion_tokens"),
+            retries=result.get("retries")
+        )
+        if "prompt_tokens" in result:
+            self.add_plan_usage(usage, self.model, result["prompt_tokens"],
+                                result["completion_tokens"], result["retries"])
+        # A failed rewrite keeps the small model's answer for repair_portfolio
+        if result["success"]:
+            data[section] = result["value"]
+            usage["models"][section] = self.model
+    
+    # This method returns the JSON text for sections that are final, so a
+    # plan can be streamed in the same shape as a single call
+    @staticmethod
+    def format_plan_sections(data, sections, first):
+        pieces = [
+            f"  {json.dumps(section)}: {json.dumps(data[section], ensure_ascii=False)}"
+            for section in sections if section in data
+        ]
+        if not pieces:
+            return ""
+        return ("\n" if first else ",\n") + ",\n".join(pieces)
+    
+    # This method stores a finished plan and builds the final event
+    def finish_plan(self, user_data, cache_key, data, escalated, usage, trace):
+        # Same layout as a single call's answer
+        generated_content = json.dumps(
+            {section: data[section] for section in EXPECTED_FIELDS if section in data},
+            ensure_ascii=False,
+            indent=2
+        )
+        self.store_generation(cache_key, user_data, generated_content, usage["tokens_used"])
+        trace.set(success=True, model_plan=True, escalated=len(escalated))
+        return dict(
+            usage,
+            done=True,
+            success=True,
+            content=generated_content,
+            cached=False,
+            escalated=escalated
+        )
+    
+    # This method sends one model of the plan its sections. Returns
+    # (response, retries), or the exception so the caller can escalate.
+    def call_plan_group(self, user_data, model, sections):
+        messages, max_tokens = self.build_plan_messages(user_data, sections)
+        try:
+            return self.create_completion(
+                messages, model=model, max_tokens=max_tokens, response_format={"type": "json_object"}
+            )
+        except Exception as e:
+            return e
+    
+    # This method is the asyncio version of call_plan_group
+    async def acall_plan_group(self, user_data, model, sections):
+        messages, max_tokens = self.build_plan_messages(user_data, sections)
+        try:
+            return await self.acreate_completion(
+                messages, model=model, max_tokens=max_tokens, response_format={"type": "json_object"}
+            )
+        except Exception as e:
+            return e
+    
+    # This method streams a generation with the model plan: every model gets
+    # its sections at once, the large model rewrites the small model's
+    # sections that fail validation as soon as they arrive, and each section
+    # is emitted (as part of one JSON object) once it is final
+    def stream_with_plan(self, user_data, cache_key, trace, cancel_token=None):
+        data, escalated = {}, []
+        usage = {"tokens_used": 0, "retries": 0, "models": {}, "usage_by_model": {}}
+        first = True
+        yield {"delta": "{"}
+        
+        executor = ThreadPoolExecutor(max_workers=len(SECTION_PROMPTS))
+        try:
+            with trace.stage("api_call"):
+                pending = {
+                    executor.submit(self.call_plan_group, user_data, model, sections): (model, sections)
+                    for model, sections in self.get_plan_groups()
+                }
+                while pending:
+                    done, _ = wait(pending, timeout=0.25 if cancel_token is not None else None,
+                                   return_when=FIRST_COMPLETED)
+                    if cancel_token is not None and cancel_token.is_cancelled():
+                        break
+                    for future in done:
+                        model, sections = pending.pop(future)
+                        if model is None:
+                            self.merge_escalation(sections[0], future.result(), data, usage, trace)
+                            final = sections
+                        else:
+                            escalate = self.merge_plan_group(model, sections, future.result(), data, usage, trace)
+                            for section in escalate:
+                                pending[executor.submit(self.generate_section, user_data, section, self.model)] = \
+                                    (None, [section])
+                            escalated.extend(escalate)
+                            final = [section for section in sections if section not in escalate]
+                        
+                        delta = self.format_plan_sections(data, final, first)
+                        if delta:
+                            first = False
+                            yield {"delta": delta}
+        except Exception as e:
+            trace.set(success=False, error=str(e))
+            yield {
+                "done": True,
+                "success": False,
+                "error": str(e)
+            }
+            return
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        # Calls of the plan aren't streamed, so the ones in flight still
+        # finish; cancelling stops waiting for them and any escalations
+        if pending:
+            with self._stats_lock:
+                self.cancellation_stats["cancelled"] += 1
+            trace.set(success=False, cancelled=cancel_token.reason, tokens_saved=0)
+            yield {
+                "done": True,
+                "success": False,
+                "cancelled": True,
+                "error": f"Generation cancelled ({cancel_token.reason})",
+                "tokens_saved": 0
+            }
+            return
+        
+        yield {"delta": "\n}"}
+        yield self.finish_plan(user_data, cache_key, data, escalated, usage, trace)
+    
+    # This method is the asyncio version of stream_with_plan
+    async def astream_with_plan(self, user_data, cache_key, trace):
+        data, escalated = {}, []
+        usage = {"tokens_used": 0, "retries": 0, "models": {}, "usage_by_model": {}}
+        first = True
+        yield {"delta": "{"}
+        
+        pending = {}
+        try:
+            with trace.stage("api_call"):
+                for model, sections in self.get_plan_groups():
+                    task = asyncio.ensure_future(self.acall_plan_group(user_data, model, sections))
+                    pending[task] = (model, sections)
+                while pending:
+                    done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        model, sections = pending.pop(task)
+                        if model is None:
+                            self.merge_escalation(sections[0], task.result(), data, usage, trace)
+                            final = sections
+                        else:
+                            escalate = self.merge_plan_group(model, sections, task.result(), data, usage, trace)
+                            for section in escalate:
+                                rewrite = asyncio.ensure_future(self.agenerate_section(user_data, section, self.model))
+                                pending[rewrite] = (None, [section])
+                            escalated.extend(escalate)
+                            final = [section for section in sections if section not in escalate]
+                        
+                        delta = self.format_plan_sections(data, final, first)
+                        if delta:
+                            first = False
+                            yield {"delta": delta}
+        except Exception as e:
+            trace.set(success=False, error=str(e))
+            yield {
+                "done": True,
+                "success": False,
+                "error": str(e)
+            }
+            return
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        yield {"delta": "\n}"}
+        yield self.finish_plan(user_data, cache_key, data, escalated, usage, trace)
+    
+    # This method generates the portfolio with the model plan and returns
+    # the final result of stream_with_plan
+    def generate_with_plan(self, user_data, cache_key, trace):
+        for event in self.stream_with_plan(user_data, cache_key, trace):
+            if event.get("done"):
+                event.pop("done")
+                return event
+    
+    # This method is the asyncio version of generate_with_plan
+    async def agenerate_with_plan(self, user_data, cache_key, trace):
+        async for event in self.astream_with_plan(user_data, cache_key, trace):
+            if event.get("done"):
+                event.pop("done")
+                return event
+    
+    # This method fixes individual sections of a parsed result and stores the
+    # merged result back in the cache. Without `sections`, the sections that
+    # fail validation are repaired automatically.
+    def repair_portfolio(self, user_data, data, sections=None, trace=None):
+        
+        trace = trace if trace is not None else RequestTrace()
+        if sections is None:
+            sections = list(find_invalid_sections(data))
+        
+        repaired_data = dict(data)
+        repaired = []
+        failed = {}
+        tokens_used = 0
+        
+        for section in sections:
+            with trace.stage("repair"):
+                result = self.generate_section(user_data, section)
+            tokens_used += result.get("tokens_used", 0)
+            trace.add(
+                prompt_tokens=result.get("prompt_tokens"),
+                completion_tokens=result.get("completion_tokens"),
+                retries=result.get("retries")
+            )
+            if result["success"]:
+                repaired_data[section] = result["value"]
+                repaired.append(section)
+            else:
+                failed[section] = result["error"]
+        
+        if repaired:
+            self.update_cached_content(user_data, repaired_data)
+        trace.set(repaired_sections=len(repaired))
+        
+        return {
+            "data": repaired_data,
+            "repaired": repaired,
+            "failed": failed,
+            "tokens_used": tokens_used
+        }
+    
+    # This method replaces the cached generation for these inputs with edited data
+    def update_cached_content(self, user_data, data):
+        self.cache.set(self.get_cache_key(user_data), {
+            "content": json.dumps(data, ensure_ascii=False),
+            "tokens_used": 0
+        })
+    
+    # This method streams portfolio content as it is generated
+    # It yields {"delta": text} for every chunk and finishes with one
+    # {"done": True, ...} event carrying the same fields as generate_portfolio_content
+    # The "api_call" stage of a streamed request lasts until the last chunk;
+    # the "first_token" mark records when the first text arrived
+    def generate_portfolio_content_stream(self, user_data, bypass_cache=False, trace=None, cancel_token=None):
+        
+        trace = trace if trace is not None else RequestTrace()
+        cache_key = self.get_cache_key(user_data)
+        cached = self.lookup_cache(cache_key, bypass_cache, trace, user_data)
+        if cached is not None:
+            yield {"delta": cached["content"]}
+            yield dict(self.cached_result(cached), done=True)
+            return
+        if self.model_plan:
+            yield from self.stream_with_plan(user_data, cache_key, trace, cancel_token)
+            return
+        
+        parts = []
+        tokens_used = 0
+        usage = None
+        stream = None
+        retries = 0
+        cancelled = cancel_token is not None and cancel_token.is_cancelled()
+        messages = self.build_messages(user_data)
+        try:
+            with trace.stage("api_call"):
+                if not cancelled:
+                    stream, retries = self.create_completion(messages, trace=trace, stream=True)
+                
+                for chunk in stream if stream is not None else ():
+                    # Checked on every chunk, so a cancelled request stops
+                    # within one token of the stream
+                    if cancel_token is not None and cancel_token.is_cancelled():
+                        cancelled = True
+                        break
+                    
+                    if chunk.choices:
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            trace.mark("first_token")
+                            parts.append(delta)
+                            yield {"delta": delta}
+                    
+                    # Groq reports usage on the final chunk
+                    chunk_usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+                    if chunk_usage is not None:
+                        usage = chunk_usage
+                        tokens_used = usage.total_tokens
+        
+        except Exception as e:
+            trace.set(success=False, error=str(e))
+            yield {
+                "done": True,
+                "success": False,
+                "error": str(e)
+            }
+            return
+        finally:
+            # Dropping the connection is what makes the API stop generating;
+            # this also runs when the caller closes the generator early
+            if stream is not None:
+                stream.close()
+        
+        if cancelled:
+            yield self.finish_cancelled(messages, "".join(parts), stream is not None, cancel_token, trace)
+            return
+        
+        self.record_stream_usage(messages, tokens_used, trace)
+        self.trace_usage(trace, usage, retries)
+        trace.set(success=True)
+        if usage is not None:
+            self.recent_completions.append(usage.completion_tokens)
+        
+        generated_content = "".join(parts).strip()
+        self.store_generation(cache_key, user_data, generated_content, tokens_used)
+        
+        yield {
+            "done": True,
+            "success": True,
+            "content": generated_content,
+            "tokens_used": tokens_used,
+            "cached": False,
+            "retries": retries
+        }
+    
+    # This method builds the final event of a cancelled stream. Nothing is
+    # cached. The rate limit reservation is corrected to the prompt plus
+    # the text received, and the tokens the rest of an average completion
+    # would have cost are counted as saved.
+    def finish_cancelled(self, messages, text, sent, cancel_token, trace):
+        prompt_tokens = estimate_tokens(messages, 0)
+        completion_tokens = len(text) // 4
+        expected = self.recent_completions
+        expected = sum(expected) // len(expected) if expected else self.max_tokens
+        
+        if sent:
+            self.record_stream_usage(messages, prompt_tokens + completion_tokens, trace)
+            tokens_saved = max(expected - completion_tokens, 0)
+        else:
+            tokens_saved = prompt_tokens + expected
+        
+        with self._stats_lock:
+            self.cancellation_stats["cancelled"] += 1
+            self.cancellation_stats["tokens_saved"] += tokens_saved
+        trace.set(success=False, cancelled=cancel_token.reason, tokens_saved=tokens_saved)
+        return {
+            "done": True,
+            "success": False,
+            "cancelled": True,
+            "error": f"Generation cancelled ({cancel_token.reason})",
+            "tokens_saved": tokens_saved
+        }
+    
+    # This method is the asyncio version of generate_portfolio_content_stream,
+    # used by the HTTP API for server-sent events
+    async def agenerate_portfolio_content_stream(self, user_data, bypass_cache=False, trace=None):
+        
+        trace = trace if trace is not None else RequestTrace()
+        cache_key = self.get_cache_key(user_data)
+        cached = self.lookup_cache(cache_key, bypass_cache, trace, user_data)
+        if cached is not None:
+            yield {"delta": cached["content"]}
+            yield dict(self.cached_result(cached), done=True)
+            return
+        if self.model_plan:
+            async for event in self.astream_with_plan(user_data, cache_key, trace):
+                yield event
+            return
+        
+        parts = []
+        tokens_used = 0
+        usage = None
+        stream = None
+        messages = self.build_messages(user_data)
+        try:
+            with trace.stage("api_call"):
+                stream, retries = await self.acreate_completion(messages, trace=trace, stream=True)
+                
+                async for chunk in stream:
+                    if chunk.choices:
+                        delta = chunk.choices[0].delta.content
+                        if delta:
+                            trace.mark("first_token")
+                            parts.append(delta)
+                            yield {"delta": delta}
+                    
+                    chunk_usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or getattr(chunk, "usage", None)
+                    if chunk_usage is not None:
+                        usage = chunk_usage
+                        tokens_used = usage.total_tokens
+        
+        except Exception as e:
+            trace.set(success=False, error=str(e))
+            yield {
+                "done": True,
+                "success": False,
+                "error": str(e)
+            }
+            return
+        finally:
+            # An SSE client that disconnects closes this generator; drop the
+            # upstream stream with it
+            if stream is not None:
+                await stream.close()
+        
+        self.record_stream_usage(messages, tokens_used, trace)
+        self.trace_usage(trace, usage, retries)
+        trace.set(success=True)
+        if usage is not None:
+            self.recent_completions.append(usage.completion_tokens)
+        
+        generated_content = "".join(parts).strip()
+        self.store_generation(cache_key, user_data, generated_content, tokens_used)
+        
+        yield {
+            "done": True,
+            "success": True,
+            "content": generated_content,
+            "tokens_used": tokens_used,
+            "cached": False,
+            "retries": retries
+        }
+
 
 # Test function
 def test_ai_helper():
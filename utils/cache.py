@@ -0,0 +1,203 @@
+# Response cache for AI generations - avoids paying for the same Groq call twice
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.config import get_setting
+
+
+# Default location of the on-disk cache (can be overridden with PORTFOLIO_CACHE_PATH)
+DEFAULT_CACHE_PATH = os.path.join(".cache", "portfolio_cache.sqlite3")
+
+
+# Separators people use between skills: commas, semicolons, pipes, new
+# lines, bullets and " - ". Slashes stay, they are part of names like CI/CD.
+SKILL_SEPARATORS = re.compile(r"[,;|\n\r\u2022\u00b7]|\s-\s")
+
+# Free-text fields whose case and trailing punctuation don't change the answer
+# (the name keeps its case - it is copied into the generated text)
+CASE_INSENSITIVE_FIELDS = ("role", "experience")
+
+
+# Function to turn a skills field into canonical tokens: split on any
+# separator, lower-cased, de-duplicated and sorted
+# "Python,  SQL; python" and "sql | Python" both give ["python", "sql"]
+def canonical_skills(skills):
+    if isinstance(skills, (list, tuple)):
+        skills = ",".join(str(skill) for skill in skills)
+    tokens = {" ".join(token.split()).casefold() for token in SKILL_SEPARATORS.split(str(skills))}
+    tokens.discard("")
+    return sorted(tokens)
+
+
+# Function to normalize user data so cosmetic differences don't change the key
+def normalize_user_data(user_data):
+    normalized = {}
+    for key, value in (user_data or {}).items():
+        if key == "skills" and value is not None:
+            value = ", ".join(canonical_skills(value))
+        elif isinstance(value, str):
+            value = " ".join(value.split())
+            if key in CASE_INSENSITIVE_FIELDS:
+                value = value.strip(" .,;").casefold()
+        normalized[key] = value
+    return normalized
+
+
+# Function to build a content-addressed cache key for a generation request
+def make_cache_key(user_data, model, prompt_version, **params):
+    payload = {
+        "user_data": normalize_user_data(user_data),
+        "model": model,
+        "prompt_version": prompt_version,
+        "params": params,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# This class keeps recent results in memory and everything else in SQLite
+class ResponseCache:
+
+    # Constructor to set up both cache tiers
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_memory_items=256,
+                 max_disk_items=5000, ttl_seconds=7 * 24 * 3600):
+        self.path = path
+        self.max_memory_items = max_memory_items
+        self.max_disk_items = max_disk_items
+        self.ttl_seconds = ttl_seconds
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0}
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    # This method looks a key up in memory first, then on disk
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if self._is_fresh(created, now):
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    self.stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    raw_value, created = row
+                    if self._is_fresh(created, now):
+                        self._db.execute(
+                            "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+                        )
+                        self._db.commit()
+                        value = json.loads(raw_value)
+                        self._remember(key, created, value)
+                        self.stats["hits"] += 1
+                        self.stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.stats["misses"] += 1
+            return None
+
+    # This method stores a value in both tiers
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created, accessed) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now),
+                )
+                self._evict_disk(now)
+                self._db.commit()
+            self.stats["writes"] += 1
+
+    # This method empties both tiers
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    # This method returns hit/miss counters plus the current tier sizes
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["memory_items"] = len(self._memory)
+            if self._db is not None:
+                stats["disk_items"] = self._db.execute(
+                    "SELECT COUNT(*) FROM responses"
+                ).fetchone()[0]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _is_fresh(self, created, now):
+        return not self.ttl_seconds or now - created < self.ttl_seconds
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self, now):
+        if self.ttl_seconds:
+            self._db.execute(
+                "DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,)
+            )
+        count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        overflow = count - self.max_disk_items
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed ASC LIMIT ?)",
+                (overflow,),
+            )
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+# Function to get the process-wide cache shared by every session
+def get_default_cache():
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache(
+                path=get_setting("PORTFOLIO_CACHE_PATH", DEFAULT_CACHE_PATH),
+                ttl_seconds=get_setting("PORTFOLIO_CACHE_TTL", 7 * 24 * 3600, int),
+                max_disk_items=get_setting("PORTFOLIO_CACHE_MAX_ITEMS", 5000, int),
+            )
+        return _default_cache
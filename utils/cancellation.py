@@ -0,0 +1,121 @@
+# Cancellation - every generation request carries a token that can be
+# cancelled when its result is no longer wanted (the user asked again, or
+# closed the tab), so the upstream stream is dropped instead of running to
+# completion against the tokens-per-minute quota
+
+import threading
+import time
+
+from utils.config import get_setting
+
+
+# This class is the cancellation token of one request. Code doing the work
+# checks is_cancelled() between steps; cancel() can be called from any thread.
+class CancelToken:
+
+    def __init__(self):
+        self.reason = None
+        self.released = False
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+
+    # This method cancels the request; returns False if it was already
+    # cancelled or has finished
+    def cancel(self, reason="cancelled"):
+        with self._lock:
+            if self.released or self._event.is_set():
+                return False
+            self.reason = reason
+            self._event.set()
+        return True
+
+    def is_cancelled(self):
+        return self._event.is_set()
+
+    # This method marks the request as finished; later cancels are no-ops
+    def release(self):
+        with self._lock:
+            self.released = True
+
+
+# This class cancels the tokens of requests whose browser session went away.
+# Each token is watched with an is_connected() callable; once it has returned
+# False for `grace_seconds` in a row (a page reload reconnects well within
+# that), the token is cancelled with reason "abandoned".
+class SessionWatchdog:
+
+    def __init__(self, grace_seconds=10.0, interval=1.0):
+        self.grace_seconds = grace_seconds
+        self.interval = interval
+        self._watched = {}  # token -> [is_connected, disconnected since]
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {"watched": 0, "abandoned": 0}
+
+    # This method watches a token until it is cancelled or released
+    def watch(self, token, is_connected):
+        with self._lock:
+            self._watched[token] = [is_connected, None]
+            self.stats["watched"] += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="portfolio-watchdog", daemon=True)
+                self._thread.start()
+
+    # This method checks every watched token once
+    def check(self, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            watched = list(self._watched.items())
+
+        abandoned = []
+        for token, entry in watched:
+            if token.released or token.is_cancelled():
+                abandoned.append((token, False))
+                continue
+            try:
+                connected = entry[0]()
+            except Exception:
+                connected = True
+            if connected:
+                entry[1] = None
+            elif entry[1] is None:
+                entry[1] = now
+            elif now - entry[1] >= self.grace_seconds:
+                abandoned.append((token, token.cancel("abandoned")))
+
+        with self._lock:
+            for token, cancelled in abandoned:
+                self._watched.pop(token, None)
+                if cancelled:
+                    self.stats["abandoned"] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["watching"] = len(self._watched)
+        return stats
+
+    # The thread exits once nothing is watched and is restarted by watch()
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.check()
+            with self._lock:
+                if not self._watched:
+                    self._thread = None
+                    return
+
+
+_default_watchdog = None
+_default_watchdog_lock = threading.Lock()
+
+
+# Function to get the process-wide watchdog (PORTFOLIO_ABANDON_GRACE_SECONDS)
+def get_default_session_watchdog():
+    global _default_watchdog
+    with _default_watchdog_lock:
+        if _default_watchdog is None:
+            _default_watchdog = SessionWatchdog(
+                grace_seconds=get_setting("PORTFOLIO_ABANDON_GRACE_SECONDS", 10.0, float)
+            )
+        return _default_watchdog
@@ -0,0 +1,142 @@
+# Shared Groq clients - one connection pool per process instead of one per click
+
+import asyncio
+import importlib.util
+import threading
+
+import httpx
+from groq import AsyncGroq, Groq
+
+from utils.config import get_setting
+
+
+# This class counts requests and newly opened connections for one pool
+class PoolStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections_opened = 0
+        self.http_versions = {}
+
+    # Called by httpx before every request - attaches the httpcore trace hook
+    def on_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self.trace
+
+    async def aon_request(self, request):
+        with self._lock:
+            self.requests += 1
+        request.extensions["trace"] = self.atrace
+
+    def on_response(self, response):
+        with self._lock:
+            version = response.http_version
+            self.http_versions[version] = self.http_versions.get(version, 0) + 1
+
+    async def aon_response(self, response):
+        self.on_response(response)
+
+    # httpcore reports "connection.connect_tcp.complete" only for new connections
+    def trace(self, event_name, info):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+
+    async def atrace(self, event_name, info):
+        self.trace(event_name, info)
+
+    def as_dict(self):
+        with self._lock:
+            reused = max(self.requests - self.connections_opened, 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.connections_opened,
+                "reuse_rate": reused / self.requests if self.requests else 0.0,
+                "http_versions": dict(self.http_versions),
+            }
+
+
+# Function to read pool settings from the environment
+def get_pool_settings():
+    http2_setting = get_setting("GROQ_HTTP2", "auto").lower()
+    http2_available = importlib.util.find_spec("h2") is not None
+    if http2_setting == "auto":
+        http2 = http2_available
+    else:
+        http2 = http2_setting in ("1", "true", "yes") and http2_available
+
+    return {
+        "max_connections": get_setting("GROQ_POOL_SIZE", 20, int),
+        "max_keepalive_connections": get_setting("GROQ_POOL_KEEPALIVE", 10, int),
+        "keepalive_expiry": get_setting("GROQ_KEEPALIVE_EXPIRY", 30.0, float),
+        "timeout": get_setting("GROQ_TIMEOUT", 60.0, float),
+        "connect_timeout": get_setting("GROQ_CONNECT_TIMEOUT", 5.0, float),
+        "http2": http2,
+    }
+
+
+def _build_http_options(settings):
+    limits = httpx.Limits(
+        max_connections=settings["max_connections"],
+        max_keepalive_connections=settings["max_keepalive_connections"],
+        keepalive_expiry=settings["keepalive_expiry"],
+    )
+    timeout = httpx.Timeout(settings["timeout"], connect=settings["connect_timeout"])
+    return {"limits": limits, "timeout": timeout, "http2": settings["http2"]}
+
+
+_clients = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+# Function to get the process-wide Groq client for an API key
+def get_client(api_key, base_url=None):
+    key = ("sync", api_key, base_url)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            stats = PoolStats()
+            http_client = httpx.Client(
+                event_hooks={"request": [stats.on_request], "response": [stats.on_response]},
+                **_build_http_options(get_pool_settings())
+            )
+            # Retries are handled by utils.rate_limiter, not the SDK
+            client = Groq(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+            _clients[key] = client
+            _stats[key] = stats
+        return client
+
+
+# Function to get the shared async Groq client for the running event loop
+# (async connections cannot be shared between event loops)
+def get_async_client(api_key, base_url=None):
+    loop = asyncio.get_running_loop()
+    key = ("async", api_key, base_url, id(loop))
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            stats = PoolStats()
+            http_client = httpx.AsyncClient(
+                event_hooks={"request": [stats.aon_request], "response": [stats.aon_response]},
+                **_build_http_options(get_pool_settings())
+            )
+            client = AsyncGroq(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+            _clients[key] = client
+            _stats[key] = stats
+        return client
+
+
+# Function to report connection reuse for every pool in the process
+def get_pool_stats():
+    with _lock:
+        items = list(_stats.items())
+    
+    pools = []
+    for key, stats in items:
+        pool = {"kind": key[0], "base_url": key[2] or get_setting("GROQ_BASE_URL", "default")}
+        pool.update(stats.as_dict())
+        pools.append(pool)
+    return pools
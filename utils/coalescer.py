@@ -0,0 +1,121 @@
+# Request coalescing - identical requests that are in flight at the same time
+# share one upstream call instead of each paying for their own
+
+import asyncio
+from contextlib import aclosing
+
+
+# This class replays the events of one running stream to any number of
+# readers. Once the last reader leaves before the end, the pump task is
+# cancelled and the source is closed, so nobody keeps paying for tokens
+# that no one will read.
+class _Broadcast:
+
+    def __init__(self):
+        self.events = []
+        self.done = False
+        self.subscribers = 0
+        self.task = None
+        self.cancelled = False
+        self._condition = asyncio.Condition()
+
+    async def pump(self, events):
+        try:
+            async for event in events:
+                async with self._condition:
+                    self.events.append(event)
+                    self._condition.notify_all()
+        except Exception as e:
+            async with self._condition:
+                self.events.append({"done": True, "success": False, "error": str(e)})
+        finally:
+            self.done = True
+            # Runs the source's own cleanup (closing the upstream stream) now
+            # rather than whenever it is garbage collected
+            aclose = getattr(events, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            async with self._condition:
+                self._condition.notify_all()
+
+    # Readers that join late start from the first event, so everyone gets
+    # the complete output
+    async def subscribe(self):
+        self.subscribers += 1
+        try:
+            index = 0
+            while True:
+                async with self._condition:
+                    while index >= len(self.events) and not self.done:
+                        await self._condition.wait()
+                    new_events = self.events[index:]
+                    index = len(self.events)
+                    finished = self.done
+                for event in new_events:
+                    yield event
+                if finished and index >= len(self.events):
+                    return
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self.task is not None:
+                self.cancelled = True
+                self.task.cancel()
+
+
+# This class keeps track of in-flight calls by key.
+# Must be used from a single event loop.
+class RequestCoalescer:
+
+    def __init__(self):
+        self._calls = {}
+        self._streams = {}
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    # This method awaits factory() unless a call with the same key is already
+    # running, in which case it waits for that one.
+    # Returns (result, shared) where shared is True for the followers.
+    async def run(self, key, factory):
+        task = self._calls.get(key)
+        shared = task is not None
+        if shared:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda _task: self._forget(self._calls, key, _task))
+            self.stats["calls"] += 1
+
+        # A caller that goes away (client disconnect) must not cancel the
+        # call for everyone else
+        return await asyncio.shield(task), shared
+
+    # This method is the streaming version of run: factory() must return an
+    # async iterator of events. Yields (event, shared) pairs. The upstream
+    # stream is cancelled once every reader has closed this generator.
+    async def stream(self, key, factory):
+        broadcast = self._streams.get(key)
+        # A cancelled stream is still shutting down; start a new one
+        if broadcast is not None and broadcast.cancelled:
+            broadcast = None
+        shared = broadcast is not None
+        if shared:
+            self.stats["coalesced"] += 1
+        else:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            broadcast.task = asyncio.ensure_future(broadcast.pump(factory()))
+            broadcast.task.add_done_callback(lambda _task: self._forget(self._streams, key, broadcast))
+            self.stats["calls"] += 1
+
+        # Closing this generator (the client went away) unsubscribes at once
+        async with aclosing(broadcast.subscribe()) as events:
+            async for event in events:
+                yield event, shared
+
+    def in_flight(self):
+        return len(self._calls) + len(self._streams)
+
+    @staticmethod
+    def _forget(registry, key, value):
+        if registry.get(key) is value:
+            del registry[key]
@@ -0,0 +1,33 @@
+# Settings from the environment and the .env file, loaded once per process
+
+import os
+import threading
+
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+# Function to load the .env file into the environment
+# Only the first call reads the file; variables that are already set win
+def load_env():
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if not _env_loaded:
+            # Imported here so nothing pays for dotenv until a setting is read
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _env_loaded = True
+
+
+# Function to read one setting, e.g. get_setting("GROQ_RPM", 30, int)
+# Unset or empty variables give the default
+def get_setting(name, default=None, cast=str):
+    load_env()
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    return cast(value)
@@ -0,0 +1,364 @@
+# Export pipeline for rendered portfolios - runs after get_template
+#
+#   minify_html        collapses whitespace, drops comments and minifies the
+#                      <style> blocks
+#   strip_unused_css   removes CSS rules whose selectors match nothing in the
+#                      rendered page (e.g. .skill-card when there are no skills)
+#   compress_variants  precompressed .gz (and .br when brotli is installed)
+#                      copies for static hosting
+#   write_export       writes the page plus its precompressed siblings
+#   size_report        bytes at every step, for one page or every template
+#
+# Bundle mode (many portfolios hosted together) moves each template's CSS
+# into one shared, content-hashed file that every page links to:
+#   AssetStore, write_bundle_page, write_index, zip_bundle
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+import zipfile
+from html.parser import HTMLParser
+
+from utils.portfolio_templates import escape_html, render_all
+
+
+# Elements whose surrounding whitespace never renders, so it can be dropped
+BLOCK_TAGS = frozenset({
+    "!doctype", "html", "head", "body", "title", "meta", "link", "style", "script",
+    "div", "p", "h1", "h2", "h3", "h4", "h5", "h6", "ul", "ol", "li", "dl", "dt", "dd",
+    "section", "header", "footer", "nav", "main", "article", "aside", "figure",
+    "table", "thead", "tbody", "tr", "td", "th", "form", "br", "hr",
+})
+
+# Tokens of an HTML document: comments, raw-text elements kept whole, and tags
+HTML_TOKEN = re.compile(
+    r"(<!--.*?-->"
+    r"|<style\b[^>]*>.*?</style\s*>"
+    r"|<(script|pre|textarea)\b.*?</\2\s*>"
+    r"|<[^>]*>)",
+    re.S | re.I,
+)
+STYLE_BLOCK = re.compile(r"(<style\b[^>]*>)(.*?)(</style\s*>)", re.S | re.I)
+TAG_NAME = re.compile(r"</?\s*(!?[a-zA-Z][\w-]*)")
+
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+CSS_STRING = re.compile(r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')""")
+CSS_PSEUDO = re.compile(r"::?[a-zA-Z-]+")
+CSS_COMBINATOR = re.compile(r"\s*[>+~]\s*|\s+")
+CSS_SIMPLE = re.compile(r"([.#]?)(-?[_a-zA-Z][\w-]*)|\*")
+CSS_ANIMATION = re.compile(r"animation(?:-name)?\s*:([^;}]*)")
+
+# Compression settings for the precompressed siblings (both at maximum:
+# pages are compressed once and downloaded many times)
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Shared assets live in this folder of a bundle
+ASSET_DIR = "assets"
+
+
+# Function to minify a stylesheet: comments, whitespace and the last
+# semicolon of each block go; quoted strings are left untouched
+def minify_css(css):
+    parts = CSS_STRING.split(CSS_COMMENT.sub("", css))
+    for index in range(0, len(parts), 2):
+        text = re.sub(r"\s+", " ", parts[index])
+        # "+" stays spaced: calc(1px + 2px) is invalid without the spaces
+        text = re.sub(r"\s*([{};,>])\s*", r"\1", text)
+        # Only the space after a colon is safe to drop: "a :hover" != "a:hover"
+        text = re.sub(r":\s+", ":", text)
+        text = text.replace(";}", "}")
+        parts[index] = text
+    return "".join(parts).strip()
+
+
+# This class collects the tag names, classes and ids used in a document
+class _SelectorIndex(HTMLParser):
+
+    def __init__(self, html):
+        super().__init__(convert_charrefs=True)
+        self.tags = {"html", "body", "*"}
+        self.classes = set()
+        self.ids = set()
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag.lower())
+        for name, value in attrs:
+            if name == "class" and value:
+                self.classes.update(value.split())
+            elif name == "id" and value:
+                self.ids.add(value)
+
+
+# Function to check whether a selector can match anything in the document.
+# Anything this simple matcher does not understand (attribute selectors,
+# :not(), :is(), ...) is treated as used, so stripping only ever errs on
+# the side of keeping a rule.
+def _selector_used(selector, index):
+    if "[" in selector or "(" in selector:
+        return True
+    for compound in CSS_COMBINATOR.split(CSS_PSEUDO.sub("", selector).strip()):
+        for match in CSS_SIMPLE.finditer(compound):
+            prefix, name = match.group(1), match.group(2)
+            if name is None:
+                continue
+            if prefix == "." and name not in index.classes:
+                return False
+            if prefix == "#" and name not in index.ids:
+                return False
+            if not prefix and name.lower() not in index.tags:
+                return False
+    return True
+
+
+# Function to split minified CSS into top-level (prelude, body) blocks
+# body is None for statements such as @import
+def _split_blocks(css):
+    blocks = []
+    position = 0
+    while position < len(css):
+        brace = css.find("{", position)
+        semicolon = css.find(";", position)
+        if brace == -1 or (semicolon != -1 and semicolon < brace):
+            end = len(css) if semicolon == -1 else semicolon + 1
+            statement = css[position:end].strip()
+            if statement:
+                blocks.append((statement, None))
+            position = end
+            continue
+
+        depth = 0
+        for end in range(brace, len(css)):
+            if css[end] == "{":
+                depth += 1
+            elif css[end] == "}":
+                depth -= 1
+                if depth == 0:
+                    break
+        blocks.append((css[position:brace].strip(), css[brace + 1:end]))
+        position = end + 1
+    return blocks
+
+
+def _strip_blocks(blocks, index):
+    kept = []
+    keyframes = []
+    for prelude, body in blocks:
+        if body is None:
+            kept.append(prelude)
+        elif prelude.startswith("@keyframes") or prelude.startswith("@-webkit-keyframes"):
+            # Decided once the animations still in use are known
+            keyframes.append((len(kept), prelude, body))
+            kept.append(None)
+        elif prelude.startswith(("@media", "@supports", "@layer")):
+            inner = _strip_blocks(_split_blocks(body), index)
+            if inner:
+                kept.append(f"{prelude}{{{inner}}}")
+        elif prelude.startswith("@"):
+            kept.append(f"{prelude}{{{body}}}")
+        else:
+            selectors = [selector for selector in prelude.split(",") if _selector_used(selector, index)]
+            if selectors:
+                kept.append(f"{','.join(selectors)}{{{body}}}")
+
+    css = "".join(block for block in kept if block)
+    animations = set()
+    for match in CSS_ANIMATION.finditer(css):
+        animations.update(re.split(r"[\s,]+", match.group(1).strip()))
+    for position, prelude, body in keyframes:
+        if prelude.split(None, 1)[-1] in animations:
+            kept[position] = f"{prelude}{{{body}}}"
+    return "".join(block for block in kept if block)
+
+
+# Function to drop the rules of a stylesheet that match nothing in `html`
+def strip_unused_css(css, html):
+    return _strip_blocks(_split_blocks(minify_css(css)), _SelectorIndex(html))
+
+
+# Function to minify a rendered page. Whitespace next to block-level tags is
+# removed and other runs collapse to one space, so inline text renders the
+# same; <pre>, <textarea> and <script> are kept as they are.
+def minify_html(html, strip_unused=True):
+    pieces = HTML_TOKEN.split(html)
+    # split() also returns the raw-text tag name group; every third item
+    tokens = [pieces[0]]
+    for position in range(1, len(pieces), 3):
+        tokens.append(pieces[position])
+        tokens.append(pieces[position + 2])
+
+    def tag_name(token):
+        match = TAG_NAME.match(token)
+        return match.group(1).lower() if match else ""
+
+    output = []
+    for position, token in enumerate(tokens):
+        if position % 2:
+            if token.startswith("<!--"):
+                if token.startswith("<!--[if"):
+                    output.append(token)
+                continue
+            output.append(token)
+            continue
+        if not token:
+            continue
+
+        text = re.sub(r"\s+", " ", token)
+        previous_tag = tag_name(tokens[position - 1]) if position else "html"
+        next_tag = tag_name(tokens[position + 1]) if position + 1 < len(tokens) else "html"
+        if previous_tag in BLOCK_TAGS:
+            text = text.lstrip()
+        if next_tag in BLOCK_TAGS:
+            text = text.rstrip()
+        if text:
+            output.append(text)
+
+    minified = "".join(output)
+
+    def minify_style(match):
+        css = strip_unused_css(match.group(2), minified) if strip_unused else minify_css(match.group(2))
+        return match.group(1) + css + match.group(3)
+
+    return STYLE_BLOCK.sub(minify_style, minified)
+
+
+# Function to compress a page for static hosting
+# Returns {".gz": bytes} plus ".br" when the brotli package is installed
+def compress_variants(content):
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    # mtime=0 keeps the .gz byte-identical for identical pages (cache friendly)
+    variants = {".gz": gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)}
+    try:
+        import brotli
+    except ImportError:
+        return variants
+    variants[".br"] = brotli.compress(content, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+    return variants
+
+
+# Function to write a page (minified unless minify=False) and, with
+# precompress=True, its .gz/.br siblings. Returns the bytes written per file.
+def write_export(path, html, minify=True, precompress=False):
+    content = (minify_html(html) if minify else html).encode("utf-8")
+    return _write_files(path, content, precompress)
+
+
+def _write_files(path, content, precompress):
+    files = {path: content}
+    if precompress:
+        for suffix, compressed in compress_variants(content).items():
+            files[path + suffix] = compressed
+
+    sizes = {}
+    for file_path, data in files.items():
+        with open(file_path, "wb") as f:
+            f.write(data)
+        sizes[file_path] = len(data)
+    return sizes
+
+
+# This class stores shared assets of a bundle under content-hashed names
+# (e.g. assets/modern_gradient.3f2a9c01de.css). Every page of a template has
+# the same CSS, so it is written once; the name changes whenever the CSS
+# does, so hosts can serve it with a far-future cache lifetime.
+class AssetStore:
+
+    def __init__(self, directory, precompress=False):
+        self.directory = directory
+        self.precompress = precompress
+        self.assets = {}
+        self._lock = threading.Lock()
+
+    # This method stores a stylesheet and returns its href from the bundle root
+    def add_css(self, css, name="style"):
+        content = minify_css(css).encode("utf-8")
+        href = f"{ASSET_DIR}/{name}.{hashlib.sha256(content).hexdigest()[:10]}.css"
+        with self._lock:
+            if href not in self.assets:
+                path = os.path.join(self.directory, *href.split("/"))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Same name means same content, e.g. from a resumed batch
+                if not os.path.exists(path):
+                    _write_files(path, content, self.precompress)
+                self.assets[href] = len(content)
+        return href
+
+
+# Function to replace a page's <style> blocks with links to shared assets
+def link_shared_css(html, assets, name="style"):
+    def replace(match):
+        return f'<link rel="stylesheet" href="{assets.add_css(match.group(2), name)}">'
+
+    return STYLE_BLOCK.sub(replace, html)
+
+
+# Function to write one bundle page (at the bundle root, next to the assets
+# folder). The CSS is not stripped per page - that would give every page
+# its own stylesheet and defeat the sharing.
+def write_bundle_page(path, html, assets, name="style", precompress=False):
+    content = minify_html(link_shared_css(html, assets, name)).encode("utf-8")
+    return _write_files(path, content, precompress)
+
+
+# Function to write index.html linking every page of a bundle
+#   pages: (href, label) pairs
+def write_index(directory, pages, title="Portfolios", precompress=False):
+    items = "".join(
+        f'<li><a href="{escape_html(href)}">{escape_html(label)}</a></li>'
+        for href, label in sorted(pages, key=lambda page: page[1].lower())
+    )
+    html = (
+        "<!DOCTYPE html>"
+        '<html lang="en"><head><meta charset="UTF-8">'
+        '<meta name="viewport" content="width=device-width, initial-scale=1.0">'
+        f"<title>{escape_html(title)}</title>"
+        "<style>body{font-family:system-ui,sans-serif;max-width:800px;margin:40px auto;padding:0 20px}"
+        "li{padding:6px 0}</style></head>"
+        f"<body><h1>{escape_html(title)}</h1><p>{len(pages)} portfolios</p><ul>{items}</ul></body></html>"
+    )
+    path = os.path.join(directory, "index.html")
+    _write_files(path, html.encode("utf-8"), precompress)
+    return path
+
+
+# Function to pack a bundle directory into a zip file. Precompressed
+# siblings are stored as they are; everything else is deflated.
+def zip_bundle(directory, zip_path, exclude=()):
+    zip_path = os.path.abspath(zip_path)
+    excluded = {os.path.abspath(os.path.join(directory, name)) for name in exclude}
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as bundle:
+        for root, _dirs, files in os.walk(directory):
+            for file_name in sorted(files):
+                path = os.path.join(root, file_name)
+                if os.path.abspath(path) == zip_path or os.path.abspath(path) in excluded:
+                    continue
+                compression = zipfile.ZIP_STORED if file_name.endswith((".gz", ".br")) else zipfile.ZIP_DEFLATED
+                bundle.write(path, os.path.relpath(path, directory), compress_type=compression)
+    return zip_path
+
+
+# Function to measure one page at every export step
+def size_report(html):
+    raw = html.encode("utf-8")
+    minified = minify_html(html, strip_unused=False).encode("utf-8")
+    stripped = minify_html(html).encode("utf-8")
+    report = {
+        "raw_bytes": len(raw),
+        "minified_bytes": len(minified),
+        "css_stripped_bytes": len(stripped),
+    }
+    # What a CDN compressing the raw page on the fly would send
+    report["raw_gz_bytes"] = len(gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0))
+    for suffix, compressed in compress_variants(stripped).items():
+        report[f"{suffix[1:]}_bytes"] = len(compressed)
+    return report
+
+
+# Function to build a size report for one portfolio in every template
+def template_size_report(data):
+    return {template_name: size_report(html) for template_name, html in render_all(data).items()}
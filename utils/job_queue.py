@@ -0,0 +1,226 @@
+# Background jobs - long AI calls run on a shared worker pool instead of the
+# Streamlit script thread, so reruns don't cancel them and server threads
+# are freed while waiting on the API
+
+import itertools
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.cancellation import CancelToken
+from utils.config import get_setting
+from utils.metrics import get_default_tracer, PrometheusSink
+
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+# This class holds the state of one job. Workers publish partial progress
+# with update(); readers call snapshot() for a consistent copy.
+class Job:
+
+    def __init__(self, job_id, name):
+        self.job_id = job_id
+        self.name = name
+        self.status = QUEUED
+        self.progress = {}
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self._lock = threading.Lock()
+        self.cancel_token = CancelToken()
+
+    # This method replaces or adds progress values (called from the worker)
+    def update(self, **progress):
+        with self._lock:
+            self.progress.update(progress)
+
+    def is_finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    # This method asks a running job to stop; targets that support it check
+    # stop_requested() (or pass cancel_token on) and return early
+    def request_stop(self, reason="stopped"):
+        return self.cancel_token.cancel(reason)
+
+    def stop_requested(self):
+        return self.cancel_token.is_cancelled()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "job_id": self.job_id,
+                "name": self.name,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "result": self.result,
+                "error": self.error,
+                "submitted_at": self.submitted_at,
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+
+# This class runs jobs on a fixed pool of worker threads and keeps finished
+# jobs around for `keep_seconds` so a session can pick up the result later
+class JobQueue:
+
+    def __init__(self, max_workers=4, keep_seconds=900):
+        self.max_workers = max_workers
+        self.keep_seconds = keep_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="portfolio-job")
+        self._jobs = {}
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+        self._created = time.monotonic()
+        self._busy_seconds = 0.0
+        self._running_since = {}
+        self._recent = deque(maxlen=200)
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    # This method queues target(job, *args, **kwargs) and returns the job id
+    def submit(self, target, *args, name="job", **kwargs):
+        self._prune()
+        job = Job(f"{next(self._order)}-{uuid.uuid4().hex[:12]}", name)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self.stats["submitted"] += 1
+        job.future = self._executor.submit(self._run, job, target, args, kwargs)
+        return job.job_id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    # This method returns how many queued jobs are ahead of this one, plus one
+    # (0 once the job has started)
+    def position(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return 0
+            return 1 + sum(1 for other in self._jobs.values()
+                           if other.status == QUEUED and other.submitted_at < job.submitted_at)
+
+    # This method cancels a job that has not started yet
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is None or job.future is None or not job.future.cancel():
+            return False
+        with self._lock:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            self.stats["cancelled"] += 1
+        job.cancel_token.release()
+        return True
+
+    # This method cancels a queued job or asks a running one to stop
+    def stop(self, job_id, reason="stopped"):
+        if self.cancel(job_id):
+            return True
+        job = self.get(job_id)
+        if job is None or job.is_finished():
+            return False
+        return job.request_stop(reason)
+
+    # This method drops a finished job, e.g. once its result has been
+    # collected, instead of keeping it for keep_seconds
+    def discard(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.is_finished():
+                del self._jobs[job_id]
+
+    # This method returns queue depth, busy workers and utilisation
+    def get_stats(self):
+        now = time.monotonic()
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            running = len(self._running_since)
+            busy = self._busy_seconds + sum(now - started for started in self._running_since.values())
+            recent = list(self._recent)
+            stats = dict(self.stats)
+
+        elapsed = max(now - self._created, 1e-9)
+        stats.update({
+            "queue_depth": queued,
+            "running": running,
+            "workers": self.max_workers,
+            "busy_workers_ratio": running / self.max_workers,
+            "utilisation": min(busy / (elapsed * self.max_workers), 1.0),
+        })
+        if recent:
+            stats["avg_wait_s"] = round(sum(wait for wait, _ in recent) / len(recent), 4)
+            stats["avg_run_s"] = round(sum(run for _, run in recent) / len(recent), 4)
+        return stats
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _run(self, job, target, args, kwargs):
+        started = time.monotonic()
+        with self._lock:
+            if job.status == CANCELLED:
+                return
+            # Stopped while queued, e.g. its session went away
+            if job.stop_requested():
+                job.status = CANCELLED
+                job.finished_at = time.time()
+                self.stats["cancelled"] += 1
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._running_since[job.job_id] = started
+
+        try:
+            result = target(job, *args, **kwargs)
+            status, error = DONE, None
+        except Exception as e:
+            result, status, error = None, FAILED, str(e)
+        job.cancel_token.release()
+
+        finished = time.monotonic()
+        with self._lock:
+            job.result = result
+            job.error = error
+            job.status = status
+            job.finished_at = time.time()
+            self._running_since.pop(job.job_id, None)
+            self._busy_seconds += finished - started
+            self._recent.append((job.started_at - job.submitted_at, finished - started))
+            self.stats["completed" if status == DONE else "failed"] += 1
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.is_finished() and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+# Function to get the process-wide job queue (PORTFOLIO_JOB_WORKERS threads)
+# Its queue depth and utilisation are exported when Prometheus metrics are on
+def get_default_job_queue():
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(max_workers=get_setting("PORTFOLIO_JOB_WORKERS", 4, int))
+            sink = get_default_tracer().get_sink(PrometheusSink)
+            if sink is not None:
+                sink.register_gauges("portfolio_job_queue", _default_queue.get_stats)
+        return _default_queue
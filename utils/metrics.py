@@ -0,0 +1,358 @@
+# Request tracing and metrics for the generation pipeline
+#
+# A RequestTrace follows one portfolio request through generation, parsing
+# and rendering. It records how long each stage took plus token counts,
+# cache status, retries and the template used. When finished, the trace is
+# handed to every configured sink:
+#
+#   memory      - keeps the last N traces (the app's debug panel reads these)
+#   log         - one JSON line per request (stderr or a file)
+#   prometheus  - counters and histograms in the Prometheus text format,
+#                 optionally served on their own port
+#   otel        - OpenTelemetry spans (needs opentelemetry-api installed)
+
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.config import get_setting
+
+
+logger = logging.getLogger(__name__)
+
+
+# This class collects the timings and attributes of one request
+class RequestTrace:
+
+    def __init__(self, name="generate_portfolio", **attributes):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = dict(attributes)
+        self.spans = []
+        self.marks = {}
+        self.started = time.perf_counter()
+        self.start_time = time.time()
+        self.duration = None
+
+    # This method times a block of code as a named stage
+    # The same stage can run more than once (e.g. several repairs); the
+    # durations are added up in the summary
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.spans.append((name, started - self.started, time.perf_counter() - started))
+
+    # This method records a point in time, e.g. when the first token arrived
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.perf_counter() - self.started
+
+    # This method sets attributes such as cache status or template
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    # This method adds to numeric attributes (tokens, retries)
+    def add(self, **amounts):
+        for key, amount in amounts.items():
+            self.attributes[key] = self.attributes.get(key, 0) + (amount or 0)
+
+    def get_stages(self):
+        stages = {}
+        for name, _offset, duration in self.spans:
+            stages[name] = stages.get(name, 0.0) + duration
+        return stages
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+        return self
+
+    def as_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": self.start_time,
+            "duration_s": round(self.duration if self.duration is not None
+                                else time.perf_counter() - self.started, 6),
+            "stages": {name: round(duration, 6) for name, duration in self.get_stages().items()},
+            "marks": {name: round(offset, 6) for name, offset in self.marks.items()},
+            "attributes": dict(self.attributes),
+        }
+
+
+# This class keeps the most recent traces in memory
+class MemorySink:
+
+    def __init__(self, max_items=50):
+        self._traces = deque(maxlen=max_items)
+        self._lock = threading.Lock()
+
+    def emit(self, trace):
+        with self._lock:
+            self._traces.append(trace.as_dict())
+
+    # Newest first
+    def recent(self, limit=None):
+        with self._lock:
+            traces = list(self._traces)
+        traces.reverse()
+        return traces[:limit] if limit else traces
+
+
+# This class writes each trace as one JSON line
+class JSONLogSink:
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, trace):
+        line = json.dumps(trace.as_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+            else:
+                sys.stderr.write(line + "\n")
+                sys.stderr.flush()
+
+
+# This class aggregates traces into Prometheus counters and histograms
+class PrometheusSink:
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._tokens = {}
+        self._retries = 0
+        self._tokens_saved = 0
+        self._stages = {}
+        self._gauges = []
+        self._server = None
+
+    def emit(self, trace):
+        attributes = trace.attributes
+        if attributes.get("cancelled"):
+            status = "cancelled"
+        else:
+            status = "ok" if attributes.get("success", True) else "error"
+        request_labels = (
+            ("status", status),
+            ("cache", str(attributes.get("cache", "none"))),
+            ("template", str(attributes.get("template", "none"))),
+        )
+        with self._lock:
+            self._requests[request_labels] = self._requests.get(request_labels, 0) + 1
+            for kind in ("prompt", "completion"):
+                self._tokens[kind] = self._tokens.get(kind, 0) + (attributes.get(f"{kind}_tokens") or 0)
+            self._retries += attributes.get("retries") or 0
+            self._tokens_saved += attributes.get("tokens_saved") or 0
+
+            stages = trace.get_stages()
+            stages["total"] = trace.duration or 0.0
+            for stage, duration in stages.items():
+                histogram = self._stages.setdefault(stage, {"buckets": [0] * len(self.BUCKETS), "sum": 0.0, "count": 0})
+                for index, bound in enumerate(self.BUCKETS):
+                    if duration <= bound:
+                        histogram["buckets"][index] += 1
+                histogram["sum"] += duration
+                histogram["count"] += 1
+
+    # This method adds gauges read at scrape time: get_values() returns a dict
+    # of numbers, exported as <prefix>_<key>
+    def register_gauges(self, prefix, get_values):
+        with self._lock:
+            self._gauges.append((prefix, get_values))
+
+    # This method returns all metrics in the Prometheus text exposition format
+    def render(self):
+        lines = []
+        with self._lock:
+            gauges = list(self._gauges)
+        for prefix, get_values in gauges:
+            try:
+                values = get_values()
+            except Exception:
+                logger.exception("Gauge source %s failed", prefix)
+                continue
+            for key, value in sorted(values.items()):
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {value}")
+
+        with self._lock:
+            lines.append("# HELP portfolio_requests_total Portfolio generation requests")
+            lines.append("# TYPE portfolio_requests_total counter")
+            for labels, count in sorted(self._requests.items()):
+                lines.append(f"portfolio_requests_total{{{_format_labels(labels)}}} {count}")
+
+            lines.append("# HELP portfolio_tokens_total Tokens used by generation requests")
+            lines.append("# TYPE portfolio_tokens_total counter")
+            for kind, count in sorted(self._tokens.items()):
+                lines.append(f'portfolio_tokens_total{{kind="{kind}"}} {count}')
+
+            lines.append("# HELP portfolio_retries_total Retried API calls")
+            lines.append("# TYPE portfolio_retries_total counter")
+            lines.append(f"portfolio_retries_total {self._retries}")
+
+            lines.append("# HELP portfolio_tokens_saved_total Estimated tokens not generated because a request was cancelled")
+            lines.append("# TYPE portfolio_tokens_saved_total counter")
+            lines.append(f"portfolio_tokens_saved_total {self._tokens_saved}")
+
+            lines.append("# HELP portfolio_stage_seconds Time spent in each pipeline stage")
+            lines.append("# TYPE portfolio_stage_seconds histogram")
+            for stage, histogram in sorted(self._stages.items()):
+                label = f'stage="{_escape_label(stage)}"'
+                for bound, count in zip(self.BUCKETS, histogram["buckets"]):
+                    lines.append(f'portfolio_stage_seconds_bucket{{{label},le="{bound}"}} {count}')
+                lines.append(f'portfolio_stage_seconds_bucket{{{label},le="+Inf"}} {histogram["count"]}')
+                lines.append(f"portfolio_stage_seconds_sum{{{label}}} {histogram['sum']:.6f}")
+                lines.append(f"portfolio_stage_seconds_count{{{label}}} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    # This method serves render() at http://host:port/metrics on a background thread
+    def serve(self, port, host="0.0.0.0"):
+        if self._server is not None:
+            return self._server
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("content-type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("content-length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self._server
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels):
+    return ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels)
+
+
+# This class exports each trace as an OpenTelemetry span with one child span
+# per stage. The SDK/exporter setup is left to the deployment.
+class OpenTelemetrySink:
+
+    def __init__(self, tracer_name="ai-portfolio-generator"):
+        # Optional dependency - only needed when this sink is enabled
+        from opentelemetry import trace as otel_trace
+
+        self._otel_trace = otel_trace
+        self._tracer = otel_trace.get_tracer(tracer_name)
+
+    def emit(self, trace):
+        start_ns = int(trace.start_time * 1e9)
+        attributes = {key: value for key, value in trace.attributes.items()
+                      if isinstance(value, (str, bool, int, float))}
+
+        span = self._tracer.start_span(trace.name, start_time=start_ns, attributes=attributes)
+        context = self._otel_trace.set_span_in_context(span)
+        for name, offset, duration in trace.spans:
+            child_start = start_ns + int(offset * 1e9)
+            child = self._tracer.start_span(name, context=context, start_time=child_start)
+            child.end(end_time=child_start + int(duration * 1e9))
+        for name, offset in trace.marks.items():
+            span.add_event(name, timestamp=start_ns + int(offset * 1e9))
+        span.end(end_time=start_ns + int((trace.duration or 0.0) * 1e9))
+
+
+# This class starts traces and sends finished ones to every sink
+class Tracer:
+
+    def __init__(self, sinks=None):
+        self.sinks = list(sinks or [])
+
+    def start(self, name="generate_portfolio", **attributes):
+        return RequestTrace(name, **attributes)
+
+    # This method finishes a trace and exports it. A failing sink is logged
+    # and skipped so metrics can never break a generation.
+    def record(self, trace):
+        trace.finish()
+        for sink in self.sinks:
+            try:
+                sink.emit(trace)
+            except Exception:
+                logger.exception("Metrics sink %s failed", type(sink).__name__)
+        return trace
+
+    def get_sink(self, sink_type):
+        for sink in self.sinks:
+            if isinstance(sink, sink_type):
+                return sink
+        return None
+
+    # This method returns the last traces kept by the memory sink, newest first
+    def recent(self, limit=None):
+        sink = self.get_sink(MemorySink)
+        return sink.recent(limit) if sink else []
+
+
+# Function to build the sinks listed in PORTFOLIO_METRICS, e.g. "memory,log,prometheus"
+def build_sinks(names):
+    sinks = []
+    for name in (part.strip().lower() for part in names.split(",")):
+        if not name:
+            continue
+        if name == "memory":
+            sinks.append(MemorySink(get_setting("PORTFOLIO_TRACE_HISTORY", 50, int)))
+        elif name == "log":
+            sinks.append(JSONLogSink(get_setting("PORTFOLIO_METRICS_LOG")))
+        elif name == "prometheus":
+            sink = PrometheusSink()
+            port = get_setting("PORTFOLIO_METRICS_PORT")
+            if port:
+                try:
+                    sink.serve(int(port))
+                except OSError as e:
+                    logger.warning("Could not serve Prometheus metrics on port %s: %s", port, e)
+            sinks.append(sink)
+        elif name in ("otel", "opentelemetry"):
+            try:
+                sinks.append(OpenTelemetrySink())
+            except ImportError:
+                logger.warning("PORTFOLIO_METRICS includes otel but opentelemetry-api is not installed")
+        else:
+            logger.warning("Unknown metrics sink: %s", name)
+    return sinks
+
+
+_default_tracer = None
+_default_tracer_lock = threading.Lock()
+
+
+# Function to get the process-wide tracer (sinks come from PORTFOLIO_METRICS,
+# default "memory" so the debug panel always has data)
+def get_default_tracer():
+    global _default_tracer
+    with _default_tracer_lock:
+        if _default_tracer is None:
+            _default_tracer = Tracer(build_sinks(get_setting("PORTFOLIO_METRICS", "memory")))
+        return _default_tracer
@@ -1,120 +1,154 @@
 # Portfolio HTML Templates - Designs users can choose from
+#
+# Each design is one f-string. The CSS is a module constant dropped in as a
+# single value and the skill rows are built with one join, so a render only
+# adds the dynamic pieces to the static text.
 
-# Function to generate HTML for Modern Gradient template
-def get_modern_template(data):
-    
-    html = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{data.get('name', 'Portfolio')} - Portfolio</title>
-    <style>
-        * {{
+from html import escape
+
+
+# Function to make a value safe to drop into HTML text or a double-quoted attribute
+def escape_html(value):
+    return escape(str(value), quote=False).replace('"', "&quot;")
+
+
+# Key that marks data prepare_data has already escaped, so passing it to a
+# template (or to prepare_data again) does not escape it a second time.
+# A key rather than a dict subclass: lookups on an exact dict are faster,
+# and the mark survives pickling and JSON round trips. Template data is
+# always built from fixed keys (build_portfolio_data), so input can't set it.
+PREPARED_KEY = "_prepared"
+
+
+# Function to escape every user/AI supplied value once so the result can be
+# rendered by any number of templates without repeating the work.
+# Callers rendering the same data more than once should keep the result.
+def prepare_data(data):
+    if PREPARED_KEY in data:
+        return data
+    prepared = {
+        key: escape_html(value)
+        for key, value in data.items()
+        if key != 'skills_description' and value is not None
+    }
+    skills = data.get('skills_description') or {}
+    if isinstance(skills, dict):
+        prepared['skills_description'] = {
+            escape_html(skill_name): escape_html(skill_desc)
+            for skill_name, skill_desc in skills.items()
+        }
+    else:
+        prepared['skills_description'] = {}
+    prepared[PREPARED_KEY] = True
+    return prepared
+
+
+# Modern Gradient template
+MODERN_CSS = """\
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             line-height: 1.6;
             color: #333;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             min-height: 100vh;
             padding: 20px;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1000px;
             margin: 0 auto;
             background: white;
             border-radius: 20px;
             box-shadow: 0 20px 60px rgba(0,0,0,0.3);
             overflow: hidden;
-        }}
+        }
         
-        .header {{
+        .header {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 60px 40px;
             text-align: center;
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             font-size: 3em;
             margin-bottom: 10px;
             animation: fadeInDown 1s;
-        }}
+        }
         
-        .header .headline {{
+        .header .headline {
             font-size: 1.3em;
             opacity: 0.95;
             font-weight: 300;
             animation: fadeInUp 1s;
-        }}
+        }
         
-        .content {{
+        .content {
             padding: 40px;
-        }}
+        }
         
-        .section {{
+        .section {
             margin-bottom: 40px;
-        }}
+        }
         
-        .section h2 {{
+        .section h2 {
             color: #667eea;
             font-size: 2em;
             margin-bottom: 20px;
             border-bottom: 3px solid #667eea;
             padding-bottom: 10px;
-        }}
+        }
         
-        .bio {{
+        .bio {
             font-size: 1.2em;
             color: #555;
             line-height: 1.8;
-        }}
+        }
         
-        .skills-grid {{
+        .skills-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
             gap: 20px;
             margin-top: 20px;
-        }}
+        }
         
-        .skill-card {{
+        .skill-card {
             background: linear-gradient(135deg, #f5f7fa 0%, #c3cfe2 100%);
             padding: 20px;
             border-radius: 10px;
             transition: transform 0.3s, box-shadow 0.3s;
-        }}
+        }
         
-        .skill-card:hover {{
+        .skill-card:hover {
             transform: translateY(-5px);
             box-shadow: 0 10px 20px rgba(0,0,0,0.1);
-        }}
+        }
         
-        .skill-card h3 {{
+        .skill-card h3 {
             color: #667eea;
             margin-bottom: 10px;
-        }}
+        }
         
-        .skill-card p {{
+        .skill-card p {
             color: #666;
             font-size: 0.95em;
-        }}
+        }
         
-        .contact {{
+        .contact {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
             padding: 40px;
             text-align: center;
             margin: 40px -40px -40px -40px;
-        }}
+        }
         
-        .contact a {{
+        .contact a {
             color: white;
             text-decoration: none;
             margin: 0 15px;
@@ -125,68 +159,83 @@ def get_modern_template(data):
             display: inline-block;
             margin-top: 20px;
             transition: all 0.3s;
-        }}
+        }
         
-        .contact a:hover {{
+        .contact a:hover {
             background: white;
             color: #667eea;
-        }}
+        }
         
-        @keyframes fadeInDown {{
-            from {{
+        @keyframes fadeInDown {
+            from {
                 opacity: 0;
                 transform: translateY(-20px);
-            }}
-            to {{
+            }
+            to {
                 opacity: 1;
                 transform: translateY(0);
-            }}
-        }}
+            }
+        }
         
-        @keyframes fadeInUp {{
-            from {{
+        @keyframes fadeInUp {
+            from {
                 opacity: 0;
                 transform: translateY(20px);
-            }}
-            to {{
+            }
+            to {
                 opacity: 1;
                 transform: translateY(0);
-            }}
-        }}
+            }
+        }
         
-        @media (max-width: 768px) {{
-            .header h1 {{
+        @media (max-width: 768px) {
+            .header h1 {
                 font-size: 2em;
-            }}
+            }
             
-            .skills-grid {{
+            .skills-grid {
                 grid-template-columns: 1fr;
-            }}
-        }}
-    </style>
+            }
+        }
+"""
+
+
+# Function to generate HTML for Modern Gradient template
+def get_modern_template(data):
+    # Data from prepare_data (render_all, the app) is used as it is
+    prepared = data if PREPARED_KEY in data else prepare_data(data)
+    return f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{prepared.get('name', 'Portfolio')} - Portfolio</title>
+    <style>
+{MODERN_CSS}    </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
-            <h1>{data.get('name', 'Your Name')}</h1>
-            <p class="headline">{data.get('headline', 'Your Professional Headline')}</p>
+            <h1>{prepared.get('name', 'Your Name')}</h1>
+            <p class="headline">{prepared.get('headline', 'Your Professional Headline')}</p>
         </div>
         
         <div class="content">
             <div class="section">
                 <h2>About Me</h2>
-                <p class="bio">{data.get('bio', 'Your professional bio will appear here...')}</p>
+                <p class="bio">{prepared.get('bio', 'Your professional bio will appear here...')}</p>
             </div>
             
             <div class="section">
                 <h2>About</h2>
-                <p>{data.get('about', 'Detailed about section will appear here...')}</p>
+                <p>{prepared.get('about', 'Detailed about section will appear here...')}</p>
             </div>
             
             <div class="section">
                 <h2>Skills & Expertise</h2>
                 <div class="skills-grid">
-                    {generate_skill_cards(data.get('skills_description', {}))}
+                    {generate_skill_cards(prepared['skills_description'])}
                 </div>
             </div>
         </div>
@@ -195,16 +244,15 @@ def get_modern_template(data):
             <h2>Let's Connect</h2>
             <p>Ready to bring your next project to life?</p>
             <div>
-                <a href="mailto:{data.get('email', 'your.email@example.com')}">Email Me</a>
-                <a href="{data.get('linkedin', '#')}">LinkedIn</a>
-                <a href="{data.get('github', '#')}">GitHub</a>
+                <a href="mailto:{prepared.get('email', 'your.email@example.com')}">Email Me</a>
+                <a href="{prepared.get('linkedin', '#')}">LinkedIn</a>
+                <a href="{prepared.get('github', '#')}">GitHub</a>
             </div>
         </div>
     </div>
 </body>
 </html>
 """
-    return html
 
 
 # Function to generate HTML for skill cards
@@ -212,158 +260,156 @@ def generate_skill_cards(skills_dict):
     if not skills_dict:
         return "<p>No skills data available</p>"
     
-    cards_html = ""
-    for skill_name, skill_desc in skills_dict.items():
-        cards_html += f"""
+    return "".join([f"""
         <div class="skill-card">
             <h3>{skill_name}</h3>
             <p>{skill_desc}</p>
         </div>
-        """
-    
-    return cards_html
+        """ for skill_name, skill_desc in skills_dict.items()])
 
 
-# Function to generate HTML for minimalist template
-def get_minimalist_template(data):
-    html = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{data.get('name', 'Portfolio')} - Portfolio</title>
-    <style>
-        * {{
+# Minimalist B&W template
+MINIMALIST_CSS = """\
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Courier New', monospace;
             line-height: 1.8;
             color: #000;
             background: #fff;
             padding: 60px 20px;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 800px;
             margin: 0 auto;
-        }}
+        }
         
-        .header {{
+        .header {
             border-bottom: 3px solid #000;
             padding-bottom: 30px;
             margin-bottom: 40px;
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             font-size: 3.5em;
             font-weight: bold;
             margin-bottom: 10px;
-        }}
+        }
         
-        .header .headline {{
+        .header .headline {
             font-size: 1.2em;
             color: #666;
-        }}
+        }
         
-        .section {{
+        .section {
             margin-bottom: 50px;
-        }}
+        }
         
-        .section h2 {{
+        .section h2 {
             font-size: 1.5em;
             margin-bottom: 20px;
             text-transform: uppercase;
             letter-spacing: 2px;
-        }}
+        }
         
-        .skills-list {{
+        .skills-list {
             list-style: none;
-        }}
+        }
         
-        .skills-list li {{
+        .skills-list li {
             padding: 15px 0;
             border-bottom: 1px solid #ddd;
-        }}
+        }
         
-        .skills-list strong {{
+        .skills-list strong {
             display: block;
             margin-bottom: 5px;
-        }}
+        }
         
-        .contact {{
+        .contact {
             border-top: 3px solid #000;
             padding-top: 30px;
             margin-top: 60px;
-        }}
+        }
         
-        .contact a {{
+        .contact a {
             color: #000;
             text-decoration: none;
             margin-right: 20px;
             border-bottom: 2px solid #000;
-        }}
+        }
         
-        .contact a:hover {{
+        .contact a:hover {
             border-bottom: 2px solid #666;
-        }}
-    </style>
+        }
+"""
+
+
+# Function to generate HTML for minimalist template
+def get_minimalist_template(data):
+    # Data from prepare_data (render_all, the app) is used as it is
+    prepared = data if PREPARED_KEY in data else prepare_data(data)
+    return f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{prepared.get('name', 'Portfolio')} - Portfolio</title>
+    <style>
+{MINIMALIST_CSS}    </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
-            <h1>{data.get('name', 'Your Name')}</h1>
-            <p class="headline">{data.get('headline', 'Your Professional Headline')}</p>
+            <h1>{prepared.get('name', 'Your Name')}</h1>
+            <p class="headline">{prepared.get('headline', 'Your Professional Headline')}</p>
         </div>
         
         <div class="section">
             <h2>Bio</h2>
-            <p>{data.get('bio', 'Your professional bio will appear here...')}</p>
+            <p>{prepared.get('bio', 'Your professional bio will appear here...')}</p>
         </div>
         
         <div class="section">
             <h2>About</h2>
-            <p>{data.get('about', 'Detailed about section will appear here...')}</p>
+            <p>{prepared.get('about', 'Detailed about section will appear here...')}</p>
         </div>
         
         <div class="section">
             <h2>Skills</h2>
             <ul class="skills-list">
-                {generate_skill_list(data.get('skills_description', {}))}
+                {generate_skill_list(prepared['skills_description'])}
             </ul>
         </div>
         
         <div class="contact">
             <h2>Contact</h2>
-            <a href="mailto:{data.get('email', 'your.email@example.com')}">Email</a>
-            <a href="{data.get('linkedin', '#')}">LinkedIn</a>
-            <a href="{data.get('github', '#')}">GitHub</a>
+            <a href="mailto:{prepared.get('email', 'your.email@example.com')}">Email</a>
+            <a href="{prepared.get('linkedin', '#')}">LinkedIn</a>
+            <a href="{prepared.get('github', '#')}">GitHub</a>
         </div>
     </div>
 </body>
 </html>
 """
-    return html
 
 
 def generate_skill_list(skills_dict):
     if not skills_dict:
         return "<li>No skills data available</li>"
     
-    list_html = ""
-    for skill_name, skill_desc in skills_dict.items():
-        list_html += f"""
+    return "".join([f"""
         <li>
             <strong>{skill_name}</strong>
             {skill_desc}
         </li>
-        """
-    
-    return list_html
+        """ for skill_name, skill_desc in skills_dict.items()])
 
 
 # Dictionary to store all available templates
@@ -372,7 +418,24 @@ TEMPLATES = {
     "Minimalist B&W": get_minimalist_template,
 }
 
+# Templates that escape their data themselves and accept prepared data, so
+# render_all escapes once for all of them
+PREPARED_TEMPLATES = {get_modern_template, get_minimalist_template}
+
 # Function to get a specific template
 def get_template(template_name, data):
     template_func = TEMPLATES.get(template_name, get_modern_template)
-    return template_func(data)
\ No newline at end of file
+    return template_func(data)
+
+
+# Function to render one portfolio into every available template in a single pass
+def render_all(data):
+    prepared = prepare_data(data)
+    rendered = {}
+    for template_name, template_func in TEMPLATES.items():
+        if template_func in PREPARED_TEMPLATES:
+            rendered[template_name] = template_func(prepared)
+        else:
+            # Custom templates added to TEMPLATES get the raw data as before
+            rendered[template_name] = template_func(data)
+    return rendered
\ No newline at end of file
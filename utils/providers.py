@@ -0,0 +1,310 @@
+# Chat completion backends - one interface for every place a model can run
+#
+#   GroqBackend              the Groq API through the pooled Groq SDK client
+#   OpenAICompatibleBackend  any server speaking the OpenAI chat completions
+#                            protocol: OpenAI, vLLM, a local Ollama or
+#                            llama.cpp server (`kind` "openai", "ollama",
+#                            "llamacpp" only change the defaults)
+#
+# Every backend has create(messages, **params) and acreate(...), returning
+# (response, retries) like AIPortfolioGenerator.create_completion. Responses
+# look like the SDK's: response.choices[0].message.content, response.usage,
+# and for stream=True an iterator of chunks with choices[0].delta.content.
+#
+# PORTFOLIO_BACKENDS lists the backends as JSON, e.g.
+#   [{"kind": "groq", "model": "llama-3.3-70b-versatile"},
+#    {"kind": "ollama", "model": "llama3.1:8b"}]
+# Optional keys: name, base_url, api_key_env, rpm, tpm
+
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+
+import httpx
+
+from utils.config import get_setting
+from utils.rate_limiter import (acall_with_retry, call_with_retry, estimate_tokens,
+                                get_default_limiter, RateLimiter)
+
+
+# Defaults per backend kind: (base_url, environment variable holding the API key)
+BACKEND_DEFAULTS = {
+    "groq": (None, "GROQ_API_KEY"),
+    "openai": ("https://api.openai.com/v1", "OPENAI_API_KEY"),
+    "ollama": ("http://127.0.0.1:11434/v1", None),
+    "llamacpp": ("http://127.0.0.1:8080/v1", None),
+}
+
+EMPTY_USAGE = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+
+
+# This exception is raised for an error status from an OpenAI-compatible
+# server. It has the status_code/response attributes utils.rate_limiter
+# reads, so 429s and 5xx are retried like Groq's.
+class ProviderError(Exception):
+
+    def __init__(self, status_code, message, response=None):
+        super().__init__(f"HTTP {status_code}: {message}")
+        self.status_code = status_code
+        self.response = response
+
+
+# Function to turn a decoded JSON payload into attribute-style objects
+def _as_namespace(payload):
+    return json.loads(json.dumps(payload), object_hook=lambda fields: SimpleNamespace(**fields))
+
+
+def _parse_completion(payload):
+    payload.setdefault("usage", None)
+    payload["usage"] = payload["usage"] or dict(EMPTY_USAGE)
+    return _as_namespace(payload)
+
+
+def _parse_event_line(line):
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    payload = json.loads(data)
+    # The first chunk often carries only the role; the SDK's delta.content is None then
+    for choice in payload.get("choices") or []:
+        choice.setdefault("delta", {}).setdefault("content", None)
+    payload.setdefault("usage", None)
+    return _as_namespace(payload)
+
+
+def _raise_for_status(response, body):
+    if response.status_code >= 400:
+        try:
+            message = json.loads(body)["error"]["message"]
+        except (ValueError, KeyError, TypeError):
+            message = body[:200] if isinstance(body, str) else body[:200].decode("utf-8", "replace")
+        raise ProviderError(response.status_code, message, response)
+
+
+# This class is the raw response handed to call_with_retry: headers are read
+# for rate limits, parse() gives the completion (or the chunk iterator)
+class _RawResponse:
+
+    def __init__(self, headers, parse):
+        self.headers = headers
+        self.parse = parse
+
+
+# This class iterates the chunks of a streamed response and closes it at the
+# end. close() drops the connection early, like the Groq SDK's Stream.close().
+class _ChunkStream:
+
+    def __init__(self, response):
+        self._response = response
+
+    def __iter__(self):
+        try:
+            for line in self._response.iter_lines():
+                chunk = _parse_event_line(line)
+                if chunk is not None:
+                    yield chunk
+        finally:
+            self._response.close()
+
+    def close(self):
+        self._response.close()
+
+
+class _AsyncChunkStream:
+
+    def __init__(self, response):
+        self._response = response
+
+    async def __aiter__(self):
+        try:
+            async for line in self._response.aiter_lines():
+                chunk = _parse_event_line(line)
+                if chunk is not None:
+                    yield chunk
+        finally:
+            await self._response.aclose()
+
+    # Awaitable, like the Groq SDK's AsyncStream.close()
+    async def close(self):
+        await self._response.aclose()
+
+    async def aclose(self):
+        await self.close()
+
+
+# This class sends requests to the Groq API (same path as before backends existed)
+class GroqBackend:
+
+    kind = "groq"
+
+    def __init__(self, model, api_key=None, base_url=None, limiter=None, name=None):
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url
+        self.limiter = limiter if limiter is not None else get_default_limiter()
+        self.name = name or f"groq:{model}"
+
+    def create(self, messages, **params):
+        from utils.client_pool import get_client
+
+        client = get_client(self.api_key, self.base_url)
+        params["model"] = self.model
+        estimated = estimate_tokens(messages, params.get("max_tokens", 0))
+
+        raw_response, retries = call_with_retry(
+            lambda: client.chat.completions.with_raw_response.create(messages=messages, **params),
+            self.limiter,
+            estimated
+        )
+        response = raw_response.parse()
+
+        # Streamed responses report usage at the end, so the caller records it
+        if not params.get("stream"):
+            self.limiter.record_usage(estimated, response.usage.total_tokens)
+        return response, retries
+
+    async def acreate(self, messages, **params):
+        from utils.client_pool import get_async_client
+
+        client = get_async_client(self.api_key, self.base_url)
+        params["model"] = self.model
+        estimated = estimate_tokens(messages, params.get("max_tokens", 0))
+
+        raw_response, retries = await acall_with_retry(
+            lambda: client.chat.completions.with_raw_response.create(messages=messages, **params),
+            self.limiter,
+            estimated
+        )
+        response = await raw_response.parse()
+
+        if not params.get("stream"):
+            self.limiter.record_usage(estimated, response.usage.total_tokens)
+        return response, retries
+
+    def record_usage(self, messages, max_tokens, total_tokens):
+        self.limiter.record_usage(estimate_tokens(messages, max_tokens), total_tokens)
+
+
+# This class sends requests to an OpenAI-compatible /chat/completions endpoint
+class OpenAICompatibleBackend:
+
+    def __init__(self, model, base_url, api_key=None, limiter=None, name=None, kind="openai", timeout=60.0):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.kind = kind
+        self.name = name or f"{kind}:{model}"
+        # Local servers have no quota; give rpm/tpm in the spec for hosted ones
+        self.limiter = limiter if limiter is not None else RateLimiter(10 ** 6, 10 ** 9)
+        self.timeout = timeout
+
+        self._client = None
+        self._async_clients = {}
+        self._lock = threading.Lock()
+
+    def _request_body(self, messages, params):
+        body = dict(params, model=self.model, messages=messages)
+        if body.get("stream"):
+            # Ask for usage on the last chunk, as Groq's x_groq.usage does
+            body.setdefault("stream_options", {"include_usage": True})
+        return body
+
+    def _headers(self):
+        return {"authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def _get_client(self):
+        with self._lock:
+            if self._client is None:
+                self._client = httpx.Client(base_url=self.base_url, timeout=self.timeout, headers=self._headers())
+            return self._client
+
+    # Async connections can't be shared between event loops
+    def _get_async_client(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(id(loop))
+            if client is None:
+                client = httpx.AsyncClient(base_url=self.base_url, timeout=self.timeout, headers=self._headers())
+                self._async_clients[id(loop)] = client
+            return client
+
+    def _send(self, body):
+        client = self._get_client()
+        if body.get("stream"):
+            response = client.send(client.build_request("POST", "/chat/completions", json=body), stream=True)
+            if response.status_code >= 400:
+                _raise_for_status(response, response.read())
+            return _RawResponse(response.headers, lambda: _ChunkStream(response))
+
+        response = client.post("/chat/completions", json=body)
+        _raise_for_status(response, response.text)
+        return _RawResponse(response.headers, lambda: _parse_completion(response.json()))
+
+    async def _asend(self, body):
+        client = self._get_async_client()
+        if body.get("stream"):
+            response = await client.send(client.build_request("POST", "/chat/completions", json=body), stream=True)
+            if response.status_code >= 400:
+                _raise_for_status(response, await response.aread())
+            return _RawResponse(response.headers, lambda: _AsyncChunkStream(response))
+
+        response = await client.post("/chat/completions", json=body)
+        _raise_for_status(response, response.text)
+        return _RawResponse(response.headers, lambda: _parse_completion(response.json()))
+
+    def create(self, messages, **params):
+        body = self._request_body(messages, params)
+        estimated = estimate_tokens(messages, params.get("max_tokens", 0))
+        raw_response, retries = call_with_retry(lambda: self._send(body), self.limiter, estimated)
+        response = raw_response.parse()
+        if not params.get("stream"):
+            self.limiter.record_usage(estimated, response.usage.total_tokens)
+        return response, retries
+
+    async def acreate(self, messages, **params):
+        body = self._request_body(messages, params)
+        estimated = estimate_tokens(messages, params.get("max_tokens", 0))
+        raw_response, retries = await acall_with_retry(lambda: self._asend(body), self.limiter, estimated)
+        response = raw_response.parse()
+        if not params.get("stream"):
+            self.limiter.record_usage(estimated, response.usage.total_tokens)
+        return response, retries
+
+    def record_usage(self, messages, max_tokens, total_tokens):
+        self.limiter.record_usage(estimate_tokens(messages, max_tokens), total_tokens)
+
+
+# Function to build a backend from one PORTFOLIO_BACKENDS entry
+def build_backend(spec):
+    kind = spec.get("kind", "groq")
+    if kind not in BACKEND_DEFAULTS:
+        raise ValueError(f"Unknown backend kind {kind!r} (expected one of {', '.join(BACKEND_DEFAULTS)})")
+    if not spec.get("model"):
+        raise ValueError(f"Backend {spec.get('name') or kind!r} needs a model")
+
+    default_url, default_key_env = BACKEND_DEFAULTS[kind]
+    key_env = spec.get("api_key_env", default_key_env)
+    api_key = get_setting(key_env) if key_env else None
+    limiter = None
+    if spec.get("rpm") or spec.get("tpm"):
+        limiter = RateLimiter(int(spec.get("rpm") or 10 ** 6), int(spec.get("tpm") or 10 ** 9))
+
+    if kind == "groq":
+        if not api_key:
+            raise ValueError(f"{key_env} not found in .env file!")
+        base_url = spec.get("base_url") or get_setting("GROQ_BASE_URL")
+        return GroqBackend(spec["model"], api_key, base_url, limiter, spec.get("name"))
+    return OpenAICompatibleBackend(
+        spec["model"], spec.get("base_url") or default_url, api_key, limiter, spec.get("name"), kind
+    )
+
+
+# Function to build every backend listed in a PORTFOLIO_BACKENDS value
+def load_backends(value):
+    specs = json.loads(value)
+    if isinstance(specs, dict):
+        specs = [specs]
+    return [build_backend(spec) for spec in specs]
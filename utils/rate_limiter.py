@@ -0,0 +1,301 @@
+# Rate limiting and retries for Groq calls - shared by every session in the process
+
+import asyncio
+import itertools
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from utils.config import get_setting
+
+
+# Status codes worth retrying: rate limited or a transient server problem
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+# Function to parse Groq's duration strings ("2m59.56s", "7.66s", "120ms") into seconds
+def parse_duration(value):
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    total = 0.0
+    matched = False
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        matched = True
+        amount = float(amount)
+        if unit == "ms":
+            total += amount / 1000
+        elif unit == "h":
+            total += amount * 3600
+        elif unit == "m":
+            total += amount * 60
+        else:
+            total += amount
+    return total if matched else None
+
+
+# This class enforces requests-per-minute and tokens-per-minute budgets.
+# Both budgets are token buckets that refill continuously; callers are served
+# strictly in arrival order so a big request can't be starved by small ones.
+class RateLimiter:
+
+    # Constructor to set up both buckets (full at start)
+    def __init__(self, requests_per_minute=30, tokens_per_minute=12000):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._tickets = itertools.count()
+
+        self.stats = {"acquired": 0, "waited_s": 0.0, "throttled": 0, "retries": 0}
+
+    # This method blocks until the caller may send a request of this size
+    def acquire(self, estimated_tokens):
+        ticket = self._enqueue()
+        started = time.monotonic()
+        try:
+            while True:
+                wait = self._try_acquire(ticket, estimated_tokens)
+                if wait <= 0:
+                    break
+                time.sleep(min(wait, 0.25))
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+        self._record_wait(started)
+
+    # This method is the asyncio version of acquire
+    async def acquire_async(self, estimated_tokens):
+        ticket = self._enqueue()
+        started = time.monotonic()
+        try:
+            while True:
+                wait = self._try_acquire(ticket, estimated_tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, 0.25))
+        except BaseException:
+            self._dequeue(ticket)
+            raise
+        self._record_wait(started)
+
+    # This method corrects the token budget once the real usage is known
+    def record_usage(self, estimated_tokens, actual_tokens):
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self._refill()
+            self._tokens -= actual_tokens - self._clamp_tokens(estimated_tokens)
+
+    # This method syncs the buckets with the x-ratelimit-* headers Groq returns
+    def update_from_headers(self, headers):
+        if not headers:
+            return
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        with self._lock:
+            self._refill()
+            if remaining_requests is not None:
+                try:
+                    self._requests = min(self._requests, float(remaining_requests))
+                except ValueError:
+                    pass
+            if remaining_tokens is not None:
+                try:
+                    self._tokens = min(self._tokens, float(remaining_tokens))
+                except ValueError:
+                    pass
+
+    # This method pauses every caller, e.g. after a 429 with Retry-After
+    def block_for(self, seconds):
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self.stats["throttled"] += 1
+
+    # This method returns counters plus the current bucket levels
+    def get_stats(self):
+        with self._lock:
+            self._refill()
+            stats = dict(self.stats)
+            stats["available_requests"] = round(self._requests, 2)
+            stats["available_tokens"] = round(self._tokens, 2)
+            stats["queued"] = len(self._queue)
+        return stats
+
+    def _enqueue(self):
+        ticket = next(self._tickets)
+        with self._lock:
+            self._queue.append(ticket)
+        return ticket
+
+    def _dequeue(self, ticket):
+        with self._lock:
+            if ticket in self._queue:
+                self._queue.remove(ticket)
+
+    def _record_wait(self, started):
+        with self._lock:
+            self.stats["acquired"] += 1
+            self.stats["waited_s"] += time.monotonic() - started
+
+    # Returns 0 when the request was admitted, otherwise seconds to wait
+    def _try_acquire(self, ticket, estimated_tokens):
+        tokens = self._clamp_tokens(estimated_tokens)
+        with self._lock:
+            self._refill()
+            now = time.monotonic()
+
+            if now < self._blocked_until:
+                return self._blocked_until - now
+            if self._queue[0] != ticket:
+                return 0.01
+
+            missing_requests = 1 - self._requests
+            missing_tokens = tokens - self._tokens
+            if missing_requests <= 0 and missing_tokens <= 0:
+                self._requests -= 1
+                self._tokens -= tokens
+                self._queue.popleft()
+                return 0
+
+            wait = 0.0
+            if missing_requests > 0:
+                wait = max(wait, missing_requests * 60.0 / self.requests_per_minute)
+            if missing_tokens > 0:
+                wait = max(wait, missing_tokens * 60.0 / self.tokens_per_minute)
+            return wait
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(
+            self.requests_per_minute,
+            self._requests + elapsed * self.requests_per_minute / 60.0
+        )
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + elapsed * self.tokens_per_minute / 60.0
+        )
+
+    # A single request larger than the whole budget would otherwise wait forever
+    def _clamp_tokens(self, estimated_tokens):
+        return min(max(estimated_tokens, 0), self.tokens_per_minute)
+
+
+# Function to decide whether an error is worth retrying
+def is_retryable(error):
+    # By the time an API error exists the SDK is loaded, so this import is free
+    from groq import APIConnectionError
+
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, APIConnectionError)
+
+
+# Function to read how long the server asked us to wait, if it said so
+def get_retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms is not None:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    for header in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        seconds = parse_duration(headers.get(header))
+        if seconds is not None:
+            return seconds
+    return None
+
+
+# Function to compute the delay before the next attempt (full jitter, capped)
+def get_backoff_delay(attempt, error, base_delay=1.0, max_delay=30.0):
+    delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+    retry_after = get_retry_after(error)
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, max_delay))
+    return delay
+
+
+# Function to run a raw Groq call under the limiter, retrying transient failures.
+# `func` must return a groq raw response (from `.with_raw_response`), so the
+# rate-limit headers can be read. Returns (raw_response, retries).
+def call_with_retry(func, limiter, estimated_tokens, max_retries=4, base_delay=1.0, max_delay=30.0):
+    attempt = 0
+    while True:
+        limiter.acquire(estimated_tokens)
+        try:
+            raw_response = func()
+            limiter.update_from_headers(raw_response.headers)
+            return raw_response, attempt
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = get_backoff_delay(attempt, e, base_delay, max_delay)
+            if getattr(e, "status_code", None) == 429:
+                limiter.block_for(delay)
+            limiter.stats["retries"] += 1
+            time.sleep(delay)
+            attempt += 1
+
+
+# Function that does the same as call_with_retry for async callers
+async def acall_with_retry(func, limiter, estimated_tokens, max_retries=4, base_delay=1.0, max_delay=30.0):
+    attempt = 0
+    while True:
+        await limiter.acquire_async(estimated_tokens)
+        try:
+            raw_response = await func()
+            limiter.update_from_headers(raw_response.headers)
+            return raw_response, attempt
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = get_backoff_delay(attempt, e, base_delay, max_delay)
+            if getattr(e, "status_code", None) == 429:
+                limiter.block_for(delay)
+            limiter.stats["retries"] += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+# Function to estimate the tokens a request will consume (prompt + completion budget)
+def estimate_tokens(messages, max_tokens):
+    prompt_chars = sum(len(message.get("content", "")) for message in messages)
+    return prompt_chars // 4 + max_tokens
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+# Function to get the process-wide limiter (limits come from GROQ_RPM / GROQ_TPM)
+def get_default_limiter():
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(
+                requests_per_minute=get_setting("GROQ_RPM", 30, int),
+                tokens_per_minute=get_setting("GROQ_TPM", 12000, int),
+            )
+        return _default_limiter
@@ -0,0 +1,296 @@
+# Structured-output parser - turns whatever the AI returned into portfolio fields
+#
+# The model is asked for pure JSON but sometimes wraps it in a markdown fence,
+# adds a sentence before it, leaves a trailing comma or gets cut off by
+# max_tokens. Instead of failing on any of these, the response is scanned once
+# from the first "{" with a forgiving parser that repairs common faults, and
+# the result is checked against the expected schema.
+
+import json
+
+
+# Fields the prompt asks for, in the order they are displayed
+EXPECTED_FIELDS = ("HEADLINE", "PROFESSIONAL_BIO", "ABOUT_SECTION", "SKILLS_DESCRIPTION")
+EXPECTED_SKILL_COUNT = 6
+
+_DECODER = json.JSONDecoder()
+_LITERALS = {"true": True, "false": False, "null": None,
+             "True": True, "False": False, "None": None}
+
+
+# This class is a forgiving recursive-descent JSON parser. It records every
+# repair it makes together with the top-level field it happened in.
+class _TolerantParser:
+
+    def __init__(self, text, start):
+        self.text = text
+        self.pos = start
+        self.length = len(text)
+        self.repairs = []
+        self.truncated = False
+        self._field = None
+
+    def parse_object(self, top_level=False):
+        # Caller guarantees text[pos] == "{"
+        self.pos += 1
+        result = {}
+
+        while True:
+            self._skip_space_and_commas()
+            if self.pos >= self.length:
+                self._repair("unterminated object")
+                self.truncated = True
+                return result
+
+            char = self.text[self.pos]
+            if char == "}":
+                self.pos += 1
+                return result
+            if char == "]":
+                # Mismatched bracket - treat it as the end of this object
+                self._repair("mismatched bracket")
+                self.pos += 1
+                return result
+
+            key = self._parse_key()
+            if key is None or self.pos >= self.length:
+                # Cut off inside a key - there is no value worth keeping
+                self.truncated = True
+                return result
+
+            if top_level:
+                self._field = key
+
+            self._skip_space()
+            if self.pos < self.length and self.text[self.pos] in ":=":
+                self.pos += 1
+            else:
+                self._repair("missing colon")
+
+            self._skip_space()
+            if self.pos >= self.length:
+                self._repair("missing value")
+                self.truncated = True
+                return result
+
+            result[key] = self.parse_value()
+
+    def parse_array(self):
+        self.pos += 1
+        result = []
+
+        while True:
+            self._skip_space_and_commas()
+            if self.pos >= self.length:
+                self._repair("unterminated array")
+                self.truncated = True
+                return result
+
+            char = self.text[self.pos]
+            if char == "]":
+                self.pos += 1
+                return result
+            if char == "}":
+                self._repair("mismatched bracket")
+                self.pos += 1
+                return result
+
+            result.append(self.parse_value())
+
+    def parse_value(self):
+        char = self.text[self.pos]
+        if char == "{":
+            return self.parse_object()
+        if char == "[":
+            return self.parse_array()
+        if char in "\"'":
+            return self.parse_string()
+        return self._parse_bare_word()
+
+    def parse_string(self):
+        quote = self.text[self.pos]
+        if quote == "'":
+            self._repair("single-quoted string")
+        self.pos += 1
+        chunks = []
+        chunk_start = self.pos
+
+        while self.pos < self.length:
+            char = self.text[self.pos]
+            if char == quote:
+                chunks.append(self.text[chunk_start:self.pos])
+                self.pos += 1
+                return "".join(chunks)
+            if char == "\\":
+                chunks.append(self.text[chunk_start:self.pos])
+                chunks.append(self._parse_escape())
+                chunk_start = self.pos
+                continue
+            if char in "\n\r\t":
+                # Raw control characters are invalid JSON but harmless here
+                chunks.append(self.text[chunk_start:self.pos])
+                chunks.append(" " if char != "\t" else "\t")
+                self.pos += 1
+                chunk_start = self.pos
+                continue
+            self.pos += 1
+
+        # Ran out of text in the middle of a string (max_tokens cut-off)
+        chunks.append(self.text[chunk_start:self.pos])
+        self._repair("unterminated string")
+        self.truncated = True
+        return "".join(chunks).rstrip()
+
+    def _parse_escape(self):
+        # Reuse the stdlib decoder for the escape itself
+        end = self.pos + 2
+        if end <= self.length and self.text[self.pos + 1] == "u":
+            end = self.pos + 6
+        escape_text = self.text[self.pos:end]
+        self.pos = min(end, self.length)
+        try:
+            return json.loads('"' + escape_text + '"')
+        except ValueError:
+            self._repair("invalid escape")
+            return escape_text[1:]
+
+    def _parse_key(self):
+        char = self.text[self.pos]
+        if char in "\"'":
+            field = self._field
+            self._field = None
+            key = self.parse_string()
+            self._field = field
+            return key
+
+        # Unquoted key: read up to the colon
+        start = self.pos
+        while self.pos < self.length and self.text[self.pos] not in ":=,{}[]\n":
+            self.pos += 1
+        key = self.text[start:self.pos].strip()
+        if not key:
+            return None
+        self._repair("unquoted key")
+        return key
+
+    def _parse_bare_word(self):
+        start = self.pos
+        while self.pos < self.length and self.text[self.pos] not in ",}]\n":
+            self.pos += 1
+        word = self.text[start:self.pos].strip()
+
+        if word in _LITERALS:
+            return _LITERALS[word]
+        try:
+            return json.loads(word)
+        except ValueError:
+            self._repair("unquoted value")
+            return word
+
+    def _skip_space(self):
+        while self.pos < self.length and self.text[self.pos] in " \t\r\n":
+            self.pos += 1
+
+    def _skip_space_and_commas(self):
+        while self.pos < self.length and self.text[self.pos] in " \t\r\n,":
+            self.pos += 1
+
+    def _repair(self, message):
+        self.repairs.append((self._field, message))
+
+
+# Function to map slightly-off key spellings ("headline", "Skills Description")
+# onto the expected field names
+def _canonical_key(key):
+    canonical = str(key).strip().upper().replace(" ", "_").replace("-", "_")
+    return canonical if canonical in EXPECTED_FIELDS else key
+
+
+def _normalize_keys(data):
+    return {_canonical_key(key): value for key, value in data.items()}
+
+
+# Upper word limits for the text fields - generous compared to the prompt,
+# so only clearly broken output is flagged
+MAX_WORDS = {
+    "HEADLINE": 16,
+    "PROFESSIONAL_BIO": 120,
+    "ABOUT_SECTION": 300,
+}
+
+
+# Function to find the sections that are missing or don't meet the schema
+# Returns a dict of field -> problem description
+def find_invalid_sections(data, fields=EXPECTED_FIELDS):
+    problems = {}
+    for field in fields:
+        value = data.get(field)
+        if field == "SKILLS_DESCRIPTION":
+            if not isinstance(value, dict) or not value:
+                problems[field] = f"{field} is missing"
+            elif len(value) != EXPECTED_SKILL_COUNT:
+                problems[field] = f"{field} has {len(value)} skills instead of {EXPECTED_SKILL_COUNT}"
+            elif not all(isinstance(desc, str) and desc.strip() for desc in value.values()):
+                problems[field] = f"{field} has empty skill descriptions"
+        elif not isinstance(value, str) or not value.strip():
+            problems[field] = f"{field} is missing"
+        elif len(value.split()) > MAX_WORDS[field]:
+            problems[field] = f"{field} is too long ({len(value.split())} words, max {MAX_WORDS[field]})"
+    return problems
+
+
+# Function to check parsed data against the expected schema
+def validate_portfolio_data(data):
+    return list(find_invalid_sections(data).values())
+
+
+# Function to parse an AI response into portfolio fields
+#
+# Returns a dict with:
+#   data       - the parsed fields (empty dict if no JSON object was found)
+#   valid      - True when the data matches the schema
+#   errors     - schema problems, e.g. "SKILLS_DESCRIPTION has 4 skills instead of 6"
+#   repaired   - True when the JSON had to be repaired to be read
+#   recovered  - top-level fields whose value needed a repair
+#   truncated  - True when the response was cut off
+def parse_portfolio_response(text):
+    result = {
+        "data": {},
+        "valid": False,
+        "errors": [],
+        "repaired": False,
+        "recovered": [],
+        "truncated": False,
+    }
+
+    start = text.find("{") if text else -1
+    if start == -1:
+        result["errors"] = ["No JSON object found in the response"]
+        return result
+
+    # Fast path: well-formed JSON is decoded in place by the C decoder,
+    # starting at the first brace so fences and preambles cost nothing
+    try:
+        data, _ = _DECODER.raw_decode(text, start)
+    except ValueError:
+        data = None
+
+    if not isinstance(data, dict):
+        parser = _TolerantParser(text, start)
+        data = parser.parse_object(top_level=True)
+        result["repaired"] = True
+        result["truncated"] = parser.truncated
+        recovered = []
+        for field, _message in parser.repairs:
+            if field is None:
+                continue
+            field = _canonical_key(field)
+            if field not in recovered:
+                recovered.append(field)
+        result["recovered"] = recovered
+
+    data = _normalize_keys(data)
+    result["data"] = data
+    result["errors"] = validate_portfolio_data(data)
+    result["valid"] = not result["errors"]
+    return result
@@ -0,0 +1,307 @@
+# Latency-aware routing across several chat completion backends
+#
+# The router keeps a rolling window of latency and errors per backend and
+# sends each request to the fastest healthy one:
+#
+#   - ranking: exponentially weighted latency, penalised by the recent error
+#     rate; a backend without measurements gets the next request (config
+#     order first) so its latency gets known, and a small share of requests
+#     explores a random healthy backend
+#   - health: `failure_threshold` consecutive failures open a circuit for
+#     `cooldown` seconds; after that the backend is tried again, and one more
+#     failure opens the circuit again
+#   - failover: a failed request moves on to the next backend in the ranking
+#   - hedging: each time a non-streamed request goes `hedge_delay` seconds
+#     without an answer, the same request also goes to the next backend, and
+#     the first success wins
+#
+# Streams are routed and failed over like other requests until the stream
+# has started; they are not hedged (two streams can't be merged).
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from utils.config import get_setting
+
+
+# This exception is raised when every backend failed for a request
+class AllBackendsFailed(Exception):
+
+    def __init__(self, errors):
+        self.errors = errors
+        summary = "; ".join(f"{name}: {error}" for name, error in errors)
+        super().__init__(f"All backends failed ({summary})")
+
+
+# This class tracks the recent latency and errors of one backend
+class BackendHealth:
+
+    def __init__(self, window=50, alpha=0.3):
+        self.alpha = alpha
+        self.latency = None
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.in_flight = 0
+        self.stats = {"requests": 0, "failures": 0, "hedges": 0, "hedge_wins": 0}
+
+    def record(self, latency, ok):
+        self.outcomes.append(ok)
+        self.stats["requests"] += 1
+        if ok:
+            self.consecutive_failures = 0
+            self.open_until = 0.0
+            self.latency = latency if self.latency is None else \
+                self.alpha * latency + (1 - self.alpha) * self.latency
+        else:
+            self.stats["failures"] += 1
+            self.consecutive_failures += 1
+
+    def error_rate(self):
+        return 1 - sum(self.outcomes) / len(self.outcomes) if self.outcomes else 0.0
+
+
+# This class picks a backend for each request and handles failover and hedging
+class Router:
+
+    def __init__(self, backends, hedge_delay=None, failure_threshold=3, cooldown=30.0,
+                 window=50, explore=0.05):
+        if not backends:
+            raise ValueError("Router needs at least one backend")
+        self.backends = list(backends)
+        self.hedge_delay = hedge_delay or None
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.explore = explore
+        self.health = {backend.name: BackendHealth(window) for backend in self.backends}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    # This method returns the backends in the order they should be tried.
+    # Backends with an open circuit come last, so a request is still
+    # attempted when all of them are down.
+    def rank(self):
+        now = time.monotonic()
+        with self._lock:
+            unmeasured, measured, failing, broken = [], [], [], []
+            for position, backend in enumerate(self.backends):
+                health = self.health[backend.name]
+                if health.consecutive_failures >= self.failure_threshold and now < health.open_until:
+                    broken.append(backend)
+                elif health.latency is not None:
+                    score = health.latency * (1 + 4 * health.error_rate())
+                    measured.append((score, position, backend))
+                elif health.consecutive_failures or health.in_flight:
+                    # Never answered yet, but failed or still busy with its
+                    # first request: behind the ones known to work
+                    failing.append(backend)
+                else:
+                    unmeasured.append(backend)
+            measured = [backend for _, _, backend in sorted(measured, key=lambda item: item[:2])]
+            healthy = unmeasured + measured + failing
+
+            # Exploring keeps latencies fresh; a backend that just failed isn't explored
+            candidates = [index for index, backend in enumerate(healthy)
+                          if index and not self.health[backend.name].consecutive_failures]
+            if candidates and random.random() < self.explore:
+                healthy.insert(0, healthy.pop(random.choice(candidates)))
+        return healthy + broken
+
+    def _start(self, backend):
+        with self._lock:
+            self.health[backend.name].in_flight += 1
+        return time.monotonic()
+
+    def _record(self, backend, started, ok):
+        now = time.monotonic()
+        with self._lock:
+            health = self.health[backend.name]
+            health.in_flight -= 1
+            health.record(now - started, ok)
+            if not ok and health.consecutive_failures >= self.failure_threshold:
+                health.open_until = now + self.cooldown
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="portfolio-hedge")
+            return self._executor
+
+    def _call(self, backend, messages, params):
+        started = self._start(backend)
+        try:
+            response, retries = backend.create(messages, **dict(params))
+        except Exception:
+            self._record(backend, started, False)
+            raise
+        self._record(backend, started, True)
+        return response, retries
+
+    async def _acall(self, backend, messages, params):
+        started = self._start(backend)
+        try:
+            response, retries = await backend.acreate(messages, **dict(params))
+        except asyncio.CancelledError:
+            # A losing hedge: neither a success nor a failure of the backend
+            with self._lock:
+                self.health[backend.name].in_flight -= 1
+            raise
+        except Exception:
+            self._record(backend, started, False)
+            raise
+        self._record(backend, started, True)
+        return response, retries
+
+    def _hedging(self, params):
+        return self.hedge_delay is not None and not params.get("stream")
+
+    def _note_hedge(self, backend):
+        with self._lock:
+            self.health[backend.name].stats["hedges"] += 1
+
+    def _note_hedge_win(self, backend):
+        with self._lock:
+            self.health[backend.name].stats["hedge_wins"] += 1
+
+    # This method sends one completion. Returns (response, retries, info)
+    # where info says which backend answered: backend, model, failovers,
+    # hedged, and errors as (backend name, exception) pairs
+    def complete(self, messages, **params):
+        queue = self.rank()
+        errors = []
+        if not self._hedging(params):
+            for backend in queue:
+                try:
+                    response, retries = self._call(backend, messages, params)
+                except Exception as e:
+                    errors.append((backend.name, e))
+                    continue
+                return response, retries, self._info(backend, errors, False)
+            raise AllBackendsFailed(errors)
+
+        # Every hedge_delay without an answer the next backend gets the request
+        # too; a failed attempt moves on right away. First success wins, the
+        # slower requests finish in the background.
+        executor = self._get_executor()
+        running, hedges = {}, set()
+        while queue or running:
+            if not running:
+                backend = queue.pop(0)
+                running[executor.submit(self._call, backend, messages, params)] = backend
+            done, _ = wait(running, timeout=self.hedge_delay if queue else None, return_when=FIRST_COMPLETED)
+            if not done:
+                backend = queue.pop(0)
+                self._note_hedge(backend)
+                hedges.add(backend.name)
+                running[executor.submit(self._call, backend, messages, params)] = backend
+                continue
+            for future in done:
+                backend = running.pop(future)
+                try:
+                    response, retries = future.result()
+                except Exception as e:
+                    errors.append((backend.name, e))
+                    continue
+                if backend.name in hedges:
+                    self._note_hedge_win(backend)
+                return response, retries, self._info(backend, errors, bool(hedges))
+        raise AllBackendsFailed(errors)
+
+    # This method is the asyncio version of complete; losing hedges are cancelled
+    async def acomplete(self, messages, **params):
+        queue = self.rank()
+        errors = []
+        if not self._hedging(params):
+            for backend in queue:
+                try:
+                    response, retries = await self._acall(backend, messages, params)
+                except Exception as e:
+                    errors.append((backend.name, e))
+                    continue
+                return response, retries, self._info(backend, errors, False)
+            raise AllBackendsFailed(errors)
+
+        running, hedges = {}, set()
+        try:
+            while queue or running:
+                if not running:
+                    backend = queue.pop(0)
+                    running[asyncio.ensure_future(self._acall(backend, messages, params))] = backend
+                done, _ = await asyncio.wait(
+                    running, timeout=self.hedge_delay if queue else None, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    backend = queue.pop(0)
+                    self._note_hedge(backend)
+                    hedges.add(backend.name)
+                    running[asyncio.ensure_future(self._acall(backend, messages, params))] = backend
+                    continue
+                for task in done:
+                    backend = running.pop(task)
+                    try:
+                        response, retries = task.result()
+                    except Exception as e:
+                        errors.append((backend.name, e))
+                        continue
+                    if backend.name in hedges:
+                        self._note_hedge_win(backend)
+                    return response, retries, self._info(backend, errors, bool(hedges))
+        finally:
+            for task in running:
+                task.cancel()
+        raise AllBackendsFailed(errors)
+
+    def get_backend(self, name):
+        for backend in self.backends:
+            if backend.name == name:
+                return backend
+        return None
+
+    @staticmethod
+    def _info(backend, errors, hedged):
+        return {"backend": backend, "model": backend.model, "failovers": len(errors), "hedged": hedged, "errors": errors}
+
+    # This method returns latency, error rate and circuit state per backend
+    def get_stats(self):
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for backend in self.backends:
+                health = self.health[backend.name]
+                stats[backend.name] = dict(
+                    health.stats,
+                    model=backend.model,
+                    latency_s=round(health.latency, 4) if health.latency is not None else None,
+                    error_rate=round(health.error_rate(), 3),
+                    healthy=not (health.consecutive_failures >= self.failure_threshold and now < health.open_until),
+                )
+        return stats
+
+
+_default_router = None
+_default_router_lock = threading.Lock()
+
+
+# Function to get the process-wide router, or None when PORTFOLIO_BACKENDS is
+# unset (the generator then talks to Groq directly, as before)
+def get_default_router():
+    global _default_router
+    backends = get_setting("PORTFOLIO_BACKENDS")
+    if not backends:
+        return None
+    with _default_router_lock:
+        if _default_router is None:
+            # Imported here: httpx is only needed once backends are configured
+            from utils.providers import load_backends
+
+            _default_router = Router(
+                load_backends(backends),
+                hedge_delay=get_setting("PORTFOLIO_HEDGE_DELAY", 0.0, float),
+                failure_threshold=get_setting("PORTFOLIO_FAILURE_THRESHOLD", 3, int),
+                cooldown=get_setting("PORTFOLIO_BACKEND_COOLDOWN", 30.0, float),
+            )
+        return _default_router
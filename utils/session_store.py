@@ -0,0 +1,135 @@
+# Session store - the portfolio a browser session is looking at, kept once
+# per process instead of once per tab. Only the parsed AI fields and the
+# inputs are stored (HTML is re-rendered from them on demand), records are
+# content-addressed so sessions with the same result share one copy, and
+# sessions that go idle or overflow the memory ceiling are dropped.
+
+import hashlib
+import json
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from utils.config import get_setting
+
+
+# This class maps session ids to content-addressed, optionally zlib-compressed
+# records. A record lives as long as at least one session points at it.
+class SessionStore:
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, idle_seconds=3600, compress=True):
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.compress = compress
+        self._records = {}              # key -> [encoded bytes, sessions using it]
+        self._sessions = OrderedDict()  # session id -> [key, last seen], least recent first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"stored": 0, "shared": 0, "evicted_idle": 0, "evicted_memory": 0}
+
+    # This method stores a record for a session and returns its key. The
+    # session's previous record is released.
+    def put(self, session_id, record):
+        data = json.dumps(record, sort_keys=True, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        key = hashlib.sha256(data).hexdigest()
+        now = time.monotonic()
+
+        with self._lock:
+            self.stats["stored"] += 1
+            if key in self._records:
+                self.stats["shared"] += 1
+            else:
+                encoded = zlib.compress(data, 6) if self.compress else data
+                self._records[key] = [encoded, 0]
+                self._bytes += len(encoded)
+
+            # Take the new reference before dropping the old one, so storing
+            # the same record again doesn't free it in between
+            self._records[key][1] += 1
+            self._release(session_id)
+            self._sessions[session_id] = [key, now]
+            self._evict(now, keep=session_id)
+        return key
+
+    # This method returns the record stored under key, or None once every
+    # session using it has been evicted
+    def get(self, key):
+        with self._lock:
+            entry = self._records.get(key)
+        if entry is None:
+            return None
+        data = zlib.decompress(entry[0]) if self.compress else entry[0]
+        return json.loads(data)
+
+    # This method marks a session as active; call it on every script run
+    def touch(self, session_id):
+        now = time.monotonic()
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id][1] = now
+                self._sessions.move_to_end(session_id)
+            self._evict(now, keep=session_id)
+
+    # This method drops a session's reference, e.g. when its tab is closed
+    def discard(self, session_id):
+        with self._lock:
+            self._release(session_id)
+
+    # This method returns sessions, records and bytes held against the ceiling
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                "sessions": len(self._sessions),
+                "records": len(self._records),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+            })
+        return stats
+
+    def _release(self, session_id):
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return
+        record = self._records[entry[0]]
+        record[1] -= 1
+        if record[1] == 0:
+            del self._records[entry[0]]
+            self._bytes -= len(record[0])
+
+    # Idle sessions go first (oldest first, so the scan stops at the first
+    # active one), then the least recently seen until under the ceiling
+    def _evict(self, now, keep=None):
+        cutoff = now - self.idle_seconds
+        while self._sessions:
+            session_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if last_seen >= cutoff or session_id == keep:
+                break
+            self._release(session_id)
+            self.stats["evicted_idle"] += 1
+
+        for session_id in list(self._sessions):
+            if self._bytes <= self.max_bytes:
+                break
+            if session_id != keep:
+                self._release(session_id)
+                self.stats["evicted_memory"] += 1
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+# Function to get the process-wide session store (PORTFOLIO_SESSION_MAX_MB,
+# PORTFOLIO_SESSION_IDLE_SECONDS, PORTFOLIO_SESSION_COMPRESS)
+def get_default_session_store():
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = SessionStore(
+                max_bytes=int(get_setting("PORTFOLIO_SESSION_MAX_MB", 64, float) * 1024 * 1024),
+                idle_seconds=get_setting("PORTFOLIO_SESSION_IDLE_SECONDS", 3600, float),
+                compress=get_setting("PORTFOLIO_SESSION_COMPRESS", "1").lower() in ("1", "true", "yes"),
+            )
+        return _default_store
@@ -0,0 +1,224 @@
+# Near-duplicate lookup for generation requests
+#
+# Exact cache keys only match identical (normalized) inputs. This index keeps
+# a MinHash signature of every generated request's role, skills, experience
+# and projects, so a new request that is nearly the same as an earlier one can
+# start from that generation as a draft instead of waiting for the API.
+#
+#   - features: canonical skill tokens plus words and word pairs of the text fields
+#   - signature: SIGNATURE_SIZE minimum hashes; the share of equal positions
+#     estimates the Jaccard similarity of two feature sets
+#   - LSH: signatures are cut into BANDS bands; requests sharing any band are
+#     the only candidates compared, so lookups don't scan the whole index
+#
+# The name is left out of the features. A draft made for someone else only
+# comes back if their name can be swapped out of the text completely.
+
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.cache import DEFAULT_CACHE_PATH, canonical_skills, normalize_user_data
+from utils.config import get_setting
+
+
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS_PER_BAND = SIGNATURE_SIZE // BANDS
+
+# Free-text fields compared word by word
+TEXT_FIELDS = ("role", "experience", "projects")
+
+# Fixed seed: signatures are stored on disk and must stay comparable
+_PRIME = (1 << 61) - 1
+_random = random.Random(20240611)
+_PERMUTATIONS = tuple(
+    (_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(SIGNATURE_SIZE)
+)
+
+
+# Function to turn user data into the set of features that gets compared
+def get_features(user_data):
+    normalized = normalize_user_data(user_data)
+    features = {f"skill:{skill}" for skill in canonical_skills(normalized.get("skills") or "")}
+    for field in TEXT_FIELDS:
+        words = re.findall(r"\w+", str(normalized.get(field) or "").casefold())
+        features.update(f"{field}:{word}" for word in words)
+        features.update(f"{field}:{first} {second}" for first, second in zip(words, words[1:]))
+    return features
+
+
+# Function to compute the MinHash signature of a feature set
+def get_signature(features):
+    if not features:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+              for feature in features]
+    return tuple(min((a * value + b) % _PRIME for value in hashes) for a, b in _PERMUTATIONS)
+
+
+# Function to estimate the Jaccard similarity of two signatures
+def estimate_similarity(first, second):
+    return sum(1 for a, b in zip(first, second) if a == b) / SIGNATURE_SIZE
+
+
+def _bands(signature):
+    return [(band, hash(signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND])) for band in range(BANDS)]
+
+
+# Function to reuse a generation made for another name. Returns None when a
+# part of the old name would still be left in the text.
+def rename_draft(content, old_name, new_name):
+    old_name = " ".join(str(old_name or "").split())
+    new_name = " ".join(str(new_name or "").split())
+    if old_name.casefold() == new_name.casefold():
+        return content
+
+    # The content is JSON text, so the new name goes in JSON-escaped
+    replacement = json.dumps(new_name, ensure_ascii=False)[1:-1]
+    renamed = content
+    if old_name:
+        renamed = re.sub(re.escape(old_name), lambda _match: replacement, content, flags=re.IGNORECASE)
+    new_parts = {part.casefold() for part in new_name.split()}
+    for part in old_name.split():
+        if len(part) > 2 and part.casefold() not in new_parts and \
+                re.search(rf"\b{re.escape(part)}\b", renamed, flags=re.IGNORECASE):
+            return None
+    return renamed
+
+
+# This class finds earlier requests that are nearly the same as a new one
+class SimilarityIndex:
+
+    # Constructor to load the index; with a path, signatures are kept in a
+    # table next to the response cache so they survive restarts
+    def __init__(self, threshold=0.85, path=None, max_items=5000):
+        self.threshold = threshold
+        self.max_items = max_items
+
+        self._entries = OrderedDict()
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "near_hits": 0, "indexed": 0}
+
+        self._db = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS near_duplicates ("
+                "key TEXT PRIMARY KEY, name TEXT NOT NULL, "
+                "signature TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+            rows = self._db.execute(
+                "SELECT key, name, signature FROM near_duplicates ORDER BY created DESC LIMIT ?",
+                (max_items,),
+            ).fetchall()
+            for key, name, signature in reversed(rows):
+                self._insert(key, name, tuple(json.loads(signature)))
+
+    # This method indexes a generated request under its cache key
+    def add(self, key, user_data):
+        signature = get_signature(get_features(user_data))
+        if signature is None:
+            return
+        name = " ".join(str(user_data.get("name") or "").split())
+        with self._lock:
+            self._insert(key, name, signature)
+            self.stats["indexed"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO near_duplicates (key, name, signature, created) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, name, json.dumps(signature), time.time()),
+                )
+                self._db.commit()
+            while len(self._entries) > self.max_items:
+                self._remove(next(iter(self._entries)))
+
+    # This method returns the most similar indexed request at or above the
+    # threshold as {"key", "name", "similarity"}, or None
+    def find(self, user_data, exclude_key=None):
+        signature = get_signature(get_features(user_data))
+        with self._lock:
+            self.stats["lookups"] += 1
+            if signature is None:
+                return None
+
+            candidates = set()
+            for band in _bands(signature):
+                candidates.update(self._buckets.get(band, ()))
+            candidates.discard(exclude_key)
+
+            best = None
+            for key in candidates:
+                name, other = self._entries[key]
+                similarity = estimate_similarity(signature, other)
+                if similarity >= self.threshold and (best is None or similarity > best["similarity"]):
+                    best = {"key": key, "name": name, "similarity": similarity}
+            if best is not None:
+                self.stats["near_hits"] += 1
+            return best
+
+    # This method forgets a key (e.g. its cache entry expired)
+    def remove(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["items"] = len(self._entries)
+        stats["near_hit_rate"] = stats["near_hits"] / stats["lookups"] if stats["lookups"] else 0.0
+        return stats
+
+    def _insert(self, key, name, signature):
+        if key in self._entries:
+            self._remove(key, keep_row=True)
+        self._entries[key] = (name, signature)
+        for band in _bands(signature):
+            self._buckets.setdefault(band, set()).add(key)
+
+    def _remove(self, key, keep_row=False):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for band in _bands(entry[1]):
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+        if self._db is not None and not keep_row:
+            self._db.execute("DELETE FROM near_duplicates WHERE key = ?", (key,))
+            self._db.commit()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+# Function to get the process-wide index, or None when near-duplicate drafts
+# are off (PORTFOLIO_NEAR_DUP_THRESHOLD unset or 0)
+def get_default_similarity_index():
+    global _default_index
+    threshold = get_setting("PORTFOLIO_NEAR_DUP_THRESHOLD", 0.0, float)
+    if threshold <= 0:
+        return None
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = SimilarityIndex(
+                threshold=threshold,
+                path=get_setting("PORTFOLIO_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_items=get_setting("PORTFOLIO_CACHE_MAX_ITEMS", 5000, int),
+            )
+        return _default_index
@@ -0,0 +1,134 @@
+# Speculative generation - while a user fills in the form, start the
+# generation they are about to ask for once the inputs stop changing, so
+# clicking Generate can pick up a job that is already running or finished
+
+import threading
+import time
+
+from utils.config import get_setting
+from utils.job_queue import get_default_job_queue
+
+
+# This class debounces input changes per session and runs at most
+# `max_per_session` speculative jobs for each one. A speculation is only
+# started when the job queue has an idle worker, so it never delays a
+# generation somebody clicked for.
+class Speculator:
+
+    def __init__(self, job_queue, debounce_seconds=2.0, max_per_session=3, idle_seconds=3600):
+        self.job_queue = job_queue
+        self.debounce_seconds = debounce_seconds
+        self.max_per_session = max_per_session
+        self.idle_seconds = idle_seconds
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self.stats = {"scheduled": 0, "started": 0, "claimed": 0, "stale": 0,
+                      "skipped_budget": 0, "skipped_busy": 0}
+
+    # This method is called on every script run with a fingerprint of the
+    # current inputs (None while required fields are missing). A new
+    # fingerprint stops the previous speculation and schedules
+    # target(job, *args, **kwargs) after the debounce interval.
+    def update(self, session_id, fingerprint, target, *args, **kwargs):
+        now = time.monotonic()
+        with self._lock:
+            self._prune(now)
+            state = self._sessions.setdefault(session_id, {"fingerprint": None, "timer": None,
+                                                           "job_id": None, "started": 0})
+            state["seen"] = now
+            if fingerprint == state["fingerprint"]:
+                return
+            self._stop(state)
+            state["fingerprint"] = fingerprint
+            if fingerprint is None:
+                return
+            if state["started"] >= self.max_per_session:
+                self.stats["skipped_budget"] += 1
+                return
+
+            timer = threading.Timer(self.debounce_seconds, self._start,
+                                    (session_id, fingerprint, target, args, kwargs))
+            timer.daemon = True
+            state["timer"] = timer
+            self.stats["scheduled"] += 1
+            timer.start()
+
+    # This method hands over the speculative job for these inputs, if there
+    # is one. The caller owns the job from then on. Without a match, a
+    # pending speculation is dropped since the real generation starts now.
+    def claim(self, session_id, fingerprint):
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return None
+            if state["fingerprint"] == fingerprint and state["job_id"] is not None:
+                job_id, state["job_id"] = state["job_id"], None
+                self.stats["claimed"] += 1
+                return job_id
+            self._stop(state)
+            state["fingerprint"] = fingerprint
+            return None
+
+    # This method stops and forgets a session's speculation
+    def discard(self, session_id):
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+            if state is not None:
+                self._stop(state)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["sessions"] = len(self._sessions)
+        return stats
+
+    def _start(self, session_id, fingerprint, target, args, kwargs):
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or state["fingerprint"] != fingerprint:
+                return
+            state["timer"] = None
+            queue_stats = self.job_queue.get_stats()
+            if queue_stats["queue_depth"] or queue_stats["running"] >= queue_stats["workers"]:
+                self.stats["skipped_busy"] += 1
+                return
+            state["job_id"] = self.job_queue.submit(target, *args, name="speculative_generation", **kwargs)
+            state["started"] += 1
+            self.stats["started"] += 1
+
+    def _stop(self, state):
+        if state["timer"] is not None:
+            state["timer"].cancel()
+            state["timer"] = None
+        if state["job_id"] is not None:
+            # A finished speculation isn't wasted: its result is in the response cache
+            if self.job_queue.stop(state["job_id"], "superseded"):
+                self.stats["stale"] += 1
+            state["job_id"] = None
+
+    # Sessions that went quiet (closed tabs) are forgotten
+    def _prune(self, now):
+        cutoff = now - self.idle_seconds
+        for session_id in [session_id for session_id, state in self._sessions.items() if state["seen"] < cutoff]:
+            self._stop(self._sessions.pop(session_id))
+
+
+_default_speculator = None
+_default_speculator_lock = threading.Lock()
+
+
+# Function to get the process-wide speculator, or None unless
+# PORTFOLIO_SPECULATE is on (PORTFOLIO_SPECULATE_DEBOUNCE seconds,
+# PORTFOLIO_SPECULATE_MAX speculations per session)
+def get_default_speculator():
+    global _default_speculator
+    if get_setting("PORTFOLIO_SPECULATE", "").lower() not in ("1", "true", "yes"):
+        return None
+    with _default_speculator_lock:
+        if _default_speculator is None:
+            _default_speculator = Speculator(
+                get_default_job_queue(),
+                debounce_seconds=get_setting("PORTFOLIO_SPECULATE_DEBOUNCE", 2.0, float),
+                max_per_session=get_setting("PORTFOLIO_SPECULATE_MAX", 3, int),
+            )
+        return _default_speculator
@@ -0,0 +1,153 @@
+# Incremental JSON parser - surfaces portfolio fields while the AI is still writing
+
+import json
+
+
+# This class consumes streamed text and reports each field as soon as it is closed
+class IncrementalJSONParser:
+
+    # Fields are reported for members of the top-level object (depth 1)
+    # and members of objects nested directly in it (depth 2), e.g. each
+    # SKILLS_DESCRIPTION entry
+    MAX_REPORT_DEPTH = 2
+
+    def __init__(self):
+        self.buffer = ""
+        self.result = {}
+
+        self._pos = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+
+        # One entry per open container: its type, current key and value state
+        self._stack = []
+
+    # This method adds a new chunk and returns the fields completed by it
+    # Each event is a (path, value) tuple, e.g. (("HEADLINE",), "...") or
+    # (("SKILLS_DESCRIPTION", "Python"), "...")
+    def feed(self, text):
+        self.buffer += text
+        events = []
+
+        while self._pos < len(self.buffer):
+            pos = self._pos
+            char = self.buffer[pos]
+            self._pos += 1
+
+            # Skip any preamble or markdown fence before the JSON starts
+            if not self._started:
+                if char == "{":
+                    self._started = True
+                    self._open("object")
+                continue
+
+            if not self._stack:
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._close_string(pos, events)
+                continue
+
+            frame = self._stack[-1]
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif char == ":":
+                frame["value_start"] = pos + 1
+                frame["done"] = False
+            elif char == ",":
+                self._finish_primitive(pos, events)
+                if frame["type"] == "object":
+                    frame["expect_key"] = True
+                frame["value_start"] = None if frame["type"] == "object" else pos + 1
+                frame["done"] = False
+            elif char in "{[":
+                self._open("object" if char == "{" else "array")
+            elif char in "}]":
+                self._finish_primitive(pos, events)
+                closed = self._stack.pop()
+                if self._stack:
+                    self._close_container(closed, pos, events)
+
+        return events
+
+    # This method tells whether the whole top-level object has been closed
+    def is_complete(self):
+        return self._started and not self._stack
+
+    def _open(self, kind):
+        if self._stack:
+            self._stack[-1]["done"] = False
+        self._stack.append({
+            "type": kind,
+            "key": None,
+            "expect_key": kind == "object",
+            "value_start": None if kind == "object" else self._pos,
+            "done": False,
+        })
+
+    def _close_string(self, end, events):
+        frame = self._stack[-1]
+        raw = self.buffer[self._string_start:end + 1]
+        if frame["type"] == "object" and frame["expect_key"]:
+            frame["key"] = self._loads(raw)
+            frame["expect_key"] = False
+            return
+        frame["done"] = True
+        self._report(self._decode(raw), events)
+
+    def _close_container(self, closed, end, events):
+        parent = self._stack[-1]
+        parent["done"] = True
+        if parent["value_start"] is None:
+            return
+        value = self._loads(self.buffer[parent["value_start"]:end + 1])
+        if value is not None:
+            self._report(value, events)
+
+    def _finish_primitive(self, end, events):
+        frame = self._stack[-1]
+        if frame["done"] or frame["value_start"] is None:
+            return
+        raw = self.buffer[frame["value_start"]:end].strip()
+        frame["done"] = True
+        if raw:
+            value = self._loads(raw)
+            if value is not None:
+                self._report(value, events)
+
+    def _report(self, value, events):
+        depth = len(self._stack)
+        if depth > self.MAX_REPORT_DEPTH:
+            return
+        path = tuple(frame["key"] for frame in self._stack)
+        if None in path:
+            return
+
+        if depth == 1:
+            self.result[path[0]] = value
+        else:
+            parent = self.result.setdefault(path[0], {})
+            if isinstance(parent, dict):
+                parent[path[1]] = value
+        events.append((path, value))
+
+    def _decode(self, raw):
+        value = self._loads(raw)
+        return raw[1:-1] if value is None else value
+
+    @staticmethod
+    def _loads(raw):
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None